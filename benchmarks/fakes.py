@@ -0,0 +1,100 @@
+"""
+Offline stand-ins for the embedding model and tokenizer, so benchmarks run without network access or model servers.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from zk_chat.embedding_cache import EmbeddingCache
+from zk_chat.embedding_gateway import EmbeddingGateway
+
+_WORD = re.compile(r"\w+")
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+class FakeEmbeddingGateway(EmbeddingGateway):
+    """
+    Deterministic embedding stand-in with configurable latency.
+
+    Each text is embedded as a hashed bag of words scaled to unit length, so texts sharing words get similar
+    vectors. Every request sleeps ``request_latency`` seconds plus ``per_text_latency`` seconds per text,
+    mimicking the round trip and compute time of a model server.
+    """
+
+    def __init__(self, dimensions: int = 256, request_latency: float = 0.0, per_text_latency: float = 0.0,
+                 cache: Optional[EmbeddingCache] = None):
+        """
+        Initialize the gateway.
+
+        Args:
+            dimensions: Number of dimensions of each embedding
+            request_latency: Seconds each embedding request takes regardless of its size
+            per_text_latency: Additional seconds each request takes per text embedded
+            cache: Optional persistent cache of previously calculated embeddings
+        """
+        super().__init__(llm_gateway=None, cache=cache)
+        self.dimensions = dimensions
+        self.request_latency = request_latency
+        self.per_text_latency = per_text_latency
+        self.requests = 0
+        self.texts_embedded = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def model_key(self) -> str:
+        return f"fake:{self.dimensions}"
+
+    def _calculate_uncached(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        time.sleep(self.request_latency + self.per_text_latency * len(texts))
+        embeddings = [self._embed(text) for text in texts]
+        with self._lock:
+            self.requests += 1
+            self.texts_embedded += len(texts)
+            self.seconds += time.perf_counter() - started
+        return embeddings
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD.findall(text.lower()):
+            slot, sign = _hash_word(word, self.dimensions)
+            vector[slot] += sign
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+
+@lru_cache(maxsize=65536)
+def _hash_word(word: str, dimensions: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+    return digest % dimensions, 1.0 if digest & (1 << 63) else -1.0
+
+
+class WhitespaceTokenizer:
+    """
+    Tokenizer stand-in that treats each word and the whitespace after it as one token.
+
+    Decoding tokens gives back exactly the text they were encoded from, as with the real tokenizer.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        with self._lock:
+            return [self._id(token) for token in _TOKEN.findall(text)]
+
+    def decode(self, tokens: List[int]) -> str:
+        return "".join(self._tokens[token] for token in tokens)
+
+    def _id(self, token: str) -> int:
+        if token not in self._ids:
+            self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return self._ids[token]
@@ -0,0 +1,43 @@
+import math
+
+from benchmarks.fakes import FakeEmbeddingGateway, WhitespaceTokenizer
+
+
+class DescribeFakeEmbeddingGateway:
+    def should_embed_same_text_to_same_unit_vector(self):
+        gateway = FakeEmbeddingGateway(dimensions=32)
+
+        first, second = gateway.calculate_embeddings_batch(["a note about links", "a note about links"])
+
+        assert first == second
+        assert len(first) == 32
+        assert math.isclose(math.hypot(*first), 1.0)
+
+    def should_embed_texts_sharing_words_closer_than_unrelated_texts(self):
+        gateway = FakeEmbeddingGateway(dimensions=256)
+
+        note, similar, unrelated = gateway.calculate_embeddings_batch(
+            ["vector index of notes", "vector index of excerpts", "weekly meeting agenda"])
+
+        assert sum(a * b for a, b in zip(note, similar)) > sum(a * b for a, b in zip(note, unrelated))
+
+    def should_count_requests_and_texts(self):
+        gateway = FakeEmbeddingGateway(dimensions=8, request_latency=0.001)
+
+        gateway.calculate_embeddings_batch(["one", "two"])
+        gateway.calculate_embeddings_batch(["three"])
+
+        assert gateway.requests == 2
+        assert gateway.texts_embedded == 3
+        assert gateway.seconds >= 0.002
+
+
+class DescribeWhitespaceTokenizer:
+    def should_decode_tokens_back_to_original_text(self):
+        tokenizer = WhitespaceTokenizer()
+        text = "  # Heading\n\nSome words,  spaced out.\n"
+
+        assert tokenizer.decode(tokenizer.encode(text)) == text
+
+    def should_count_each_word_as_one_token(self):
+        assert len(WhitespaceTokenizer().encode("three little words")) == 3
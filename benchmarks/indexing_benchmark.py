@@ -0,0 +1,236 @@
+"""
+Indexing throughput benchmark.
+
+Indexes a synthetic vault into a real Chroma database with an offline embedding stand-in, and reports documents
+and chunks per second, peak memory and the time spent in each indexing stage (from the run's IndexRunReport)
+for a full reindex, an update with nothing to do, and an update after editing some of the notes.
+
+Run with ``python -m benchmarks.indexing_benchmark --help``.
+"""
+import argparse
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Set log levels early to prevent chatty output
+logging.basicConfig(level=logging.WARN)
+
+# Disable ChromaDB telemetry to avoid PostHog compatibility issues
+os.environ['CHROMA_TELEMETRY'] = 'false'
+from pydantic import BaseModel
+
+from benchmarks.fakes import FakeEmbeddingGateway, WhitespaceTokenizer
+from benchmarks.synthetic_vault import SyntheticVault
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.config import ChunkingStrategy, DocumentVectorStrategy, ModelGateway
+from zk_chat.index_manifest import get_index_manifest_path
+from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
+from zk_chat.vector_database import VectorDatabase
+from zk_chat.zettelkasten import Zettelkasten
+
+
+class BenchmarkSettings(BaseModel):
+    """Vault shape and indexing configuration for a benchmark run."""
+    documents: int = 500
+    links_per_document: int = 5
+    sections_per_document: int = 3
+    edit_fraction: float = 0.1
+    chunk_size: int = 500
+    chunk_overlap: int = 100
+    chunking: ChunkingStrategy = ChunkingStrategy.MARKDOWN
+    document_vectors: DocumentVectorStrategy = DocumentVectorStrategy.FULL_TEXT
+    batch_size: int = 32
+    embedding_concurrency: int = 1
+    request_latency: float = 0.0
+    per_text_latency: float = 0.0
+    dimensions: int = 256
+    trace_memory: bool = False
+    seed: int = 42
+
+
+class BenchmarkResult(BaseModel):
+    """Throughput, memory and stage timings of one indexing scenario."""
+    scenario: str
+    documents: int
+    chunks: int
+    embedding_requests: int
+    seconds: float
+    docs_per_second: float
+    chunks_per_second: float
+    peak_memory_mb: float
+    peak_python_memory_mb: Optional[float] = None
+    stage_seconds: Dict[str, float]
+
+
+class BenchmarkReport(BaseModel):
+    """The settings and results of a benchmark run, as written to JSON."""
+    settings: BenchmarkSettings
+    results: List[BenchmarkResult]
+
+
+class IndexingBenchmark:
+    """
+    Runs the indexing scenarios against a synthetic vault in a working directory.
+
+    Preparation runs in a thread with the whitespace tokenizer, as preparation worker processes need the real
+    tokenizer's downloaded data.
+    """
+
+    def __init__(self, settings: BenchmarkSettings, work_dir: Path):
+        self.settings = settings
+        self.work_dir = work_dir
+        self.embedding_gateway = FakeEmbeddingGateway(dimensions=settings.dimensions,
+                                                      request_latency=settings.request_latency,
+                                                      per_text_latency=settings.per_text_latency)
+        self.vault = SyntheticVault(n_documents=settings.documents, links_per_document=settings.links_per_document,
+                                    sections_per_document=settings.sections_per_document, seed=settings.seed)
+
+    def run(self) -> List[BenchmarkResult]:
+        vault_path = self.vault.build(self.work_dir)
+        zk = self._create_zettelkasten(vault_path)
+        excerpt_size, excerpt_overlap = self.settings.chunk_size, self.settings.chunk_overlap
+
+        results = [
+            self._measure("full reindex", zk, lambda: zk.reindex(excerpt_size, excerpt_overlap)),
+            self._measure("unchanged update", zk, lambda: zk.update_index(
+                excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)),
+        ]
+        self._edit_notes(vault_path)
+        results.append(self._measure("edited update", zk, lambda: zk.update_index(
+            excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)))
+        return results
+
+    def _create_zettelkasten(self, vault_path: Path) -> Zettelkasten:
+        db_dir = os.path.join(vault_path, ".zk_chat_db")
+        chroma = ChromaGateway(ModelGateway.OLLAMA, db_dir=db_dir)
+        return Zettelkasten(
+            tokenizer_gateway=WhitespaceTokenizer(),
+            excerpts_db=VectorDatabase(chroma, self.embedding_gateway, ZkCollectionName.EXCERPTS,
+                                       batch_size=self.settings.batch_size),
+            documents_db=VectorDatabase(chroma, self.embedding_gateway, ZkCollectionName.DOCUMENTS,
+                                        batch_size=self.settings.batch_size),
+            filesystem_gateway=MarkdownFilesystemGateway(str(vault_path)),
+            manifest_path=get_index_manifest_path(db_dir, ModelGateway.OLLAMA.value),
+            embedding_concurrency=self.settings.embedding_concurrency,
+            chunking=self.settings.chunking,
+            document_vectors=self.settings.document_vectors)
+
+    def _edit_notes(self, vault_path: Path) -> None:
+        """Append a paragraph to a share of the notes, as when a day's edits are indexed."""
+        paths = sorted(vault_path.rglob("*.md"))
+        n_edits = round(len(paths) * self.settings.edit_fraction)
+        for i, path in enumerate(paths[:n_edits]):
+            with open(path, "a") as f:
+                f.write(f"\nAn edit appended to the note for benchmark run {i}.\n")
+
+    def _measure(self, scenario: str, zk: Zettelkasten, index: Callable[[], None]) -> BenchmarkResult:
+        requests_before = self.embedding_gateway.requests
+        peak_python = None
+        if self.settings.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            index()
+            seconds = time.perf_counter() - started
+            if self.settings.trace_memory:
+                peak_python = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        finally:
+            if self.settings.trace_memory:
+                tracemalloc.stop()
+
+        run = zk.last_run
+        documents, chunks = run.documents, run.embedded_excerpts
+        return BenchmarkResult(
+            scenario=scenario,
+            documents=documents,
+            chunks=chunks,
+            embedding_requests=self.embedding_gateway.requests - requests_before,
+            seconds=round(seconds, 4),
+            docs_per_second=round(documents / seconds, 2) if seconds else 0.0,
+            chunks_per_second=round(chunks / seconds, 2) if seconds else 0.0,
+            peak_memory_mb=round(_peak_rss_bytes() / (1024 * 1024), 2),
+            peak_python_memory_mb=peak_python,
+            stage_seconds=run.stage_seconds
+        )
+
+
+def _peak_rss_bytes() -> int:
+    """The process's peak resident set size so far; it never decreases, so later scenarios report at least as much."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """Format benchmark results as a plain text table."""
+    stages = sorted({stage for result in results for stage in result.stage_seconds})
+    traced = any(result.peak_python_memory_mb is not None for result in results)
+    header = ["scenario", "docs", "chunks", "requests", "seconds", "docs/s", "chunks/s", "peak MB"] + \
+        (["python MB"] if traced else []) + [f"{stage} s" for stage in stages]
+    rows = [[result.scenario, str(result.documents), str(result.chunks), str(result.embedding_requests),
+             f"{result.seconds:.2f}", f"{result.docs_per_second:.1f}", f"{result.chunks_per_second:.1f}",
+             f"{result.peak_memory_mb:.1f}"] +
+            ([f"{result.peak_python_memory_mb or 0.0:.1f}"] if traced else []) +
+            [f"{result.stage_seconds.get(stage, 0.0):.2f}" for stage in stages]
+            for result in results]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in [header] + rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark indexing throughput on a synthetic vault')
+    parser.add_argument('--documents', type=int, default=500, help='Number of notes in the synthetic vault')
+    parser.add_argument('--links', type=int, default=5, help='Number of wikilinks in each note')
+    parser.add_argument('--sections', type=int, default=3, help='Number of headed sections in each note')
+    parser.add_argument('--edit-fraction', type=float, default=0.1,
+                        help='Share of notes edited before the last update')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Excerpt size in tokens')
+    parser.add_argument('--chunk-overlap', type=int, default=100, help='Excerpt overlap in tokens')
+    parser.add_argument('--chunking', choices=[strategy.value for strategy in ChunkingStrategy],
+                        default=ChunkingStrategy.MARKDOWN.value, help='How notes are split into excerpts')
+    parser.add_argument('--document-vectors', choices=[strategy.value for strategy in DocumentVectorStrategy],
+                        default=DocumentVectorStrategy.FULL_TEXT.value, help='How document vectors are calculated')
+    parser.add_argument('--batch-size', type=int, default=32, help='Texts embedded per request')
+    parser.add_argument('--concurrency', type=int, default=1, help='Embedding requests in flight at once')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Milliseconds each embedding request takes')
+    parser.add_argument('--per-text-latency-ms', type=float, default=0.0,
+                        help='Additional milliseconds each embedding request takes per text')
+    parser.add_argument('--trace-memory', action='store_true', default=False,
+                        help='Also measure peak Python heap use with tracemalloc (slows indexing down)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic vault')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    settings = BenchmarkSettings(
+        documents=args.documents,
+        links_per_document=args.links,
+        sections_per_document=args.sections,
+        edit_fraction=args.edit_fraction,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        chunking=ChunkingStrategy(args.chunking),
+        document_vectors=DocumentVectorStrategy(args.document_vectors),
+        batch_size=args.batch_size,
+        embedding_concurrency=args.concurrency,
+        request_latency=args.latency_ms / 1000,
+        per_text_latency=args.per_text_latency_ms / 1000,
+        trace_memory=args.trace_memory,
+        seed=args.seed
+    )
+    with tempfile.TemporaryDirectory(prefix="zk-chat-benchmark-") as work_dir:
+        results = IndexingBenchmark(settings, Path(work_dir)).run()
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(BenchmarkReport(settings=settings, results=results).model_dump_json(indent=2))
+
+
+if __name__ == '__main__':
+    main()
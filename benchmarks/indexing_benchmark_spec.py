@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.indexing_benchmark import BenchmarkSettings, IndexingBenchmark, format_results
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    settings = BenchmarkSettings(documents=20, links_per_document=2, edit_fraction=0.25, chunk_size=100,
+                                 chunk_overlap=20, dimensions=16)
+    return IndexingBenchmark(settings, tmp_path_factory.mktemp("benchmark")).run()
+
+
+class DescribeIndexingBenchmark:
+    def should_index_every_document_in_full_reindex(self, results):
+        full = results[0]
+
+        assert full.scenario == "full reindex"
+        assert full.documents == 20
+        assert full.chunks > 20
+        assert full.embedding_requests > 0
+        assert full.docs_per_second > 0
+        assert {"read", "parse", "split", "plan", "embed", "write"} <= set(full.stage_seconds)
+
+    def should_embed_nothing_when_vault_is_unchanged(self, results):
+        unchanged = results[1]
+
+        assert unchanged.documents == 0
+        assert unchanged.embedding_requests == 0
+
+    def should_only_index_edited_documents(self, results):
+        edited = results[2]
+
+        assert edited.documents == 5
+        assert 0 < edited.chunks < results[0].chunks
+
+    def should_format_results_as_table(self, results):
+        lines = format_results(results).splitlines()
+
+        assert lines[0].split()[:3] == ["scenario", "docs", "chunks"]
+        assert len(lines) == 4
@@ -0,0 +1,87 @@
+"""
+Synthetic vault generator for indexing benchmarks.
+
+Generates deterministic vaults of any size and link density, written to disk with the integration tests' VaultBuilder.
+"""
+import random
+from pathlib import Path
+from typing import List
+
+from integration_tests.scenario_harness import Document
+from integration_tests.vault_builder import VaultBuilder
+
+WORDS = (
+    "note idea link index vector excerpt archive garden thought reference source concept question answer "
+    "pattern context memory summary draft outline topic theme evidence claim method result insight project "
+    "review habit system process model signal structure network atomic permanent fleeting literature zettel"
+).split()
+FOLDERS = ["", "projects", "areas", "resources", "archive/2023", "archive/2024"]
+TAGS = ["research", "writing", "learning", "software", "reading", "meeting"]
+
+
+class SyntheticVault:
+    """
+    Generates notes that look like a real Zettelkasten: frontmatter, headings, paragraphs, lists, occasional
+    code blocks and wikilinks to other notes. The same seed always generates the same vault.
+    """
+
+    def __init__(self, n_documents: int = 100, links_per_document: int = 5, sections_per_document: int = 3,
+                 paragraphs_per_section: int = 2, seed: int = 42):
+        """
+        Initialize the generator.
+
+        Args:
+            n_documents: Number of notes in the vault
+            links_per_document: Number of wikilinks in each note
+            sections_per_document: Number of headed sections in each note
+            paragraphs_per_section: Number of paragraphs in each section
+            seed: Seed for the random generator, so runs are repeatable
+        """
+        self.n_documents = n_documents
+        self.links_per_document = links_per_document
+        self.sections_per_document = sections_per_document
+        self.paragraphs_per_section = paragraphs_per_section
+        self.seed = seed
+
+    def generate(self) -> List[Document]:
+        rng = random.Random(self.seed)
+        titles = [f"Note {i:05d} {rng.choice(WORDS).title()}" for i in range(self.n_documents)]
+        return [self._generate_document(rng, titles, i) for i in range(self.n_documents)]
+
+    def build(self, base_path: Path) -> Path:
+        """
+        Write the vault to disk.
+
+        Returns path to created vault.
+        """
+        return VaultBuilder(base_path).build(self.generate())
+
+    def _generate_document(self, rng: random.Random, titles: List[str], index: int) -> Document:
+        folder = FOLDERS[index % len(FOLDERS)]
+        links = [rng.choice(titles) for _ in range(self.links_per_document)] if len(titles) > 1 else []
+
+        blocks = [f"# {titles[index]}"]
+        for section in range(self.sections_per_document):
+            blocks.append(f"## {self._sentence(rng, 2, 5).rstrip('.')}")
+            for _ in range(self.paragraphs_per_section):
+                blocks.append(self._paragraph(rng))
+            if section % 2 == 1:
+                blocks.append("\n".join(f"- {self._sentence(rng, 3, 8)}" for _ in range(rng.randint(2, 5))))
+            if rng.random() < 0.1:
+                blocks.append("```python\n" + "\n".join(f"{rng.choice(WORDS)} = {rng.randint(0, 99)}"
+                                                        for _ in range(rng.randint(2, 6))) + "\n```")
+        if links:
+            blocks.append("## Related\n" + "\n".join(f"- [[{title}]]" for title in links))
+
+        return Document(
+            path=f"{folder}/{titles[index]}.md".lstrip("/"),
+            content="\n\n".join(blocks) + "\n",
+            metadata={"tags": rng.sample(TAGS, 2), "created": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}"}
+        )
+
+    def _paragraph(self, rng: random.Random) -> str:
+        return " ".join(self._sentence(rng, 6, 16) for _ in range(rng.randint(2, 5)))
+
+    def _sentence(self, rng: random.Random, min_words: int, max_words: int) -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+        return " ".join(words).capitalize() + "."
@@ -0,0 +1,30 @@
+import re
+
+from benchmarks.synthetic_vault import SyntheticVault
+
+
+class DescribeSyntheticVault:
+    def should_generate_requested_number_of_documents(self):
+        documents = SyntheticVault(n_documents=12).generate()
+
+        assert len(documents) == 12
+        assert len({document.path for document in documents}) == 12
+
+    def should_generate_same_vault_for_same_seed(self):
+        assert SyntheticVault(n_documents=5, seed=7).generate() == SyntheticVault(n_documents=5, seed=7).generate()
+
+    def should_link_each_document_to_existing_notes(self):
+        documents = SyntheticVault(n_documents=10, links_per_document=3).generate()
+        titles = {document.path.rsplit("/", 1)[-1][:-len(".md")] for document in documents}
+
+        for document in documents:
+            links = re.findall(r"\[\[([^\]]+)\]\]", document.content)
+            assert len(links) == 3
+            assert set(links) <= titles
+
+    def should_write_documents_with_frontmatter(self, tmp_path):
+        vault_path = SyntheticVault(n_documents=3).build(tmp_path)
+
+        files = sorted(vault_path.rglob("*.md"))
+        assert len(files) == 3
+        assert all(file.read_text().startswith("---\ntags:\n") for file in files)
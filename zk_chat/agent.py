@@ -15,16 +15,13 @@ from pathlib import Path
 from typing import List
 
 from mojentic.llm import LLMBroker
-from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 from mojentic.llm.tools.date_resolver import ResolveDateTool
 from mojentic.llm.tools.current_datetime import CurrentDateTimeTool
 from mojentic.llm.tools.llm_tool import LLMTool
 
-from zk_chat.chroma_collections import ZkCollectionName
 from zk_chat.cli import add_common_args, common_init, display_banner
 from zk_chat.config import Config, ModelGateway
 from zk_chat.iterative_problem_solving_agent import IterativeProblemSolvingAgent
-from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
 from zk_chat.memory.smart_memory import SmartMemory
 from zk_chat.tools.analyze_image import AnalyzeImage
 from zk_chat.tools.commit_changes import CommitChanges
@@ -32,6 +29,7 @@ from zk_chat.tools.create_or_overwrite_zk_document import CreateOrOverwriteZkDoc
 from zk_chat.tools.delete_zk_document import DeleteZkDocument
 from zk_chat.tools.extract_wikilinks_from_document import ExtractWikilinksFromDocument
 from zk_chat.tools.find_backlinks import FindBacklinks
+from zk_chat.tools.find_excerpts_for_queries import FindExcerptsForQueries
 from zk_chat.tools.find_excerpts_related_to import FindExcerptsRelatedTo
 from zk_chat.tools.find_forward_links import FindForwardLinks
 from zk_chat.tools.find_zk_documents_related_to import FindZkDocumentsRelatedTo
@@ -44,12 +42,11 @@ from zk_chat.tools.resolve_wikilink import ResolveWikiLink
 from zk_chat.tools.retrieve_from_smart_memory import RetrieveFromSmartMemory
 from zk_chat.tools.store_in_smart_memory import StoreInSmartMemory
 from zk_chat.tools.uncommitted_changes import UncommittedChanges
-from zk_chat.vector_database import VectorDatabase
-from zk_chat.zettelkasten import Zettelkasten
+from zk_chat.zettelkasten_factory import create_zettelkasten
 
 from mojentic.llm.gateways import OllamaGateway
 from mojentic.llm.gateways import OpenAIGateway
-from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.vector_store import create_vector_gateway
 from zk_chat.mcp_client import verify_all_mcp_servers
 
 
@@ -68,7 +65,7 @@ def agent(config: Config):
             print("Use 'zk-chat mcp verify' to check server status or 'zk-chat mcp list' to see all servers.\n")
 
     db_dir = os.path.join(config.vault, ".zk_chat_db")
-    chroma_gateway = ChromaGateway(config.gateway, db_dir=db_dir)
+    chroma_gateway = create_vector_gateway(config, db_dir)
 
     if config.gateway.value == ModelGateway.OLLAMA:
         gateway = OllamaGateway()
@@ -77,21 +74,8 @@ def agent(config: Config):
     else:
         raise ValueError(f"Invalid gateway: {config.gateway}")
 
-    filesystem_gateway = MarkdownFilesystemGateway(config.vault)
-    zk = Zettelkasten(
-        tokenizer_gateway=TokenizerGateway(),
-        excerpts_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.EXCERPTS
-        ),
-        documents_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.DOCUMENTS
-        ),
-        filesystem_gateway=filesystem_gateway
-    )
+    zk = create_zettelkasten(config, chroma_gateway, gateway, for_queries=True)
+    filesystem_gateway = zk.filesystem_gateway
 
     llm = LLMBroker(config.model, gateway=gateway)
 
@@ -113,6 +97,7 @@ def agent(config: Config):
         ListZkImages(zk),
         ResolveWikiLink(filesystem_gateway),
         FindExcerptsRelatedTo(zk),
+        FindExcerptsForQueries(zk),
         FindZkDocumentsRelatedTo(zk),
         CreateOrOverwriteZkDocument(zk),
         RenameZkDocument(zk),
@@ -185,7 +170,7 @@ def agent_single_query(config: Config, query: str) -> str:
         The agent's response as a string
     """
     db_dir = os.path.join(config.vault, ".zk_chat_db")
-    chroma_gateway = ChromaGateway(config.gateway, db_dir=db_dir)
+    chroma_gateway = create_vector_gateway(config, db_dir)
 
     if config.gateway.value == ModelGateway.OLLAMA:
         gateway = OllamaGateway()
@@ -194,21 +179,8 @@ def agent_single_query(config: Config, query: str) -> str:
     else:
         raise ValueError(f"Invalid gateway: {config.gateway}")
 
-    filesystem_gateway = MarkdownFilesystemGateway(config.vault)
-    zk = Zettelkasten(
-        tokenizer_gateway=TokenizerGateway(),
-        excerpts_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.EXCERPTS
-        ),
-        documents_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.DOCUMENTS
-        ),
-        filesystem_gateway=filesystem_gateway
-    )
+    zk = create_zettelkasten(config, chroma_gateway, gateway, for_queries=True)
+    filesystem_gateway = zk.filesystem_gateway
 
     llm = LLMBroker(config.model, gateway=gateway)
     smart_memory = SmartMemory(chroma_gateway=chroma_gateway, gateway=gateway)
@@ -225,6 +197,7 @@ def agent_single_query(config: Config, query: str) -> str:
         ListZkImages(zk),
         ResolveWikiLink(filesystem_gateway),
         FindExcerptsRelatedTo(zk),
+        FindExcerptsForQueries(zk),
         FindZkDocumentsRelatedTo(zk),
         CreateOrOverwriteZkDocument(zk),
         RenameZkDocument(zk),
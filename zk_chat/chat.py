@@ -15,10 +15,8 @@ from typing import List
 from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
 from mojentic.llm.tools.llm_tool import LLMTool
 
-from zk_chat.chroma_collections import ZkCollectionName
 from zk_chat.cli import add_common_args, common_init, display_banner
 from zk_chat.console_service import RichConsoleService
-from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
 from zk_chat.memory.smart_memory import SmartMemory
 from zk_chat.models import ZkDocument
 from zk_chat.tools.analyze_image import AnalyzeImage
@@ -33,20 +31,19 @@ from zk_chat.tools.uncommitted_changes import UncommittedChanges
 
 from mojentic.llm.tools.date_resolver import ResolveDateTool
 
+from zk_chat.tools.find_excerpts_for_queries import FindExcerptsForQueries
 from zk_chat.tools.find_excerpts_related_to import FindExcerptsRelatedTo
 from zk_chat.tools.find_zk_documents_related_to import FindZkDocumentsRelatedTo
 from zk_chat.tools.read_zk_document import ReadZkDocument
 from zk_chat.tools.create_or_overwrite_zk_document import CreateOrOverwriteZkDocument
 from zk_chat.tools.rename_zk_document import RenameZkDocument
 from zk_chat.tools.delete_zk_document import DeleteZkDocument
-from zk_chat.vector_database import VectorDatabase
 
 from mojentic.llm import LLMBroker, ChatSession
-from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 
 from zk_chat.config import Config, ModelGateway
-from zk_chat.chroma_gateway import ChromaGateway
-from zk_chat.zettelkasten import Zettelkasten
+from zk_chat.vector_store import create_vector_gateway
+from zk_chat.zettelkasten_factory import create_zettelkasten
 from zk_chat.services import ServiceRegistry, ServiceType, ServiceProvider
 from zk_chat.mcp_client import verify_all_mcp_servers
 
@@ -67,9 +64,9 @@ def chat(config: Config, unsafe: bool = False, use_git: bool = False, store_prom
 
     console_service = RichConsoleService()
 
-    # Create a single ChromaGateway instance to access multiple collections
+    # Create a single vector store gateway to access multiple collections
     db_dir = os.path.join(config.vault, ".zk_chat_db")
-    chroma_gateway = ChromaGateway(config.gateway, db_dir=db_dir)
+    chroma_gateway = create_vector_gateway(config, db_dir)
 
     if config.gateway.value == ModelGateway.OLLAMA:
         gateway = OllamaGateway()
@@ -78,23 +75,8 @@ def chat(config: Config, unsafe: bool = False, use_git: bool = False, store_prom
     else:
         raise ValueError(f"Invalid gateway: {config.gateway}")
 
-    filesystem_gateway = MarkdownFilesystemGateway(config.vault)
-    tokenizer_gateway = TokenizerGateway()
-
-    zk = Zettelkasten(
-        tokenizer_gateway=tokenizer_gateway,
-        excerpts_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.EXCERPTS
-        ),
-        documents_db=VectorDatabase(
-            chroma_gateway=chroma_gateway,
-            gateway=gateway,
-            collection_name=ZkCollectionName.DOCUMENTS
-        ),
-        filesystem_gateway=filesystem_gateway
-    )
+    zk = create_zettelkasten(config, chroma_gateway, gateway, for_queries=True)
+    filesystem_gateway = zk.filesystem_gateway
 
     llm = LLMBroker(config.model, gateway=gateway)
 
@@ -113,7 +95,7 @@ def chat(config: Config, unsafe: bool = False, use_git: bool = False, store_prom
     service_registry.register_service(ServiceType.SMART_MEMORY, smart_memory)
     service_registry.register_service(ServiceType.CHROMA_GATEWAY, chroma_gateway)
     service_registry.register_service(ServiceType.MODEL_GATEWAY, gateway)
-    service_registry.register_service(ServiceType.TOKENIZER_GATEWAY, tokenizer_gateway)
+    service_registry.register_service(ServiceType.TOKENIZER_GATEWAY, zk.tokenizer_gateway)
 
     tools: List[LLMTool] = [
         ResolveDateTool(),
@@ -122,6 +104,7 @@ def chat(config: Config, unsafe: bool = False, use_git: bool = False, store_prom
         ListZkImages(zk, console_service),
         ResolveWikiLink(filesystem_gateway, console_service),
         FindExcerptsRelatedTo(zk, console_service),
+        FindExcerptsForQueries(zk, console_service),
         FindZkDocumentsRelatedTo(zk, console_service),
         StoreInSmartMemory(smart_memory, console_service),
         RetrieveFromSmartMemory(smart_memory, console_service)
@@ -1,21 +1,28 @@
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import chromadb
+import structlog
 from chromadb import Settings
 from chromadb.api.models.Collection import Collection
 
 from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.collection_pointers import CollectionPointers, VersionedCollections
 from zk_chat.config import ModelGateway
 
+logger = structlog.get_logger()
 
-class ChromaGateway:
+
+class ChromaGateway(VersionedCollections):
     """
     Gateway to Chroma vector database that supports multiple collections.
 
     This class provides access to different collections in the Chroma database,
     specifically 'excerpts' and 'documents' collections, while maintaining
     backward compatibility with the deprecated 'zettelkasten' collection.
+
+    Collections can be rebuilt into versioned shadow collections while queries keep using the active ones,
+    as described in VersionedCollections.
     """
 
     def __init__(self, gateway: ModelGateway, db_dir: str):
@@ -29,33 +36,36 @@ class ChromaGateway:
             path=os.path.join(db_dir, gateway.value),
             settings=Settings(allow_reset=True),
         )
+        super().__init__(os.path.join(db_dir, f"{gateway.value}_collections.json"))
 
-        # Initialize collections dictionary
-        self._collections: Dict[ZkCollectionName, Collection] = {}
+        # Initialize collections dictionary, keyed by physical collection name
+        self._collections: Dict[str, Collection] = {}
 
-    def get_collection(self, collection_name: ZkCollectionName) -> Collection:
+    def get_collection(self, collection_name: ZkCollectionName, shadow: bool = False) -> Collection:
         """
         Get or create a collection with the specified name.
 
         Args:
             collection_name: The name of the collection to get or create
+            shadow: Get the shadow collection being rebuilt instead of the active one
 
         Returns:
             The requested collection
         """
-        if collection_name not in self._collections:
+        physical_name = self._physical_name(collection_name, shadow)
+        if physical_name not in self._collections:
             # Create HNSW configuration with cosine distance
             # hnsw_config = HNSWConfiguration(space="cosine")
             # collection_config = CollectionConfiguration(hnsw_configuration=hnsw_config)
 
-            self._collections[collection_name] = self.chroma_client.get_or_create_collection(
-                name=collection_name.value,
+            self._collections[physical_name] = self.chroma_client.get_or_create_collection(
+                name=physical_name,
                 metadata={"hsnw:space": "cosine"},
             )
-        return self._collections[collection_name]
-
+        return self._collections[physical_name]
 
-    def add_items(self, ids, documents, metadatas, embeddings, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN):
+    def add_items(self, ids, documents, metadatas, embeddings, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN,
+                  shadow: bool = False):
         """
         Add items to a collection.
 
@@ -65,14 +75,63 @@ class ChromaGateway:
             metadatas: The metadata for each document
             embeddings: The embeddings for each document
             collection_name: The name of the collection to add items to
+            shadow: Add the items to the shadow collection being rebuilt
         """
-        collection = self.get_collection(collection_name)
+        collection = self.get_collection(collection_name, shadow)
         collection.upsert(
             ids=ids,
             documents=documents,
             metadatas=metadatas,
             embeddings=embeddings,
         )
+        if not shadow:
+            self._bump_version()
+
+    def get_items(self, where: Optional[Dict] = None, include: Optional[List[str]] = None,
+                  collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False):
+        """
+        Get stored items from a collection, optionally filtered by metadata.
+
+        Args:
+            where: A metadata filter selecting the items to get (all items if None)
+            include: The fields to include, e.g. "documents", "metadatas" or "embeddings"
+            collection_name: The name of the collection to get items from
+            shadow: Get the items from the shadow collection being rebuilt
+
+        Returns:
+            The stored items
+        """
+        collection = self.get_collection(collection_name, shadow)
+        return collection.get(where=where, include=include or ["metadatas"])
+
+    def delete_items(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+                     collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False):
+        """
+        Delete items from a collection by id or by metadata filter.
+
+        Args:
+            ids: The IDs of the items to delete
+            where: A metadata filter selecting the items to delete
+            collection_name: The name of the collection to delete items from
+            shadow: Delete the items from the shadow collection being rebuilt
+        """
+        collection = self.get_collection(collection_name, shadow)
+        collection.delete(ids=ids, where=where)
+        if not shadow:
+            self._bump_version()
+
+    def count_items(self, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False) -> int:
+        """
+        Count the items in a collection without reading them.
+
+        Args:
+            collection_name: The name of the collection to count
+            shadow: Count the items in the shadow collection being rebuilt
+
+        Returns:
+            The number of items in the collection
+        """
+        return self.get_collection(collection_name, shadow).count()
 
     def reset_indexes(self, collection_name: Optional[ZkCollectionName] = None):
         """
@@ -83,19 +142,17 @@ class ChromaGateway:
         """
         if collection_name:
             # Reset a specific collection
-            try:
-                self.chroma_client.delete_collection(collection_name.value)
-            except (ValueError, Exception):
-                # Collection does not exist - this is fine
-                pass
-            self._collections.pop(collection_name, None)
+            self._drop_collection(self._physical_name(collection_name))
             self.get_collection(collection_name)
         else:
             # Reset all collections
             self.chroma_client.reset()
             self._collections = {}
+            self._save_pointers(CollectionPointers(generation=self._load_pointers().generation))
+        self._bump_version()
 
-    def query(self, query_embeddings, n_results, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN):
+    def query(self, query_embeddings, n_results, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN,
+              shadow: bool = False):
         """
         Query a collection.
 
@@ -103,9 +160,18 @@ class ChromaGateway:
             query_embeddings: The embeddings to query with
             n_results: The number of results to return
             collection_name: The name of the collection to query
+            shadow: Query the shadow collection being rebuilt
 
         Returns:
             The query results
         """
-        collection = self.get_collection(collection_name)
+        collection = self.get_collection(collection_name, shadow)
         return collection.query(query_embeddings=query_embeddings, n_results=n_results)
+
+    def _drop_collection(self, physical_name: str) -> None:
+        try:
+            self.chroma_client.delete_collection(physical_name)
+        except (ValueError, Exception):
+            # Collection does not exist - this is fine
+            pass
+        self._collections.pop(physical_name, None)
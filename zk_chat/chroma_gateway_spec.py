@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.config import ModelGateway
+
+
+@pytest.fixture
+def chroma(tmp_path):
+    return ChromaGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+
+
+def add_item(chroma, item_id, shadow=False):
+    chroma.add_items(ids=[item_id], documents=[item_id], metadatas=[{"id": item_id}], embeddings=[[0.1, 0.2]],
+                     collection_name=ZkCollectionName.EXCERPTS, shadow=shadow)
+
+
+def stored_ids(chroma, shadow=False):
+    return chroma.get_items(collection_name=ZkCollectionName.EXCERPTS, shadow=shadow)['ids']
+
+
+class DescribeChromaGateway:
+    """
+    Describes the ChromaGateway which stores vectors in logical collections backed by versioned Chroma collections
+    """
+
+    def should_keep_serving_active_collection_while_shadow_is_built(self, chroma):
+        add_item(chroma, "old")
+
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(chroma, "new", shadow=True)
+
+        assert stored_ids(chroma) == ["old"]
+        assert stored_ids(chroma, shadow=True) == ["new"]
+
+    def should_serve_shadow_collection_once_promoted(self, chroma):
+        add_item(chroma, "old")
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(chroma, "new", shadow=True)
+
+        chroma.promote_shadow_collections()
+
+        assert stored_ids(chroma) == ["new"]
+
+    def should_keep_retired_collection_until_next_rebuild(self, chroma):
+        add_item(chroma, "old")
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        chroma.promote_shadow_collections()
+        assert "excerpts" in [collection.name for collection in chroma.chroma_client.list_collections()]
+
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+
+        assert "excerpts" not in [collection.name for collection in chroma.chroma_client.list_collections()]
+        assert "excerpts_v1" in [collection.name for collection in chroma.chroma_client.list_collections()]
+
+    def should_pick_up_promotion_made_by_another_gateway(self, chroma, tmp_path):
+        add_item(chroma, "old")
+        assert stored_ids(chroma) == ["old"]
+        rebuilder = ChromaGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+        rebuilder.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(rebuilder, "new", shadow=True)
+
+        rebuilder.promote_shadow_collections()
+
+        assert stored_ids(chroma) == ["new"]
+
+    def should_discard_abandoned_shadow_collection_when_rebuild_restarts(self, chroma):
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(chroma, "partial", shadow=True)
+
+        shadow_name = chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+
+        assert shadow_name == "excerpts_v2"
+        assert stored_ids(chroma, shadow=True) == []
+
+    def should_reject_shadow_access_without_rebuild(self, chroma):
+        with pytest.raises(ValueError):
+            stored_ids(chroma, shadow=True)
+
+    def should_report_shadow_collection_until_promoted(self, chroma):
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        assert chroma.has_shadow_collection(ZkCollectionName.EXCERPTS)
+
+        chroma.promote_shadow_collections()
+
+        assert not chroma.has_shadow_collection(ZkCollectionName.EXCERPTS)
+
+    def should_count_items_in_active_and_shadow_collections(self, chroma):
+        add_item(chroma, "a")
+        add_item(chroma, "b")
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(chroma, "c", shadow=True)
+
+        assert chroma.count_items(ZkCollectionName.EXCERPTS) == 2
+        assert chroma.count_items(ZkCollectionName.EXCERPTS, shadow=True) == 1
+
+    def should_change_index_version_when_active_collection_is_written(self, chroma, tmp_path):
+        reader = ChromaGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+        before = reader.index_version()
+
+        add_item(chroma, "a")
+
+        assert reader.index_version() != before
+
+    def should_change_index_version_when_version_file_keeps_its_timestamp(self, chroma, tmp_path):
+        reader = ChromaGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+        add_item(chroma, "a")
+        before = reader.index_version()
+        mtime_ns = os.stat(chroma.version_path).st_mtime_ns
+
+        with open(chroma.version_path, "w") as f:
+            f.write("another token")
+        os.utime(chroma.version_path, ns=(mtime_ns, mtime_ns))
+
+        assert reader.index_version() != before
+
+    def should_keep_index_version_while_shadow_collection_is_written(self, chroma):
+        add_item(chroma, "a")
+        chroma.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        before = chroma.index_version()
+
+        add_item(chroma, "b", shadow=True)
+        assert chroma.index_version() == before
+
+        chroma.promote_shadow_collections()
+        assert chroma.index_version() != before
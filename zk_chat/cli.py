@@ -17,7 +17,7 @@ from zk_chat.console_service import RichConsoleService
 from zk_chat.global_config import GlobalConfig
 from zk_chat.index import reindex
 from zk_chat.memory.smart_memory import SmartMemory
-from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.vector_store import create_vector_gateway
 from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
 from rich.console import Console
 
@@ -71,6 +71,8 @@ def add_common_args(parser: argparse.ArgumentParser):
     parser.add_argument('--list-bookmarks', action='store_true', help='List all bookmarks')
     parser.add_argument('--reindex', action='store_true', help='Reindex the Zettelkasten vault')
     parser.add_argument('--full', action='store_true', help='Force full reindex (only with --reindex)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted full reindex from its last checkpoint (only with --reindex)')
     parser.add_argument('--gateway', choices=['ollama', 'openai'], default=None,
                         help='Set the model gateway to use (ollama or openai). OpenAI requires OPENAI_API_KEY environment variable')
     parser.add_argument('--model', nargs='?', const="choose",
@@ -180,7 +182,7 @@ def common_init(args):
 
         if args.reset_memory:
             db_dir = os.path.join(vault_path, ".zk_chat_db")
-            chroma_gateway = ChromaGateway(config.gateway, db_dir=db_dir)
+            chroma_gateway = create_vector_gateway(config, db_dir)
 
             if config.gateway == ModelGateway.OLLAMA:
                 gateway = OllamaGateway()
@@ -195,7 +197,7 @@ def common_init(args):
             return
 
         if args.reindex:
-            reindex(config, force_full=args.full)
+            reindex(config, force_full=args.full, resume=args.resume)
     else:
         gateway = ModelGateway.OLLAMA
         if args.gateway:
@@ -0,0 +1,197 @@
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+import structlog
+from pydantic import BaseModel, Field
+
+from zk_chat.chroma_collections import ZkCollectionName
+
+logger = structlog.get_logger()
+
+
+class CollectionPointers(BaseModel):
+    """
+    Which physical collection backs each logical collection.
+
+    ``active`` collections answer queries, ``building`` collections are shadow copies being rebuilt, and ``retired``
+    collections were replaced by the last promotion but are kept for processes still reading them.
+    Collections without an entry are stored under their logical name, as in indexes created before shadow rebuilds.
+    """
+    generation: int = 0
+    active: Dict[str, str] = Field(default_factory=dict)
+    building: Dict[str, str] = Field(default_factory=dict)
+    retired: List[str] = Field(default_factory=list)
+
+
+class VersionedCollections(ABC):
+    """
+    Logical collections backed by versioned physical collections, so a collection can be rebuilt into a shadow copy
+    while queries keep using the active one.
+
+    A pointer file records which physical collections are active, and is replaced atomically when a rebuild is
+    promoted, so every process sharing the store switches to the new collections together. Collections retired by a
+    promotion are kept until the next rebuild starts, so a process that read the old pointers can finish its queries.
+    Subclasses store the physical collections, creating them in ``get_collection`` and deleting them in
+    ``_drop_collection``.
+
+    A version file beside the pointer file is replaced with a new random token whenever the active collections
+    change, so query results cached by any process sharing the store can be told apart from stale ones. Subclasses call
+    ``_bump_version`` after writing to an active collection.
+    """
+
+    def __init__(self, pointers_path: str):
+        """
+        Initialize the collections.
+
+        Args:
+            pointers_path: Where the pointer file is stored
+        """
+        self.pointers_path = pointers_path
+        self.version_path = f"{os.path.splitext(pointers_path)[0]}.version"
+        self._pointers = CollectionPointers()
+        self._pointers_mtime = None
+
+    @abstractmethod
+    def get_collection(self, collection_name: ZkCollectionName, shadow: bool = False):
+        """
+        Get or create the physical collection that backs a logical collection.
+
+        Args:
+            collection_name: The logical collection
+            shadow: Get the shadow collection being rebuilt instead of the active one
+
+        Returns:
+            The physical collection
+        """
+
+    def create_shadow_collection(self, collection_name: ZkCollectionName) -> str:
+        """
+        Create an empty, versioned shadow collection to rebuild a collection into.
+
+        Any shadow collection left behind by an interrupted rebuild, and the collections retired by the previous
+        promotion, are discarded first.
+
+        Args:
+            collection_name: The logical collection to rebuild
+
+        Returns:
+            The physical name of the shadow collection
+        """
+        pointers = self._load_pointers()
+        abandoned = pointers.building.get(collection_name.value)
+        if abandoned is not None:
+            self._drop_collection(abandoned)
+        for physical_name in pointers.retired:
+            if physical_name not in pointers.active.values():
+                self._drop_collection(physical_name)
+        pointers.retired = []
+
+        pointers.generation += 1
+        shadow_name = f"{collection_name.value}_v{pointers.generation}"
+        pointers.building[collection_name.value] = shadow_name
+        self._save_pointers(pointers)
+        self.get_collection(collection_name, shadow=True)
+        logger.info("Created shadow collection", collection=collection_name.value, shadow=shadow_name)
+        return shadow_name
+
+    def has_shadow_collection(self, collection_name: ZkCollectionName) -> bool:
+        """
+        Check whether a shadow collection is being built for a collection, e.g. by an interrupted rebuild.
+
+        Args:
+            collection_name: The logical collection
+
+        Returns:
+            True if a shadow collection is recorded for the collection
+        """
+        return collection_name.value in self._load_pointers().building
+
+    def promote_shadow_collections(self) -> None:
+        """
+        Make every shadow collection the active one in a single atomic update.
+
+        The collections they replace are recorded as retired and dropped when the next rebuild starts.
+        """
+        pointers = self._load_pointers()
+        if not pointers.building:
+            return
+        retired = [pointers.active.get(name, name) for name in pointers.building]
+        pointers.active.update(pointers.building)
+        pointers.building = {}
+        pointers.retired.extend(name for name in retired if name not in pointers.active.values())
+        self._save_pointers(pointers)
+        logger.info("Promoted shadow collections", active=pointers.active, retired=pointers.retired)
+
+        self._bump_version()
+
+    def physical_collection_name(self, collection_name: ZkCollectionName, shadow: bool = False) -> str:
+        """
+        Get the name of the physical collection that backs a logical collection.
+
+        Args:
+            collection_name: The logical collection
+            shadow: Get the shadow collection being rebuilt instead of the active one
+
+        Returns:
+            The physical collection name
+        """
+        return self._physical_name(collection_name, shadow)
+
+    def index_version(self) -> str:
+        """
+        Get a token that changes whenever the active collections are written to, by this or another process.
+
+        The token is read from the version file on every call rather than inferred from its inode and modification
+        time, which a replace can leave unchanged on filesystems with coarse timestamps.
+
+        Returns:
+            The current version token, empty if the active collections were never written through a gateway
+        """
+        try:
+            with open(self.version_path, 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def _bump_version(self) -> None:
+        """Replace the version token, marking query results cached against the previous one as stale."""
+        os.makedirs(os.path.dirname(self.version_path), exist_ok=True)
+        temporary_path = f"{self.version_path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(temporary_path, self.version_path)
+
+    def _physical_name(self, collection_name: ZkCollectionName, shadow: bool = False) -> str:
+        pointers = self._load_pointers()
+        if shadow:
+            if collection_name.value not in pointers.building:
+                raise ValueError(f"No shadow collection is being built for {collection_name.value}")
+            return pointers.building[collection_name.value]
+        return pointers.active.get(collection_name.value, collection_name.value)
+
+    def _load_pointers(self) -> CollectionPointers:
+        """Read the pointer file when it changed, so a rebuild promoted by another process is picked up."""
+        try:
+            mtime = os.stat(self.pointers_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime != self._pointers_mtime:
+            with open(self.pointers_path, 'r') as f:
+                self._pointers = CollectionPointers.model_validate_json(f.read())
+            self._pointers_mtime = mtime
+        return self._pointers.model_copy(deep=True)
+
+    def _save_pointers(self, pointers: CollectionPointers) -> None:
+        os.makedirs(os.path.dirname(self.pointers_path), exist_ok=True)
+        temporary_path = f"{self.pointers_path}.tmp"
+        with open(temporary_path, 'w') as f:
+            f.write(pointers.model_dump_json())
+        os.replace(temporary_path, self.pointers_path)
+        self._pointers = pointers
+        self._pointers_mtime = os.stat(self.pointers_path).st_mtime_ns
+
+    @abstractmethod
+    def _drop_collection(self, physical_name: str) -> None:
+        """Delete a physical collection and its stored items, ignoring collections that do not exist."""
@@ -33,6 +33,10 @@ console = Console()
 def rebuild(
     vault: Annotated[Optional[Path], typer.Option("--vault", "-v", help="Path to your Zettelkasten vault")] = None,
     full: Annotated[bool, typer.Option("--full", help="Force full rebuild (slower but comprehensive)")] = False,
+    resume: Annotated[bool, typer.Option("--resume",
+                                         help="Resume an interrupted full rebuild from its last checkpoint")] = False,
+    plan: Annotated[bool, typer.Option("--plan",
+                                       help="Show what would be indexed and the tokens it would embed, then stop")] = False,
     gateway: Annotated[Optional[str], typer.Option("--gateway", "-g", help="Model gateway (ollama/openai)")] = None,
     model: Annotated[Optional[str], typer.Option("--model", "-m", help="Model for generating embeddings")] = None,
 ):
@@ -43,16 +47,25 @@ def rebuild(
 
     • [green]Incremental[/] (default): Only processes new/modified files
     • [green]Full[/] (--full): Rebuilds entire index from scratch
+    • [green]Resume[/] (--resume): Continues an interrupted full rebuild from its last checkpoint
+    • [green]Plan[/] (--plan): Lists the files to add, change and remove, and counts the excerpts and
+      tokens that would be embedded, without calling the embedding model
 
     [bold]Examples:[/]
 
     • [cyan]zk-chat index rebuild[/] - Quick incremental update
     • [cyan]zk-chat index rebuild --full[/] - Complete rebuild
+    • [cyan]zk-chat index rebuild --resume[/] - Pick up a full rebuild that was interrupted
+    • [cyan]zk-chat index rebuild --plan[/] - Estimate what the next update will embed before paying for it
     • [cyan]zk-chat index rebuild --vault ~/notes[/] - Rebuild specific vault
 
     [bold yellow]💡 Tip:[/] Use incremental rebuild for regular maintenance,
     full rebuild after major changes or troubleshooting.
     """
+    if plan:
+        _print_plan(vault, full)
+        return
+
     class Args:
         def __init__(self):
             self.vault = str(vault) if vault else None
@@ -62,6 +75,7 @@ def rebuild(
             self.visual_model = None
             self.reindex = True  # This is an index command, always reindex
             self.full = full
+            self.resume = resume
             self.unsafe = False
             self.git = False
             self.store_prompt = True
@@ -80,9 +94,82 @@ def rebuild(
     console.print("[dim]Your Zettelkasten is ready for fast searching.[/]")
 
 
+def _print_plan(vault: Optional[Path], full: bool):
+    """Print the plan of an index update for a vault that has already been set up, without indexing anything."""
+    from zk_chat.config import Config
+    from zk_chat.global_config import GlobalConfig
+    from zk_chat.index import format_plan, plan
+
+    vault_path = str(vault.resolve()) if vault else GlobalConfig.load().get_last_opened_bookmark_path()
+    config = Config.load(vault_path) if vault_path and os.path.exists(vault_path) else None
+    if not config:
+        console.print("[red]❌ Error:[/] No zk-chat configuration found, nothing to plan.")
+        console.print("[yellow]Use:[/] [cyan]zk-chat index rebuild --plan --vault /path/to/vault[/]")
+        raise typer.Exit(1)
+
+    console.print(format_plan(plan(config, force_full=full)), markup=False, highlight=False)
+
+
+@index_app.command()
+def watch(
+    vault: Annotated[Optional[Path], typer.Option("--vault", "-v", help="Path to your Zettelkasten vault")] = None,
+    gateway: Annotated[Optional[str], typer.Option("--gateway", "-g", help="Model gateway (ollama/openai)")] = None,
+    debounce: Annotated[float, typer.Option("--debounce", help="Seconds the vault must be quiet before indexing")] = 2.0,
+    poll: Annotated[bool, typer.Option("--poll", help="Scan for changes instead of using inotify")] = False,
+    interval: Annotated[float, typer.Option("--interval", help="Seconds between scans when polling")] = 5.0,
+):
+    """
+    Keep the search index up to date as your notes change.
+
+    Brings the index up to date, then watches the vault and indexes notes within seconds
+    of them being created, edited, moved or deleted.
+
+    [bold]Change Detection:[/]
+
+    • [green]inotify[/] (Linux): The kernel reports changes, nothing runs while the vault is idle
+    • [green]Polling[/] (elsewhere, or --poll): Compares file sizes and times every --interval seconds
+
+    [bold]Examples:[/]
+
+    • [cyan]zk-chat index watch[/] - Watch the bookmarked vault
+    • [cyan]zk-chat index watch --vault ~/notes --debounce 5[/] - Wait for 5 quiet seconds before indexing
+
+    [bold yellow]💡 Tip:[/] Run this in place of a scheduled [cyan]zk-chat index rebuild[/].
+    """
+    from zk_chat.index import watch as watch_vault
+
+    class Args:
+        def __init__(self):
+            self.vault = str(vault) if vault else None
+            self.save = False
+            self.gateway = gateway
+            self.model = None
+            self.visual_model = None
+            self.reindex = True  # Catch up on changes made while not watching
+            self.full = False
+            self.resume = False
+            self.unsafe = False
+            self.git = False
+            self.store_prompt = True
+            self.reset_memory = False
+            self.remove_bookmark = None
+            self.list_bookmarks = False
+
+    args = Args()
+    config = common_init_typer(args)
+
+    if not config:
+        return
+
+    watch_vault(config, debounce_seconds=debounce, polling=poll, polling_interval=interval)
+
+
 @index_app.command()
 def status(
     vault: Annotated[Optional[Path], typer.Option("--vault", "-v", help="Path to your Zettelkasten vault")] = None,
+    json_report: Annotated[bool, typer.Option("--json", help="Print the report of the last indexing run as JSON")] = False,
+    deep: Annotated[bool, typer.Option("--deep",
+                                       help="Also measure the database and count vault files (slow on large vaults)")] = False,
 ):
     """
     Show the current status of your Zettelkasten index.
@@ -90,18 +177,22 @@ def status(
     [bold]Information displayed:[/]
 
     • Last index update time
-    • Number of indexed documents
-    • Index size and statistics
+    • Number of indexed documents, excerpts, tokens and vectors, recorded by the last index update
+    • Throughput and time per stage of the last indexing run
     • Configuration details
+    • Database size and vault file count, with --deep
 
     [bold]Examples:[/]
 
     • [cyan]zk-chat index status[/] - Show status for bookmarked vault
     • [cyan]zk-chat index status --vault ~/notes[/] - Show status for specific vault
+    • [cyan]zk-chat index status --json[/] - Print the last indexing run report for scripts
+    • [cyan]zk-chat index status --deep[/] - Also scan the database and vault
     """
     from zk_chat.config import Config
     from zk_chat.global_config import GlobalConfig
-    import os
+    from zk_chat.index_manifest import get_index_manifest_path
+    from zk_chat.indexing_stats import IndexRunReport, IndexStats, get_index_run_report_path, get_index_stats_path
     from datetime import datetime
 
     # Determine vault path
@@ -126,6 +217,16 @@ def status(
         console.print("[dim]Run [cyan]zk-chat interactive --vault {vault_path}[/dim] to initialize.")
         raise typer.Exit(1)
 
+    db_dir = os.path.join(vault_path, ".zk_chat_db")
+    manifest_path = get_index_manifest_path(db_dir, config.gateway.value)
+    last_run = IndexRunReport.load(get_index_run_report_path(manifest_path))
+    if json_report:
+        if last_run is None:
+            console.print("[yellow]⚠️  No indexing run has been recorded yet.[/]")
+            raise typer.Exit(1)
+        print(last_run.model_dump_json(indent=2))
+        return
+
     # Display status information
     console.print(f"[bold cyan]Index Status[/] - {vault_path}")
     console.print("=" * 60)
@@ -158,8 +259,65 @@ def status(
         console.print("\n[red]❌ Never indexed[/]")
         console.print(f"[yellow]Run:[/] [cyan]zk-chat index rebuild --vault {vault_path}[/]")
 
-    # Database directory info
-    db_dir = os.path.join(vault_path, ".zk_chat_db")
+    stats = IndexStats.load(get_index_stats_path(manifest_path))
+    if stats:
+        _print_index_stats(stats, _count_vectors(config, db_dir))
+    elif last_indexed:
+        console.print("\n[dim]No index statistics recorded yet, they are written by the next index update.[/]")
+
+    if last_run:
+        _print_last_run(last_run)
+
+    markdown_count = None
+    if deep:
+        markdown_count = _print_deep_scan(vault_path, db_dir, stats, config)
+
+    if markdown_count == 0:
+        console.print(f"\n[yellow]⚠️  No markdown files found in vault[/]")
+    elif not last_indexed:
+        console.print(f"\n[red]❌ Index needs rebuilding[/]")
+        console.print("[dim]Run: [cyan]zk-chat index rebuild[/dim]")
+    elif stats and stats.stale_files > 0:
+        console.print(f"\n[yellow]⚠️  {stats.stale_files} file(s) were not indexed by the last update[/]")
+        console.print("[dim]Run: [cyan]zk-chat index rebuild[/dim]")
+    else:
+        console.print(f"\n[green]✅ Index appears healthy[/]")
+
+
+def _count_vectors(config, db_dir: str) -> Optional[dict]:
+    """Count the vectors in each collection, which the vector store answers without reading them."""
+    from zk_chat.chroma_collections import ZkCollectionName
+    from zk_chat.vector_store import create_vector_gateway
+
+    if not os.path.exists(db_dir):
+        return None
+    try:
+        chroma = create_vector_gateway(config, db_dir)
+        return {
+            collection.value: chroma.count_items(collection)
+            for collection in (ZkCollectionName.EXCERPTS, ZkCollectionName.DOCUMENTS)
+        }
+    except Exception as e:
+        console.print(f"[yellow]⚠️  Could not count vectors: {e}[/]")
+        return None
+
+
+def _print_index_stats(stats, vectors: Optional[dict]):
+    console.print(f"\n[bold]Index Contents:[/] [dim](recorded {stats.updated_at.strftime('%Y-%m-%d %H:%M:%S')})[/]")
+    console.print(f"  • Documents: {stats.documents}")
+    console.print(f"  • Excerpts: {stats.excerpts} ({stats.tokens} tokens)")
+    for collection, recorded in stats.vectors.items():
+        current = vectors.get(collection, recorded) if vectors else recorded
+        changed = f" [yellow](recorded {recorded})[/]" if current != recorded else ""
+        console.print(f"  • Vectors in {collection}: {current}{changed}")
+    if stats.stale_files:
+        console.print(f"  • Stale files: [yellow]{stats.stale_files}[/]")
+
+
+def _print_deep_scan(vault_path: str, db_dir: str, stats, config) -> int:
+    """Measure the database and count the vault's markdown files by walking both directory trees."""
+    from zk_chat.vault_ignore import VaultIgnore
+
     if os.path.exists(db_dir):
         # Calculate directory size
         total_size = 0
@@ -185,26 +343,33 @@ def status(
     else:
         console.print(f"\n[yellow]⚠️  No index database found[/]")
 
-    # Count markdown files in vault
-    markdown_count = 0
-    for root, dirs, files in os.walk(vault_path):
-        # Skip database directory
-        if '.zk_chat_db' in root:
-            continue
-        for file in files:
-            if file.endswith('.md'):
-                markdown_count += 1
+    # Count the markdown files indexing would see, skipping ignored directories
+    ignore = VaultIgnore.load(vault_path, include_globs=config.include_globs, exclude_globs=config.exclude_globs)
+    markdown_count = sum(1 for _, _, files in ignore.walk(vault_path) for file in files if file.endswith('.md'))
 
     console.print(f"\n[bold]Vault Statistics:[/]")
     console.print(f"  • Markdown files: {markdown_count}")
-
-    if last_indexed and markdown_count > 0:
-        console.print(f"\n[green]✅ Index appears healthy[/]")
-    elif markdown_count == 0:
-        console.print(f"\n[yellow]⚠️  No markdown files found in vault[/]")
-    else:
-        console.print(f"\n[red]❌ Index needs rebuilding[/]")
-        console.print("[dim]Run: [cyan]zk-chat index rebuild[/dim]")
+    if stats and markdown_count != stats.documents:
+        console.print(f"  • Difference from indexed documents: [yellow]{markdown_count - stats.documents:+d}[/]")
+    return markdown_count
+
+
+def _print_last_run(report):
+    status_style = "green" if report.status == "completed" else "red"
+    console.print(f"\n[bold]Last Run:[/] {report.operation} [{status_style}]{report.status}[/] "
+                  f"at {report.finished_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    console.print(f"  • Documents: {report.documents} of {report.documents_total} "
+                  f"({report.unchanged_documents} unchanged)")
+    console.print(f"  • Excerpts: {report.excerpts} ({report.tokens} tokens), "
+                  f"embedded {report.embedded_excerpts} excerpts and {report.embedded_documents} documents")
+    console.print(f"  • Duration: {report.seconds:.1f}s ({report.documents_per_second:.1f} docs/s, "
+                  f"{report.excerpts_per_second:.1f} excerpts/s)")
+    if report.stage_seconds:
+        stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in
+                           sorted(report.stage_seconds.items(), key=lambda item: item[1], reverse=True))
+        console.print(f"  • Time by stage: {stages}")
+    if report.error:
+        console.print(f"  • Error: [red]{report.error}[/]")
 
 
 # Default command
@@ -214,7 +379,7 @@ def index_default(ctx: typer.Context):
     Manage your Zettelkasten search index.
 
     The index enables fast semantic search across your notes.
-    Use [cyan]rebuild[/] to update it and [cyan]status[/] to check its health.
+    Use [cyan]rebuild[/] to update it, [cyan]watch[/] to keep it updated, and [cyan]status[/] to check its health.
     """
     if ctx.invoked_subcommand is None:
         # Show help by default
@@ -13,6 +13,32 @@ class ModelGateway(str, Enum):
     OPENAI = "openai"
 
 
+class ChunkingStrategy(str, Enum):
+    TOKENS = "tokens"  # Fixed windows of tokens
+    MARKDOWN = "markdown"  # Whole headings, paragraphs, lists and fenced blocks packed up to the chunk size
+
+
+class DocumentVectorStrategy(str, Enum):
+    FULL_TEXT = "full_text"  # Embed each note's whole content
+    POOLED_EXCERPTS = "pooled_excerpts"  # Weighted mean of the note's excerpt embeddings, without model calls
+
+
+class RetrievalMode(str, Enum):
+    VECTOR = "vector"  # Nearest excerpt embeddings to the query's embedding
+    HYBRID = "hybrid"  # Vector and BM25 results merged by reciprocal rank fusion
+    LEXICAL = "lexical"  # BM25 over excerpt terms, without embedding the query
+
+
+class VectorStore(str, Enum):
+    CHROMA = "chroma"  # Chroma database with an HNSW index
+    NUMPY = "numpy"  # Memory-mapped vector matrix searched exactly, without loading Chroma
+
+
+class VectorPrecision(str, Enum):
+    FLOAT16 = "float16"  # Half the size on disk and in memory, with negligible loss in ranking
+    FLOAT32 = "float32"
+
+
 def get_available_models(gateway: ModelGateway = ModelGateway.OLLAMA) -> List[str]:
     if gateway == ModelGateway.OLLAMA:
         g = OllamaGateway()
@@ -60,6 +86,21 @@ class Config(BaseModel):
     gateway: ModelGateway = ModelGateway.OLLAMA
     chunk_size: int = 500
     chunk_overlap: int = 100
+    chunking: ChunkingStrategy = ChunkingStrategy.MARKDOWN
+    document_vectors: DocumentVectorStrategy = DocumentVectorStrategy.FULL_TEXT
+    embedding_model: Optional[str] = None  # Embedding model, the gateway's default if not set; changing it rebuilds the index
+    embedding_batch_size: int = 32
+    indexing_workers: int = 1
+    embedding_concurrency: int = 4  # Most embedding requests in flight; starts at 1, grows while the provider keeps up
+    embedding_cache_size_mb: int = 1024
+    query_cache_size: int = 256  # Query embeddings kept in memory during a session, 0 disables
+    result_cache_size: int = 128  # Query results kept in memory until the index changes, 0 disables
+    retrieval_mode: RetrievalMode = RetrievalMode.VECTOR  # How excerpt queries are answered
+    merge_excerpts: bool = True  # Join overlapping and consecutive excerpts of a note into single passages
+    vector_store: VectorStore = VectorStore.CHROMA
+    vector_precision: VectorPrecision = VectorPrecision.FLOAT16  # Precision of vectors in the numpy vector store
+    include_globs: List[str] = Field(default_factory=list)  # Only vault files matching these are listed and indexed
+    exclude_globs: List[str] = Field(default_factory=list)  # Added to the vault's .zkchatignore
     last_indexed: Optional[datetime] = None  # Deprecated, kept for backward compatibility
     gateway_last_indexed: Dict[str, datetime] = Field(default_factory=dict)
 
@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import structlog
+
+from zk_chat.models import ZkDocument
+
+logger = structlog.get_logger()
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# A file's modification time in nanoseconds and its size in bytes
+FileSignature = Tuple[int, int]
+
+
+class DocumentCache:
+    """
+    In-memory LRU cache of parsed notes, bounded by the size of the text it holds.
+
+    Each note is cached with the signature of the file it was parsed from, and is only served while the file
+    still has that signature, so notes changed by an editor or another process are read again. Writes made
+    through a Zettelkasten invalidate their notes directly.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the DocumentCache.
+
+        Args:
+            max_bytes: Maximum size of the cached notes' text, least recently used notes are evicted first
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._documents: OrderedDict[Hashable, Tuple[FileSignature, ZkDocument, int]] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Hashable, signature: FileSignature) -> Optional[ZkDocument]:
+        """
+        Get a copy of a cached note, if it was parsed from a file with the given signature.
+
+        Args:
+            key: Identifies the note's file
+            signature: The file's current modification time and size
+
+        Returns:
+            The note, or None if it is not cached or the file changed since it was cached
+        """
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is None:
+                return None
+            cached_signature, document, _ = entry
+            if cached_signature != signature:
+                self._remove(key)
+                return None
+            self._documents.move_to_end(key)
+        return document.model_copy(deep=True)
+
+    def put(self, key: Hashable, signature: FileSignature, document: ZkDocument) -> None:
+        """
+        Cache a note parsed from a file, evicting the least recently used notes if the cache is full.
+
+        Notes larger than the whole cache are not cached.
+
+        Args:
+            key: Identifies the note's file
+            signature: The file's modification time and size when it was read
+            document: The parsed note
+        """
+        size = _estimate_size(document)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._documents[key] = (signature, document.model_copy(deep=True), size)
+            self._size += size
+            while self._size > self.max_bytes:
+                evicted, _ = next(iter(self._documents.items()))
+                self._remove(evicted)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget a note, e.g. because its file was written, moved or deleted."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._documents.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+def _estimate_size(document: ZkDocument) -> int:
+    return len(document.content.encode("utf-8")) + len(str(document.metadata).encode("utf-8"))
+
+
+_shared_document_cache = DocumentCache()
+
+
+def shared_document_cache() -> DocumentCache:
+    """Get the document cache shared by every Zettelkasten in the process."""
+    return _shared_document_cache
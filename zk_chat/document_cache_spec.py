@@ -0,0 +1,60 @@
+from zk_chat.document_cache import DocumentCache
+from zk_chat.models import ZkDocument
+
+
+def make_document(content: str = "content") -> ZkDocument:
+    return ZkDocument(relative_path="Note.md", metadata={"tags": ["a"]}, content=content)
+
+
+class DescribeDocumentCache:
+    """
+    Describes the DocumentCache which keeps recently read notes in memory while their files are unchanged
+    """
+
+    def should_serve_note_while_file_is_unchanged(self):
+        cache = DocumentCache()
+        cache.put("Note.md", (1, 7), make_document())
+
+        assert cache.get("Note.md", (1, 7)) == make_document()
+
+    def should_forget_note_once_file_changes(self):
+        cache = DocumentCache()
+        cache.put("Note.md", (1, 7), make_document())
+
+        assert cache.get("Note.md", (2, 7)) is None
+        assert len(cache) == 0
+
+    def should_not_share_cached_note_with_callers(self):
+        cache = DocumentCache()
+        cache.put("Note.md", (1, 7), make_document())
+
+        cache.get("Note.md", (1, 7)).metadata["tags"].append("b")
+
+        assert cache.get("Note.md", (1, 7)).metadata == {"tags": ["a"]}
+
+    def should_evict_least_recently_used_notes_beyond_byte_limit(self):
+        cache = DocumentCache(max_bytes=120)
+        cache.put("a", (1, 1), make_document("a" * 40))
+        cache.put("b", (1, 1), make_document("b" * 40))
+        cache.get("a", (1, 1))
+
+        cache.put("c", (1, 1), make_document("c" * 40))
+
+        assert cache.get("a", (1, 1)) is not None
+        assert cache.get("b", (1, 1)) is None
+        assert cache.get("c", (1, 1)) is not None
+
+    def should_not_cache_note_larger_than_limit(self):
+        cache = DocumentCache(max_bytes=10)
+
+        cache.put("Note.md", (1, 7), make_document("x" * 20))
+
+        assert len(cache) == 0
+
+    def should_forget_invalidated_note(self):
+        cache = DocumentCache()
+        cache.put("Note.md", (1, 7), make_document())
+
+        cache.invalidate("Note.md")
+
+        assert cache.get("Note.md", (1, 7)) is None
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+def get_embedding_cache_path(db_dir: str) -> str:
+    """Get the path to the embedding cache in the vault's database directory."""
+    return os.path.join(db_dir, "embedding_cache.sqlite3")
+
+
+def open_embedding_cache(db_dir: str, max_size_mb: int) -> Optional['EmbeddingCache']:
+    """Open the vault's embedding cache, or return None if its size limit disables it."""
+    if max_size_mb <= 0:
+        return None
+    return EmbeddingCache(get_embedding_cache_path(db_dir), max_size_mb=max_size_mb)
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded cache of embeddings stored in SQLite.
+
+    Entries are keyed by the embedding model and a hash of the embedded text, so rebuilding an index
+    of an unchanged vault, or re-chunking it, only calls the embedding model for text it has never seen.
+    When the cache grows past its size limit the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_size_mb: int = 1024):
+        """
+        Initialize the EmbeddingCache, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            max_size_mb: Maximum total size of the cached embeddings in megabytes
+        """
+        self.path = path
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._connection.commit()
+        self._total_size = self._stored_size()
+
+    def get_many(self, model_key: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            model_key: Identifies the gateway and embedding model that produced the embeddings
+            texts: The texts to look up
+
+        Returns:
+            The cached embeddings by text, for the texts that were found
+        """
+        keys = {self._key(model_key, text): text for text in texts}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key_batch in self._batched(list(keys)):
+                placeholders = ",".join("?" * len(key_batch))
+                rows = self._connection.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})", key_batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[keys[key]] = array('f', blob).tolist()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key, _ in rows]
+                )
+            self._connection.commit()
+        return found
+
+    def put_many(self, model_key: str, embeddings: Dict[str, List[float]]) -> None:
+        """
+        Store embeddings, then evict the least recently used entries if the cache is over its size limit.
+
+        Args:
+            model_key: Identifies the gateway and embedding model that produced the embeddings
+            embeddings: The embeddings to store by text
+        """
+        now = time.time()
+        rows = []
+        for text, embedding in embeddings.items():
+            blob = array('f', embedding).tobytes()
+            rows.append((self._key(model_key, text), blob, len(blob), now))
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, size, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._total_size += sum(row[2] for row in rows)
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+            self._connection.commit()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._stored_size()
+
+    def _stored_size(self) -> int:
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def _evict(self) -> None:
+        excess = self._stored_size() - self.max_size_bytes
+        evicted_entries = 0
+        evicted_bytes = 0
+        while evicted_bytes < excess:
+            rows = self._connection.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            stale_keys = []
+            for key, size in rows:
+                if evicted_bytes >= excess:
+                    break
+                stale_keys.append((key,))
+                evicted_bytes += size
+            self._connection.executemany("DELETE FROM embeddings WHERE key = ?", stale_keys)
+            evicted_entries += len(stale_keys)
+        self._total_size = self._stored_size()
+        logger.info("Evicted embeddings from cache", n_entries=evicted_entries, bytes=evicted_bytes)
+
+    def _key(self, model_key: str, text: str) -> str:
+        return f"{model_key}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _batched(self, keys: List[str], size: int = 500) -> List[List[str]]:
+        return [keys[start:start + size] for start in range(0, len(keys), size)]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from zk_chat.embedding_cache import EmbeddingCache, get_embedding_cache_path
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return get_embedding_cache_path(str(tmp_path / ".zk_chat_db"))
+
+
+class DescribeEmbeddingCache:
+    """
+    Describes the EmbeddingCache which persists embeddings keyed by model and text
+    """
+
+    def should_create_database_file(self, cache_path):
+        EmbeddingCache(cache_path)
+
+        assert os.path.exists(cache_path)
+
+    def should_return_stored_embeddings(self, cache_path):
+        cache = EmbeddingCache(cache_path)
+        cache.put_many("ollama:model", {"first": [0.5, 0.25]})
+
+        found = cache.get_many("ollama:model", ["first", "second"])
+
+        assert found == {"first": [0.5, 0.25]}
+
+    def should_keep_embeddings_of_different_models_apart(self, cache_path):
+        cache = EmbeddingCache(cache_path)
+        cache.put_many("ollama:model", {"first": [0.5, 0.25]})
+
+        found = cache.get_many("openai:model", ["first"])
+
+        assert found == {}
+
+    def should_persist_embeddings_across_instances(self, cache_path):
+        EmbeddingCache(cache_path).put_many("ollama:model", {"first": [0.5, 0.25]})
+
+        found = EmbeddingCache(cache_path).get_many("ollama:model", ["first"])
+
+        assert found == {"first": [0.5, 0.25]}
+
+    def should_evict_least_recently_used_entries_over_size_limit(self, cache_path):
+        cache = EmbeddingCache(cache_path)
+        cache.max_size_bytes = 2 * 4 * 4
+        cache.put_many("m", {"old": [0.0] * 4})
+        cache.put_many("m", {"used": [1.0] * 4})
+        cache.get_many("m", ["old"])
+
+        cache.put_many("m", {"new": [2.0] * 4})
+
+        assert set(cache.get_many("m", ["old", "used", "new"])) == {"old", "new"}
+        assert cache.size_bytes() <= cache.max_size_bytes
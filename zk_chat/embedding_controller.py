@@ -0,0 +1,223 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, TypeVar
+
+import httpx
+import structlog
+from openai import APIConnectionError
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+THROTTLED_STATUS_CODES = {429}
+TRANSIENT_STATUS_CODES = {408, 409, 425, 500, 502, 503, 504}
+
+
+class EmbeddingCircuitOpenError(RuntimeError):
+    """Raised instead of calling the embedding model while repeated failures keep the circuit open."""
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """The HTTP status of a failed request, from the OpenAI, Ollama or httpx error raised for it."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The delay the provider asked for in a Retry-After (or retry-after-ms) header, if it sent one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return max(float(headers["retry-after-ms"]) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttled(error: BaseException) -> bool:
+    return _status_code(error) in THROTTLED_STATUS_CODES
+
+
+def is_transient(error: BaseException) -> bool:
+    """Check whether a failed request is worth retrying: throttling, server errors, timeouts and lost connections."""
+    status = _status_code(error)
+    if status is not None:
+        return status in THROTTLED_STATUS_CODES or status in TRANSIENT_STATUS_CODES or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError, APIConnectionError))
+
+
+class EmbeddingRequestController:
+    """
+    Runs embedding requests at the highest concurrency the provider accepts, retrying those that fail transiently.
+
+    Concurrency is adjusted by additive increase, multiplicative decrease (AIMD): it starts at
+    ``initial_concurrency``, grows by about one request per round of successful requests up to ``max_concurrency``,
+    and halves when a request is throttled.
+    Throttled requests and transient failures (server errors, timeouts, lost connections) are retried with
+    exponentially growing, fully jittered delays, or after the delay the provider asked for in Retry-After, during
+    which no new requests start. After ``failure_threshold`` consecutive failed attempts the circuit opens and
+    requests fail fast with EmbeddingCircuitOpenError for ``reset_seconds``; then a single trial request decides
+    whether it closes again.
+
+    Safe to share between the threads of an indexing run.
+    """
+
+    def __init__(self, max_concurrency: int = 1, initial_concurrency: int = 1, max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0, failure_threshold: int = 10, reset_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 jitter: Callable[[], float] = random.random):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrency: Most requests in flight at once
+            initial_concurrency: Requests allowed in flight at once before any has succeeded
+            max_retries: Retries of a failed request before its error is raised
+            base_delay: Seconds before the first retry, doubled for every further retry
+            max_delay: Longest delay between retries, unless the provider asks for longer
+            failure_threshold: Consecutive failed attempts that open the circuit
+            reset_seconds: How long the circuit stays open before a trial request
+            clock: Monotonic clock, in seconds
+            sleep: Waits for a number of seconds
+            jitter: Returns a random number in [0, 1) to spread retries out
+        """
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+        self._condition = threading.Condition()
+        self._limit = float(min(max(initial_concurrency, 1), self.max_concurrency))
+        self._in_flight = 0
+        self._generation = 0
+        self._resume_at = 0.0
+        self._consecutive_failures = 0
+        self._open_until: Optional[float] = None
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Requests currently allowed in flight at once."""
+        with self._condition:
+            return int(self._limit)
+
+    @property
+    def circuit_open(self) -> bool:
+        with self._condition:
+            return self._open_until is not None and self._clock() < self._open_until
+
+    def call(self, request: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Make a request once the concurrency limit allows it, retrying transient failures.
+
+        Args:
+            request: The function that calls the embedding model
+            *args: Positional arguments for the request
+            **kwargs: Keyword arguments for the request
+
+        Returns:
+            What the request returned
+
+        Raises:
+            EmbeddingCircuitOpenError: If the circuit is open because requests keep failing
+            Exception: The request's error, if it is not transient or retries are exhausted
+        """
+        attempt = 0
+        while True:
+            generation = self._acquire()
+            try:
+                result = request(*args, **kwargs)
+            except Exception as error:
+                retry_after = self._record_failure(error, generation)
+                if not is_transient(error) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self._backoff(attempt) if retry_after is None else retry_after
+                self.retries += 1
+                logger.warning("Embedding request failed, retrying", attempt=attempt, delay=round(delay, 2),
+                               status=_status_code(error), error=str(error))
+                if retry_after is None:
+                    self._sleep(delay)
+                continue
+            self._record_success()
+            return result
+
+    def _acquire(self) -> int:
+        """Wait for a free slot under the concurrency limit and for any Retry-After pause to end."""
+        while True:
+            with self._condition:
+                now = self._clock()
+                if self._open_until is not None and now < self._open_until:
+                    raise EmbeddingCircuitOpenError(
+                        f"Embedding requests keep failing, not retrying for {self._open_until - now:.0f}s")
+                wait = self._resume_at - now
+                if wait <= 0:
+                    if self._in_flight < int(self._limit):
+                        self._in_flight += 1
+                        self.requests += 1
+                        return self._generation
+                    self._condition.wait()
+                    continue
+            self._sleep(wait)
+
+    def _record_success(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._consecutive_failures = 0
+            self._open_until = None
+            self._limit = min(self._limit + 1 / self._limit, float(self.max_concurrency))
+            self._condition.notify_all()
+
+    def _record_failure(self, error: Exception, generation: int) -> Optional[float]:
+        """Release the request's slot, slowing down and opening the circuit as needed; returns any Retry-After."""
+        retry_after = None
+        with self._condition:
+            self._in_flight -= 1
+            if is_throttled(error):
+                self.throttled += 1
+                # Requests in flight when concurrency was last cut were throttled by the same overload
+                if generation == self._generation:
+                    self._limit = max(self._limit / 2, 1.0)
+                    self._generation += 1
+                    logger.info("Embedding requests throttled, reducing concurrency", limit=int(self._limit))
+            if is_transient(error):
+                retry_after = _retry_after_seconds(error)
+                if retry_after is not None:
+                    self._resume_at = max(self._resume_at, self._clock() + retry_after)
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= self.failure_threshold:
+                    self._open_until = self._clock() + self.reset_seconds
+                    self._limit = 1.0
+                    logger.warning("Embedding requests keep failing, opening circuit",
+                                   failures=self._consecutive_failures, reset_seconds=self.reset_seconds)
+            self._condition.notify_all()
+        return retry_after
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, so concurrent retries do not arrive together."""
+        return self._jitter() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
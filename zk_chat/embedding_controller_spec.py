@@ -0,0 +1,173 @@
+import threading
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from openai import APIConnectionError, BadRequestError, RateLimitError
+
+from zk_chat.embedding_controller import EmbeddingCircuitOpenError, EmbeddingRequestController, is_transient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def rate_limit_error(headers=None) -> RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def bad_request_error() -> BadRequestError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    return BadRequestError("Bad request", response=httpx.Response(400, request=request), body=None)
+
+
+class DescribeEmbeddingRequestController:
+    """
+    Describes the EmbeddingRequestController which paces and retries requests to the embedding model
+    """
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def create_controller(self, clock, **kwargs) -> EmbeddingRequestController:
+        return EmbeddingRequestController(clock=clock, sleep=clock.sleep, jitter=lambda: 1.0, **kwargs)
+
+    def should_return_result_of_successful_request(self, clock):
+        controller = self.create_controller(clock)
+
+        assert controller.call(lambda text: [len(text)], "hello") == [5]
+        assert (controller.requests, controller.retries) == (1, 0)
+
+    def should_retry_transient_failures_with_exponential_backoff(self, clock):
+        request = Mock(side_effect=[ConnectionError("reset"), ConnectionError("reset"), [0.1]])
+        controller = self.create_controller(clock, base_delay=1.0)
+
+        assert controller.call(request) == [0.1]
+        assert clock.sleeps == [1.0, 2.0]
+
+    def should_cap_backoff_at_max_delay(self, clock):
+        request = Mock(side_effect=[ConnectionError("reset")] * 4 + [[0.1]])
+        controller = self.create_controller(clock, base_delay=10.0, max_delay=15.0)
+
+        controller.call(request)
+
+        assert clock.sleeps == [10.0, 15.0, 15.0, 15.0]
+
+    def should_wait_for_retry_after_before_any_request(self, clock):
+        request = Mock(side_effect=[rate_limit_error({"retry-after": "7"}), [0.1]])
+        controller = self.create_controller(clock)
+
+        assert controller.call(request) == [0.1]
+        assert clock.sleeps == [7.0]
+
+    def should_raise_errors_that_are_not_transient_without_retrying(self, clock):
+        request = Mock(side_effect=bad_request_error())
+        controller = self.create_controller(clock)
+
+        with pytest.raises(BadRequestError):
+            controller.call(request)
+        assert request.call_count == 1
+
+    def should_raise_last_error_when_retries_are_exhausted(self, clock):
+        request = Mock(side_effect=ConnectionError("reset"))
+        controller = self.create_controller(clock, max_retries=2)
+
+        with pytest.raises(ConnectionError):
+            controller.call(request)
+        assert request.call_count == 3
+
+    def should_start_at_initial_concurrency_and_grow_by_one_request_per_round_up_to_max(self, clock):
+        controller = self.create_controller(clock, max_concurrency=3)
+        assert controller.concurrency_limit == 1
+
+        controller.call(lambda: [0.1])
+        assert controller.concurrency_limit == 2
+        for _ in range(3):
+            controller.call(lambda: [0.1])
+        assert controller.concurrency_limit == 3
+        for _ in range(10):
+            controller.call(lambda: [0.1])
+        assert controller.concurrency_limit == 3
+
+    def should_halve_concurrency_when_throttled_and_grow_it_back_on_success(self, clock):
+        controller = self.create_controller(clock, max_concurrency=8, initial_concurrency=8)
+        request = Mock(side_effect=[rate_limit_error(), [0.1]])
+
+        controller.call(request)
+
+        assert controller.concurrency_limit == 4
+        for _ in range(8):
+            controller.call(lambda: [0.1])
+        assert controller.concurrency_limit == 5
+
+    def should_cut_concurrency_once_for_requests_throttled_by_same_overload(self, clock):
+        controller = self.create_controller(clock, max_concurrency=8, initial_concurrency=8)
+        generation = controller._acquire()
+        controller._acquire()
+
+        controller._record_failure(rate_limit_error(), generation)
+        controller._record_failure(rate_limit_error(), generation)
+
+        assert controller.concurrency_limit == 4
+        assert controller.throttled == 2
+
+    def should_open_circuit_after_consecutive_failures_and_close_it_after_trial_succeeds(self, clock):
+        controller = self.create_controller(clock, max_retries=0, failure_threshold=2, reset_seconds=30.0)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                controller.call(Mock(side_effect=ConnectionError("reset")))
+
+        with pytest.raises(EmbeddingCircuitOpenError):
+            controller.call(lambda: [0.1])
+
+        clock.now += 30.0
+        assert controller.call(lambda: [0.1]) == [0.1]
+        assert not controller.circuit_open
+
+    def should_keep_requests_in_flight_within_concurrency_limit(self):
+        controller = EmbeddingRequestController(max_concurrency=2, initial_concurrency=2)
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def request():
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight.pop()
+            return [0.1]
+
+        threads = [threading.Thread(target=controller.call, args=(request,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(peak) <= 2
+        assert controller.requests == 6
+
+
+class DescribeIsTransient:
+    @pytest.mark.parametrize("error, expected", [
+        (rate_limit_error(), True),
+        (bad_request_error(), False),
+        (APIConnectionError(request=httpx.Request("POST", "https://api.openai.com")), True),
+        (httpx.ConnectTimeout("timed out"), True),
+        (ValueError("bad input"), False),
+    ])
+    def should_classify_errors_worth_retrying(self, error, expected):
+        assert is_transient(error) == expected
@@ -0,0 +1,155 @@
+import inspect
+from typing import List, Optional, Union
+
+import structlog
+from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
+from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
+
+from zk_chat.embedding_cache import EmbeddingCache
+from zk_chat.embedding_controller import EmbeddingRequestController
+
+logger = structlog.get_logger()
+
+OPENAI_MAX_INPUT_TOKENS = 8191
+
+# Describes the vectors this gateway returns; change it whenever they would no longer be comparable with vectors
+# stored before, so indexes built with the old vectors are rebuilt instead of mixing the two
+EMBEDDING_FORMAT = "unit"
+
+
+class EmbeddingGateway:
+    """
+    Gateway for calculating embeddings that supports batched requests.
+
+    Wraps an OllamaGateway or OpenAIGateway and sends many texts to the embedding
+    endpoint in a single request, so that indexing does not pay one round trip per excerpt.
+    Gateways without a native batch endpoint fall back to one request per text.
+    With an EmbeddingCache, only texts that have not been embedded by the same model before reach the model.
+    With an EmbeddingRequestController, requests to the model adapt their concurrency to throttling and are
+    retried when they fail transiently.
+
+    Ollama's batch endpoint returns unit-length vectors, as OpenAI's embeddings and mojentic's pooled OpenAI
+    embeddings are, so every vector from this gateway has unit length. Indexes record ``embedding_format`` and
+    are rebuilt when it changes, so they never hold vectors of different scales.
+    """
+
+    def __init__(self, llm_gateway: Union[OllamaGateway, OpenAIGateway],
+                 tokenizer_gateway: Optional[TokenizerGateway] = None, cache: Optional[EmbeddingCache] = None,
+                 controller: Optional[EmbeddingRequestController] = None, model: Optional[str] = None):
+        """
+        Initialize the EmbeddingGateway.
+
+        Args:
+            llm_gateway: The mojentic gateway used to reach the embedding model
+            tokenizer_gateway: Tokenizer used to keep batched inputs within the model's limit
+                (created on first use if not provided)
+            cache: Optional persistent cache of previously calculated embeddings
+            controller: Optional controller of concurrency and retries for requests to the model
+            model: The embedding model, the model gateway's own default if not given
+        """
+        self.llm_gateway = llm_gateway
+        self.tokenizer_gateway = tokenizer_gateway
+        self.cache = cache
+        self.controller = controller
+        self.model = model or _default_embedding_model(llm_gateway)
+
+    @property
+    def model_key(self) -> str:
+        """Identifies the gateway and embedding model, so cached embeddings are never mixed across models."""
+        if isinstance(self.llm_gateway, OllamaGateway):
+            return f"ollama:{self.model}"
+        if isinstance(self.llm_gateway, OpenAIGateway):
+            return f"openai:{self.model}"
+        return f"{type(self.llm_gateway).__name__}:{self.model}" if self.model else type(self.llm_gateway).__name__
+
+    @property
+    def embedding_format(self) -> str:
+        """Identifies the model and the form of its vectors, so an index can tell whether its vectors still compare."""
+        return f"{self.model_key}:{EMBEDDING_FORMAT}"
+
+    def calculate_embeddings(self, text: str) -> List[float]:
+        """
+        Calculate the embedding for a single text.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            The embedding vector
+        """
+        return self.calculate_embeddings_batch([text])[0]
+
+    def calculate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Calculate embeddings for several texts, in as few requests as the model gateway allows.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            One embedding vector per text, in the same order as the texts
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._calculate_uncached(texts)
+
+        embeddings = self.cache.get_many(self.model_key, texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+        logger.debug("Embedding cache lookup", n_texts=len(texts), n_missing=len(missing))
+        if missing:
+            calculated = dict(zip(missing, self._calculate_uncached(missing)))
+            self.cache.put_many(self.model_key, calculated)
+            embeddings.update(calculated)
+        return [embeddings[text] for text in texts]
+
+    def _calculate_uncached(self, texts: List[str]) -> List[List[float]]:
+        logger.debug("Calculating embeddings", n_texts=len(texts))
+        if self.controller is None:
+            return self._request_embeddings(texts)
+        return self.controller.call(self._request_embeddings, texts)
+
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if isinstance(self.llm_gateway, OllamaGateway):
+            return self._calculate_ollama_embeddings(texts)
+        if isinstance(self.llm_gateway, OpenAIGateway):
+            return self._calculate_openai_embeddings(texts)
+        return [self._calculate_single_embedding(text) for text in texts]
+
+    def _calculate_single_embedding(self, text: str) -> List[float]:
+        if self.model is None:
+            return self.llm_gateway.calculate_embeddings(text)
+        return self.llm_gateway.calculate_embeddings(text, model=self.model)
+
+    def _calculate_ollama_embeddings(self, texts: List[str]) -> List[List[float]]:
+        response = self.llm_gateway.client.embed(model=self.model, input=texts)
+        return [list(embedding) for embedding in response.embeddings]
+
+    def _calculate_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """OpenAI rejects oversized inputs in a batch, so those go through the gateway's chunked path."""
+        if self.tokenizer_gateway is None:
+            self.tokenizer_gateway = TokenizerGateway()
+        embeddings: List[List[float]] = [None] * len(texts)
+        batchable = [i for i, text in enumerate(texts) if len(self.tokenizer_gateway.encode(text)) <= OPENAI_MAX_INPUT_TOKENS]
+
+        if batchable:
+            response = self.llm_gateway.client.embeddings.create(
+                model=self.model,
+                input=[texts[i] for i in batchable]
+            )
+            for item in response.data:
+                embeddings[batchable[item.index]] = list(item.embedding)
+
+        for i, text in enumerate(texts):
+            if embeddings[i] is None:
+                embeddings[i] = self._calculate_single_embedding(text)
+
+        return embeddings
+
+
+def _default_embedding_model(llm_gateway) -> Optional[str]:
+    """The embedding model a mojentic gateway uses when none is named, so it is never duplicated here."""
+    for gateway_class in (OllamaGateway, OpenAIGateway):
+        if isinstance(llm_gateway, gateway_class):
+            return inspect.signature(gateway_class.calculate_embeddings).parameters["model"].default
+    return None
@@ -0,0 +1,140 @@
+from unittest.mock import Mock
+
+import pytest
+from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
+from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
+from ollama import ResponseError
+
+from zk_chat.embedding_cache import EmbeddingCache
+from zk_chat.embedding_controller import EmbeddingRequestController
+from zk_chat.embedding_gateway import EmbeddingGateway
+
+
+@pytest.fixture
+def mock_ollama_gateway():
+    mock = Mock(spec=OllamaGateway)
+    mock.client = Mock()
+    mock.client.embed.return_value = Mock(embeddings=[[0.1, 0.2], [0.3, 0.4]])
+    return mock
+
+
+@pytest.fixture
+def mock_openai_gateway():
+    mock = Mock(spec=OpenAIGateway)
+    mock.client = Mock()
+    mock.client.embeddings.create.return_value = Mock(data=[
+        Mock(index=1, embedding=[0.3, 0.4]),
+        Mock(index=0, embedding=[0.1, 0.2]),
+    ])
+    return mock
+
+
+@pytest.fixture
+def mock_tokenizer_gateway():
+    mock = Mock(spec=TokenizerGateway)
+    mock.encode.side_effect = lambda text: list(range(len(text.split())))
+    return mock
+
+
+class DescribeEmbeddingGateway:
+    """
+    Describes the EmbeddingGateway which batches embedding requests to the model gateway
+    """
+
+    def should_be_instantiated_with_llm_gateway(self, mock_ollama_gateway):
+        gateway = EmbeddingGateway(mock_ollama_gateway)
+
+        assert isinstance(gateway, EmbeddingGateway)
+        assert gateway.llm_gateway == mock_ollama_gateway
+
+    def should_embed_ollama_batch_in_one_request(self, mock_ollama_gateway):
+        gateway = EmbeddingGateway(mock_ollama_gateway)
+
+        embeddings = gateway.calculate_embeddings_batch(["first", "second"])
+
+        mock_ollama_gateway.client.embed.assert_called_once_with(model="mxbai-embed-large", input=["first", "second"])
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4]]
+
+    def should_embed_openai_batch_in_one_request_preserving_order(self, mock_openai_gateway, mock_tokenizer_gateway):
+        gateway = EmbeddingGateway(mock_openai_gateway, mock_tokenizer_gateway)
+
+        embeddings = gateway.calculate_embeddings_batch(["first", "second"])
+
+        assert mock_openai_gateway.client.embeddings.create.call_count == 1
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4]]
+
+    def should_embed_oversized_openai_input_through_chunked_gateway_path(self, mock_openai_gateway,
+                                                                        mock_tokenizer_gateway):
+        mock_tokenizer_gateway.encode.side_effect = lambda text: [0] * (9000 if text == "huge" else 1)
+        mock_openai_gateway.client.embeddings.create.return_value = Mock(data=[Mock(index=0, embedding=[0.1, 0.2])])
+        mock_openai_gateway.calculate_embeddings.return_value = [0.9, 0.9]
+        gateway = EmbeddingGateway(mock_openai_gateway, mock_tokenizer_gateway)
+
+        embeddings = gateway.calculate_embeddings_batch(["small", "huge"])
+
+        mock_openai_gateway.calculate_embeddings.assert_called_once_with("huge", model="text-embedding-3-large")
+        assert embeddings == [[0.1, 0.2], [0.9, 0.9]]
+
+    def should_embed_with_configured_model(self, mock_ollama_gateway):
+        gateway = EmbeddingGateway(mock_ollama_gateway, model="nomic-embed-text")
+
+        gateway.calculate_embeddings_batch(["first", "second"])
+
+        mock_ollama_gateway.client.embed.assert_called_once_with(model="nomic-embed-text", input=["first", "second"])
+        assert gateway.model_key == "ollama:nomic-embed-text"
+
+    def should_default_to_model_gateway_embedding_model(self, mock_ollama_gateway):
+        gateway = EmbeddingGateway(mock_ollama_gateway)
+
+        assert gateway.model == "mxbai-embed-large"
+        assert gateway.embedding_format == "ollama:mxbai-embed-large:unit"
+
+    def should_return_single_embedding_from_batch(self, mock_ollama_gateway):
+        mock_ollama_gateway.client.embed.return_value = Mock(embeddings=[[0.5, 0.6]])
+        gateway = EmbeddingGateway(mock_ollama_gateway)
+
+        embedding = gateway.calculate_embeddings("query")
+
+        assert embedding == [0.5, 0.6]
+
+    def should_not_call_model_for_empty_batch(self, mock_ollama_gateway):
+        gateway = EmbeddingGateway(mock_ollama_gateway)
+
+        embeddings = gateway.calculate_embeddings_batch([])
+
+        assert embeddings == []
+        mock_ollama_gateway.client.embed.assert_not_called()
+
+    def should_only_embed_texts_missing_from_cache(self, mock_ollama_gateway):
+        mock_cache = Mock(spec=EmbeddingCache)
+        mock_cache.get_many.return_value = {"first": [0.1, 0.2]}
+        mock_ollama_gateway.client.embed.return_value = Mock(embeddings=[[0.3, 0.4]])
+        gateway = EmbeddingGateway(mock_ollama_gateway, cache=mock_cache)
+
+        embeddings = gateway.calculate_embeddings_batch(["first", "second", "second"])
+
+        mock_ollama_gateway.client.embed.assert_called_once_with(model="mxbai-embed-large", input=["second"])
+        mock_cache.put_many.assert_called_once_with("ollama:mxbai-embed-large", {"second": [0.3, 0.4]})
+        assert embeddings == [[0.1, 0.2], [0.3, 0.4], [0.3, 0.4]]
+
+    def should_not_call_model_when_every_text_is_cached(self, mock_ollama_gateway):
+        mock_cache = Mock(spec=EmbeddingCache)
+        mock_cache.get_many.return_value = {"first": [0.1, 0.2]}
+        gateway = EmbeddingGateway(mock_ollama_gateway, cache=mock_cache)
+
+        embeddings = gateway.calculate_embeddings_batch(["first"])
+
+        mock_ollama_gateway.client.embed.assert_not_called()
+        mock_cache.put_many.assert_not_called()
+        assert embeddings == [[0.1, 0.2]]
+
+    def should_retry_transient_model_failures_through_controller(self, mock_ollama_gateway):
+        mock_ollama_gateway.client.embed.side_effect = [ResponseError("unavailable", 503),
+                                                        Mock(embeddings=[[0.5, 0.6]])]
+        controller = EmbeddingRequestController(base_delay=0.0)
+        gateway = EmbeddingGateway(mock_ollama_gateway, controller=controller)
+
+        embeddings = gateway.calculate_embeddings_batch(["first"])
+
+        assert embeddings == [[0.5, 0.6]]
+        assert controller.retries == 1
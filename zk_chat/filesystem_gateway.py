@@ -1,18 +1,27 @@
 import os
 from datetime import datetime
-from typing import Iterator, List
+from typing import Iterator, List, Optional, Tuple
+
+from zk_chat.vault_ignore import VaultIgnore
 
 
 class FilesystemGateway:
-    """Gateway for filesystem operations to abstract OS dependencies."""
+    """Gateway for filesystem operations to abstract OS dependencies.
+
+    Walks of the vault skip the paths excluded by the vault's ``.zkchatignore`` file and by the given globs.
+    """
 
-    def __init__(self, root_path: str):
+    def __init__(self, root_path: str, include_globs: Optional[List[str]] = None,
+                 exclude_globs: Optional[List[str]] = None):
         """Initialize the gateway with a root path.
 
         Args:
             root_path: The root path for all filesystem operations
+            include_globs: Globs of the only files to list when walking the vault
+            exclude_globs: Globs of files and directories to skip when walking the vault
         """
         self.root_path = root_path
+        self.ignore = VaultIgnore.load(root_path, include_globs=include_globs, exclude_globs=exclude_globs)
 
     def join_paths(self, *paths: str) -> str:
         """Join path components.
@@ -49,6 +58,18 @@ class FilesystemGateway:
         full_path = self._get_full_path(relative_path)
         return datetime.fromtimestamp(os.path.getmtime(full_path))
 
+    def get_file_signature(self, relative_path: str) -> Tuple[int, int]:
+        """Get the modification time and size of a file, which change whenever the file is written.
+
+        Args:
+            relative_path: Relative path to the file
+
+        Returns:
+            Tuple[int, int]: Modification time in nanoseconds and size in bytes
+        """
+        stat = os.stat(self._get_full_path(relative_path))
+        return stat.st_mtime_ns, stat.st_size
+
     def get_directory_path(self, relative_path: str) -> str:
         """Get the directory path of a file path.
 
@@ -178,7 +199,7 @@ class FilesystemGateway:
         return self._get_full_path(relative_path)
 
     def iterate_files_by_extensions(self, extensions: List[str]) -> Iterator[str]:
-        """Iterate through all files matching the given extensions.
+        """Iterate through all files matching the given extensions, skipping ignored paths.
 
         Args:
             extensions: List of file extensions to match (without dots)
@@ -186,15 +207,14 @@ class FilesystemGateway:
         Yields:
             str: Relative paths of matching files
         """
-        import os
-        for root, dirs, files in os.walk(self.root_path):
+        wanted = {e.lower().lstrip('.') for e in extensions}
+        for root, dirs, files in self._walk_filesystem():
             for file in files:
                 _, ext = os.path.splitext(file)
-                if ext.lower().lstrip('.') in [e.lower().lstrip('.') for e in extensions]:
+                if ext.lower().lstrip('.') in wanted:
                     full_path = os.path.join(root, file)
                     yield self._get_relative_path(full_path)
 
     def _walk_filesystem(self):
-        """Wrapper for os.walk to make it easier to mock in tests."""
-        import os
-        return os.walk(self.root_path)
+        """Walk the vault without descending into ignored directories, in a wrapper that is easy to mock in tests."""
+        return self.ignore.walk(self.root_path)
@@ -77,3 +77,22 @@ class DescribeFilesystemGateway:
 
         assert new_dir.exists()
         assert new_dir.is_dir()
+
+    def should_iterate_files_by_extensions(self, gateway):
+        result = sorted(gateway.iterate_files_by_extensions(["md"]))
+
+        assert result == ["subdir/test3.md", "test1.md", "test2.md"]
+
+    def should_skip_files_in_directories_listed_in_zkchatignore(self, temp_dir):
+        (temp_dir / ".zkchatignore").write_text("# Not notes\nsubdir/\n")
+        (temp_dir / ".obsidian").mkdir()
+        (temp_dir / ".obsidian" / "workspace.md").write_text("settings")
+
+        result = sorted(FilesystemGateway(str(temp_dir)).iterate_files_by_extensions(["md"]))
+
+        assert result == ["test1.md", "test2.md"]
+
+    def should_list_only_files_matching_include_globs(self, temp_dir):
+        gateway = FilesystemGateway(str(temp_dir), include_globs=["subdir/**"], exclude_globs=["*.txt"])
+
+        assert list(gateway.iterate_files_by_extensions(["md", "txt"])) == ["subdir/test3.md"]
@@ -5,22 +5,21 @@ import os
 # Disable ChromaDB telemetry to avoid PostHog compatibility issues
 os.environ['CHROMA_TELEMETRY'] = 'false'
 from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
-from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 
-from zk_chat.chroma_gateway import ChromaGateway
 from zk_chat.config import Config, ModelGateway
-from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
+from zk_chat.index_plan import IndexPlan
+from zk_chat.indexing_stats import IndexRunReport
 from zk_chat.progress_tracker import IndexingProgressTracker
-from zk_chat.vector_database import VectorDatabase
+from zk_chat.vault_watcher import InotifyChangeSource, VaultWatcher, create_change_source
+from zk_chat.vector_store import create_vector_gateway
 from zk_chat.zettelkasten import Zettelkasten
-from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.zettelkasten_factory import create_zettelkasten
 
 
-def reindex(config: Config, force_full: bool = False):
-    """Reindex the Zettelkasten vault with progress tracking."""
+def _create_zettelkasten(config: Config) -> Zettelkasten:
     db_dir = os.path.join(config.vault, ".zk_chat_db")
 
-    chroma = ChromaGateway(config.gateway, db_dir=db_dir)
+    chroma = create_vector_gateway(config, db_dir)
 
     # Create the appropriate gateway based on configuration
     if config.gateway == ModelGateway.OLLAMA:
@@ -31,28 +30,25 @@ def reindex(config: Config, force_full: bool = False):
         # Default to Ollama if not specified
         gateway = OllamaGateway()
 
-    zk = Zettelkasten(
-        tokenizer_gateway=TokenizerGateway(),
-        excerpts_db=VectorDatabase(
-            chroma_gateway=chroma,
-            gateway=gateway,
-            collection_name=ZkCollectionName.EXCERPTS
-        ),
-        documents_db=VectorDatabase(
-            chroma_gateway=chroma,
-            gateway=gateway,
-            collection_name=ZkCollectionName.DOCUMENTS
-        ),
-        filesystem_gateway=MarkdownFilesystemGateway(config.vault))
+    return create_zettelkasten(config, chroma, gateway)
+
+
+def reindex(config: Config, force_full: bool = False, resume: bool = False):
+    """Reindex the Zettelkasten vault with progress tracking.
+
+    With ``resume``, an interrupted full reindex continues from its last checkpoint
+    (a new full reindex starts if there is nothing to resume).
+    """
+    zk = _create_zettelkasten(config)
 
     # Initialize progress tracker
     with IndexingProgressTracker() as progress:
         last_indexed = config.get_last_indexed()
 
-        if force_full or last_indexed is None:
+        if force_full or resume or last_indexed is None:
             # Full reindex
             progress.start_scanning()
-            print("Performing full reindex...")
+            print("Resuming full reindex..." if resume else "Performing full reindex...")
 
             # Create callback that will transition from scanning to processing
             files_processed = 0
@@ -67,12 +63,13 @@ def reindex(config: Config, force_full: bool = False):
                     progress.finish_scanning(total_count)
 
                 files_processed = processed_count
-                progress.update_file_processing(filename, processed_count)
+                progress.update_file_processing(filename, processed_count, zk.indexing_stats)
 
             zk.reindex(
                 excerpt_size=config.chunk_size,
                 excerpt_overlap=config.chunk_overlap,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                resume=resume
             )
 
         else:
@@ -96,7 +93,7 @@ def reindex(config: Config, force_full: bool = False):
 
                 files_processed = processed_count
                 if total_count > 0:
-                    progress.update_file_processing(filename, processed_count)
+                    progress.update_file_processing(filename, processed_count, zk.indexing_stats)
 
             zk.update_index(
                 since=last_indexed,
@@ -110,15 +107,81 @@ def reindex(config: Config, force_full: bool = False):
             print("\n✓ No documents needed updating")
         else:
             print(f"\n✓ Successfully processed {files_processed} document{'s' if files_processed != 1 else ''}")
+            if zk.last_run is not None:
+                print(format_run_summary(zk.last_run))
 
     config.set_last_indexed(datetime.now())
     config.save()
 
 
+def plan(config: Config, force_full: bool = False) -> IndexPlan:
+    """Plan the index update ``reindex`` would run, counting what it would embed without calling the embedding model."""
+    zk = _create_zettelkasten(config)
+    last_indexed = config.get_last_indexed()
+    return zk.plan_update(
+        since=last_indexed,
+        excerpt_size=config.chunk_size,
+        excerpt_overlap=config.chunk_overlap,
+        full=force_full or last_indexed is None
+    )
+
+
+def format_plan(index_plan: IndexPlan) -> str:
+    """Describe an index plan: the files it adds, changes and removes, and what it would embed."""
+    lines = []
+    if index_plan.full_rebuild:
+        lines.append(f"Full reindex ({index_plan.reason})")
+    lines += [f"  + {planned.relative_path} ({planned.excerpts} excerpts, {planned.tokens} tokens)"
+              for planned in index_plan.added]
+    lines += [f"  ~ {planned.relative_path} ({planned.excerpts} excerpts, {planned.tokens} tokens)"
+              for planned in index_plan.changed]
+    lines += [f"  - {relative_path}" for relative_path in index_plan.removed]
+    lines.append(f"{len(index_plan.added)} added, {len(index_plan.changed)} changed, {len(index_plan.removed)} removed, "
+                 f"{index_plan.unchanged} unchanged")
+    lines.append(f"Would embed {index_plan.excerpts} excerpts and {index_plan.documents} documents, "
+                 f"{index_plan.tokens} tokens before embedding cache hits")
+    return "\n".join(lines)
+
+
+def format_run_summary(report: IndexRunReport) -> str:
+    """Summarize an indexing run's throughput and the stage it spent the most time in."""
+    summary = (f"  {report.excerpts} excerpts, {report.tokens} tokens in {report.seconds:.1f}s "
+               f"({report.documents_per_second:.1f} docs/s, {report.excerpts_per_second:.1f} excerpts/s)")
+    if report.slowest_stage is not None:
+        summary += f"; most time in {report.slowest_stage} ({report.stage_seconds[report.slowest_stage]:.1f}s)"
+    return summary
+
+
+def watch(config: Config, debounce_seconds: float = 2.0, polling: bool = False, polling_interval: float = 5.0):
+    """Keep the index of the vault up to date as notes change, until interrupted.
+
+    Args:
+        config: The vault configuration
+        debounce_seconds: How long the vault must be quiet before changes are indexed
+        polling: Scan the vault for changes instead of using inotify
+        polling_interval: Number of seconds between scans when polling
+    """
+    zk = _create_zettelkasten(config)
+    source = create_change_source(config.vault, polling=polling, polling_interval=polling_interval,
+                                  ignore=zk.filesystem_gateway.ignore)
+    watcher = VaultWatcher(zk, source, excerpt_size=config.chunk_size, excerpt_overlap=config.chunk_overlap,
+                           debounce_seconds=debounce_seconds)
+    mode = "inotify" if isinstance(source, InotifyChangeSource) else f"polling every {polling_interval:g}s"
+    print(f"Watching {config.vault} for changes ({mode}), press Ctrl-C to stop...")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n✓ Stopped watching")
+
+
 def main():
     parser = argparse.ArgumentParser(description='Index the Zettelkasten vault')
     parser.add_argument('--vault', required=True, help='Path to your Zettelkasten vault')
     parser.add_argument('--full', action='store_true', default=False, help='Force full reindex')
+    parser.add_argument('--resume', action='store_true', default=False,
+                        help='Resume an interrupted full reindex from its last checkpoint')
+    parser.add_argument('--plan', action='store_true', default=False,
+                        help='List the files the reindex would process and the tokens it would embed, without indexing')
     parser.add_argument('--gateway', choices=['ollama', 'openai'], default='ollama',
                         help='Set the model gateway to use (ollama or openai). OpenAI requires OPENAI_API_KEY environment variable')
     args = parser.parse_args()
@@ -149,7 +212,11 @@ def main():
         # Initialize new config with specified gateway
         config = Config.load_or_initialize(vault_path, gateway=gateway)
 
-    reindex(config, force_full=args.full)
+    if args.plan:
+        print(format_plan(plan(config, force_full=args.full)))
+        return
+
+    reindex(config, force_full=args.full, resume=args.resume)
 
 
 if __name__ == '__main__':
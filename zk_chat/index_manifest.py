@@ -0,0 +1,112 @@
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from zk_chat.config import ChunkingStrategy, DocumentVectorStrategy, VectorStore
+from zk_chat.file_lock import file_lock
+
+
+def get_index_manifest_path(db_dir: str, gateway_value: str) -> str:
+    """Get the path to the index manifest for a gateway's collections in the vault's database directory."""
+    return os.path.join(db_dir, f"{gateway_value}_index_manifest.json")
+
+
+def get_rebuild_checkpoint_path(manifest_path: str) -> str:
+    """Get the path where a full rebuild checkpoints the files it has indexed so far."""
+    return f"{os.path.splitext(manifest_path)[0]}_rebuild_checkpoint.json"
+
+
+def hash_content(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class IndexedFile(BaseModel):
+    """What was indexed for a single vault file, used to detect real content changes."""
+    content_hash: str
+    size: int
+    mtime: float
+    chunk_ids: List[str] = Field(default_factory=list)
+    tokens: int = 0
+
+    def is_unchanged_on_disk(self, size: int, mtime: float) -> bool:
+        return self.size == size and self.mtime == mtime
+
+
+class IndexManifest(BaseModel):
+    """
+    Persistent record of every indexed vault file and the chunking parameters used to index it.
+
+    Incremental updates compare files against this manifest instead of a single timestamp,
+    so files whose modification time changed but whose content did not are not re-embedded.
+
+    Several processes may update the same manifest, e.g. the vault watcher and a chat session renaming a note, so
+    ``save_merged`` applies only the entries this copy changed since it was loaded to the file as it is now.
+    """
+    excerpt_size: int
+    excerpt_overlap: int
+    chunking: ChunkingStrategy = ChunkingStrategy.TOKENS  # Manifests written before chunking strategies were recorded
+    document_vectors: DocumentVectorStrategy = DocumentVectorStrategy.FULL_TEXT
+    embedding_format: Optional[str] = None  # Manifests written before embedding formats were recorded
+    vector_store: VectorStore = VectorStore.CHROMA  # Manifests written before vector stores were recorded
+    files: Dict[str, IndexedFile] = Field(default_factory=dict)
+    _loaded_files: Dict[str, IndexedFile] = PrivateAttr(default_factory=dict)
+
+    def matches_parameters(self, excerpt_size: int, excerpt_overlap: int,
+                           chunking: ChunkingStrategy = ChunkingStrategy.TOKENS,
+                           document_vectors: DocumentVectorStrategy = DocumentVectorStrategy.FULL_TEXT) -> bool:
+        return (self.excerpt_size == excerpt_size and self.excerpt_overlap == excerpt_overlap
+                and self.chunking == chunking and self.document_vectors == document_vectors)
+
+    def matches_embedding_format(self, embedding_format: Optional[str]) -> bool:
+        """Check that the stored vectors compare with new ones; an unknown expected format matches any manifest."""
+        return embedding_format is None or self.embedding_format == embedding_format
+
+    def matches_vector_store(self, vector_store: Optional[VectorStore]) -> bool:
+        """Check that the index was built in the given store; an unknown expected store matches any manifest."""
+        return vector_store is None or self.vector_store == vector_store
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IndexManifest']:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            manifest = cls.model_validate_json(f.read())
+        manifest._loaded_files = dict(manifest.files)
+        return manifest
+
+    def save(self, path: str) -> None:
+        """Replace the manifest atomically, so an interrupted save never leaves a truncated file."""
+        with file_lock(f"{path}.lock"):
+            self._write(path)
+
+    def save_merged(self, path: str) -> None:
+        """
+        Save the entries added, changed or removed since this manifest was loaded into the manifest file.
+
+        The file is read again under its lock, so entries written meanwhile by another process are kept, and this
+        manifest is updated to match what was saved.
+
+        Args:
+            path: The manifest file
+        """
+        with file_lock(f"{path}.lock"):
+            current = IndexManifest.load(path)
+            if current is not None:
+                files = dict(current.files)
+                for relative_path in self._loaded_files.keys() - self.files.keys():
+                    files.pop(relative_path, None)
+                for relative_path, indexed_file in self.files.items():
+                    if self._loaded_files.get(relative_path) != indexed_file:
+                        files[relative_path] = indexed_file
+                self.files = files
+            self._write(path)
+
+    def _write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w') as f:
+            f.write(self.model_dump_json())
+        os.replace(temporary_path, path)
+        self._loaded_files = dict(self.files)
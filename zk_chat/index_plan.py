@@ -0,0 +1,42 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class PlannedFile(BaseModel):
+    """A vault file an index update would embed, and how much of it would be sent to the embedding model."""
+    relative_path: str
+    excerpts: int = 0
+    documents: int = 0
+    tokens: int = 0
+
+
+class IndexPlan(BaseModel):
+    """
+    What an index update would do, worked out without embedding anything or changing the index.
+
+    Token counts are what would be sent to the embedding model before the embedding cache is consulted,
+    so they are an upper bound on what the update costs.
+    """
+    full_rebuild: bool = False
+    reason: Optional[str] = None
+    added: List[PlannedFile] = Field(default_factory=list)
+    changed: List[PlannedFile] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def excerpts(self) -> int:
+        return sum(planned.excerpts for planned in self.added + self.changed)
+
+    @property
+    def documents(self) -> int:
+        return sum(planned.documents for planned in self.added + self.changed)
+
+    @property
+    def tokens(self) -> int:
+        return sum(planned.tokens for planned in self.added + self.changed)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
@@ -0,0 +1,18 @@
+from zk_chat.index_plan import IndexPlan, PlannedFile
+
+
+class DescribeIndexPlan:
+    def should_total_what_added_and_changed_files_would_embed(self):
+        plan = IndexPlan(
+            added=[PlannedFile(relative_path="New.md", excerpts=2, documents=1, tokens=300)],
+            changed=[PlannedFile(relative_path="Edited.md", excerpts=1, documents=1, tokens=200)],
+            removed=["Gone.md"]
+        )
+
+        assert (plan.excerpts, plan.documents, plan.tokens) == (3, 2, 500)
+
+    def should_have_changes_when_only_files_are_removed(self):
+        assert IndexPlan(removed=["Gone.md"]).has_changes
+
+    def should_have_no_changes_when_every_file_is_unchanged(self):
+        assert not IndexPlan(unchanged=10).has_changes
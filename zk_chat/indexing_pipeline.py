@@ -0,0 +1,197 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from pydantic import BaseModel, Field
+
+from zk_chat.index_manifest import IndexedFile
+from zk_chat.models import VectorDocumentForStorage, VectorDocumentWithEmbeddings, ZkDocument
+
+logger = structlog.get_logger()
+
+ProgressCallback = Callable[[str, int, int], None]
+
+_QUEUE_POLL_SECONDS = 0.1
+_END_OF_STREAM = object()
+
+
+class PreparedDocument(BaseModel):
+    """
+    A vault file read, parsed and split into excerpts, ready to be compared with the index.
+
+    Carries the number of tokens in its excerpts and the seconds spent on each preparation stage,
+    so they can be counted even when the file was prepared in a worker process.
+    """
+    document: ZkDocument
+    excerpts: List[VectorDocumentForStorage] = Field(default_factory=list)
+    indexed_file: IndexedFile
+    tokens: int = 0
+    stage_seconds: Dict[str, float] = Field(default_factory=dict)
+
+
+class IndexingWork(BaseModel):
+    """The index changes needed to bring one document up to date."""
+    relative_path: str
+    documents: List[VectorDocumentForStorage] = Field(default_factory=list)
+    excerpts: List[VectorDocumentForStorage] = Field(default_factory=list)
+    stale_excerpt_ids: List[str] = Field(default_factory=list)
+    replace_all_excerpts: bool = False
+    remove_document: bool = False
+    indexed_file: IndexedFile
+
+    @property
+    def embedding_count(self) -> int:
+        return len(self.documents) + len(self.excerpts)
+
+
+class EmbeddedWork(BaseModel):
+    """A batch of indexing work whose documents and excerpts have been embedded."""
+    works: List[IndexingWork]
+    documents: List[VectorDocumentWithEmbeddings]
+    excerpts: List[VectorDocumentWithEmbeddings]
+
+
+class IndexingPipeline:
+    """
+    Staged indexing pipeline connected by bounded queues.
+
+    Files are read, parsed and tokenized by a pool of workers (separate processes when more than one
+    worker is configured), planned against the index in the calling thread, embedded by a bounded number of
+    concurrent embedding requests, and written to the vector database by a single writer thread.
+    Each queue holds at most ``queue_size`` items, so a slow stage holds back the stages feeding it.
+    """
+
+    def __init__(self, workers: int = 1, embedding_concurrency: int = 1, batch_size: int = 32,
+                 queue_size: int = 64):
+        """
+        Initialize the pipeline.
+
+        Args:
+            workers: Number of processes reading, parsing and tokenizing files (1 prepares files in a thread)
+            embedding_concurrency: Maximum number of embedding requests in flight at once
+            batch_size: Number of documents and excerpts embedded together in one request
+            queue_size: Maximum number of items waiting between stages
+        """
+        self.workers = workers
+        self.embedding_concurrency = embedding_concurrency
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def run(self, relative_paths: List[str],
+            prepare: Callable[[str], PreparedDocument],
+            plan: Callable[[PreparedDocument], IndexingWork],
+            embed: Callable[[List[IndexingWork]], EmbeddedWork],
+            write: Callable[[EmbeddedWork], None],
+            progress_callback: Optional[ProgressCallback] = None,
+            worker_initializer: Optional[Callable[..., None]] = None,
+            worker_initargs: Tuple[Any, ...] = ()) -> None:
+        """
+        Run every file through the pipeline, returning once all of them have been written.
+
+        Args:
+            relative_paths: The files to index
+            prepare: Reads, parses and splits a file; must be picklable when more than one worker is used
+            plan: Compares a prepared document with the index and decides what to embed and delete
+            embed: Embeds a batch of planned work
+            write: Writes a batch of embedded work to the index
+            progress_callback: Optional callback for progress updates (filename, processed_count, total_count)
+            worker_initializer: Optional function run once in each preparation worker process
+            worker_initargs: Arguments for the worker initializer
+
+        Raises:
+            Exception: The first error raised by any stage, after the pipeline has stopped
+        """
+        total = len(relative_paths)
+        prepared_futures: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        embedded_futures: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        writer_errors: List[BaseException] = []
+
+        preparation_pool = self._create_preparation_pool(worker_initializer, worker_initargs)
+        embedding_pool = ThreadPoolExecutor(max_workers=self.embedding_concurrency,
+                                            thread_name_prefix="zk-embedding")
+        producer = threading.Thread(target=self._submit_preparations, name="zk-preparation",
+                                    args=(relative_paths, prepare, preparation_pool, prepared_futures, stop))
+        writer = threading.Thread(target=self._write_embedded, name="zk-writer",
+                                  args=(embedded_futures, write, writer_errors, stop))
+        producer.start()
+        writer.start()
+
+        try:
+            batch: List[IndexingWork] = []
+            for processed in range(1, total + 1):
+                prepared = self._take(prepared_futures, stop).result()
+                if progress_callback:
+                    progress_callback(prepared.document.relative_path, processed, total)
+
+                batch.append(plan(prepared))
+                if sum(work.embedding_count for work in batch) >= self.batch_size:
+                    self._put(embedded_futures, embedding_pool.submit(embed, batch), stop)
+                    batch = []
+            if batch:
+                self._put(embedded_futures, embedding_pool.submit(embed, batch), stop)
+        except BaseException:
+            stop.set()
+            if not writer_errors:
+                raise
+        finally:
+            embedded_futures.put(_END_OF_STREAM)
+            writer.join()
+            producer.join()
+            preparation_pool.shutdown(wait=True, cancel_futures=stop.is_set())
+            embedding_pool.shutdown(wait=True, cancel_futures=stop.is_set())
+
+        if writer_errors:
+            raise writer_errors[0]
+
+    def _create_preparation_pool(self, initializer: Optional[Callable[..., None]],
+                                 initargs: Tuple[Any, ...]) -> Executor:
+        if self.workers > 1:
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=initializer, initargs=initargs)
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="zk-prepare")
+
+    def _submit_preparations(self, relative_paths: List[str], prepare: Callable[[str], PreparedDocument],
+                             pool: Executor, prepared_futures: queue.Queue, stop: threading.Event) -> None:
+        for relative_path in relative_paths:
+            if not self._put(prepared_futures, pool.submit(prepare, relative_path), stop):
+                return
+
+    def _write_embedded(self, embedded_futures: queue.Queue, write: Callable[[EmbeddedWork], None],
+                        errors: List[BaseException], stop: threading.Event) -> None:
+        """Write batches in submission order; after a failure keep draining so no stage blocks on a full queue."""
+        while True:
+            future = embedded_futures.get()
+            if future is _END_OF_STREAM:
+                return
+            if stop.is_set():
+                future.cancel()
+                continue
+            try:
+                write(future.result())
+            except BaseException as e:
+                logger.error("Indexing pipeline failed", error=str(e))
+                errors.append(e)
+                stop.set()
+
+    def _put(self, target: queue.Queue, item: Future, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=_QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        item.cancel()
+        return False
+
+    def _take(self, source: queue.Queue, stop: threading.Event) -> Future:
+        while True:
+            if stop.is_set():
+                raise RuntimeError("Indexing pipeline stopped after an error in the writer")
+            try:
+                return source.get(timeout=_QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                continue
@@ -0,0 +1,92 @@
+from typing import List
+
+import pytest
+
+from zk_chat.index_manifest import IndexedFile
+from zk_chat.indexing_pipeline import EmbeddedWork, IndexingPipeline, IndexingWork, PreparedDocument
+from zk_chat.models import VectorDocumentForStorage, ZkDocument
+
+
+def prepare(relative_path: str) -> PreparedDocument:
+    document = ZkDocument(relative_path=relative_path, metadata={}, content=f"content of {relative_path}")
+    return PreparedDocument(
+        document=document,
+        excerpts=[VectorDocumentForStorage(id=f"{relative_path}#0", content=document.content, metadata={})],
+        indexed_file=IndexedFile(content_hash="hash", size=1, mtime=0.0)
+    )
+
+
+def plan(prepared: PreparedDocument) -> IndexingWork:
+    return IndexingWork(relative_path=prepared.document.relative_path, excerpts=prepared.excerpts,
+                        indexed_file=prepared.indexed_file)
+
+
+def embed(works: List[IndexingWork]) -> EmbeddedWork:
+    return EmbeddedWork(works=works, documents=[], excerpts=[])
+
+
+@pytest.fixture
+def test_paths():
+    return [f"note-{i}.md" for i in range(10)]
+
+
+class DescribeIndexingPipeline:
+    """
+    Describes the IndexingPipeline which prepares, embeds and writes documents in concurrent stages
+    """
+
+    def should_write_every_document_in_order(self, test_paths):
+        written = []
+        pipeline = IndexingPipeline(embedding_concurrency=3, batch_size=3, queue_size=2)
+
+        pipeline.run(test_paths, prepare=prepare, plan=plan, embed=embed,
+                     write=lambda embedded: written.extend(work.relative_path for work in embedded.works))
+
+        assert written == test_paths
+
+    def should_group_work_into_embedding_batches(self, test_paths):
+        batch_sizes = []
+        pipeline = IndexingPipeline(batch_size=4)
+
+        pipeline.run(test_paths, prepare=prepare, plan=plan,
+                     embed=lambda works: batch_sizes.append(len(works)) or embed(works),
+                     write=lambda embedded: None)
+
+        assert batch_sizes == [4, 4, 2]
+
+    def should_report_progress_for_each_document(self, test_paths):
+        progress = []
+        pipeline = IndexingPipeline()
+
+        pipeline.run(test_paths, prepare=prepare, plan=plan, embed=embed, write=lambda embedded: None,
+                     progress_callback=lambda filename, processed, total: progress.append((processed, total)))
+
+        assert progress[-1] == (10, 10)
+        assert len(progress) == 10
+
+    def should_raise_writer_errors_after_stopping(self, test_paths):
+        def failing_write(embedded: EmbeddedWork):
+            raise OSError("disk full")
+
+        pipeline = IndexingPipeline(batch_size=1, queue_size=1)
+
+        with pytest.raises(OSError, match="disk full"):
+            pipeline.run(test_paths, prepare=prepare, plan=plan, embed=embed, write=failing_write)
+
+    def should_raise_preparation_errors(self, test_paths):
+        def failing_prepare(relative_path: str) -> PreparedDocument:
+            raise ValueError(f"cannot parse {relative_path}")
+
+        pipeline = IndexingPipeline(queue_size=1)
+
+        with pytest.raises(ValueError, match="cannot parse note-0.md"):
+            pipeline.run(test_paths, prepare=failing_prepare, plan=plan, embed=embed, write=lambda embedded: None)
+
+    def should_prepare_documents_in_worker_processes(self, test_paths):
+        written = []
+        pipeline = IndexingPipeline(workers=2, batch_size=5)
+
+        pipeline.run(test_paths, prepare=prepare, plan=plan, embed=embed,
+                     write=lambda embedded: written.extend(work.relative_path for work in embedded.works))
+
+        assert written == test_paths
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from pydantic import BaseModel, Field
+
+
+def get_index_run_report_path(manifest_path: str) -> str:
+    """Get the path where the report of the most recent indexing run is written."""
+    return f"{os.path.splitext(manifest_path)[0]}_last_run.json"
+
+
+def get_index_stats_path(manifest_path: str) -> str:
+    """Get the path where the size of the index is recorded after every indexing run."""
+    return f"{os.path.splitext(manifest_path)[0]}_stats.json"
+
+
+def _write_atomically(path: str, content: str) -> None:
+    """Write a file atomically, so readers never see a truncated file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w') as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+class IndexStats(BaseModel):
+    """
+    The size of the index as of the last change to it, so its status can be shown without scanning the vault
+    or the database.
+
+    ``stale_files`` counts files known to be out of date in the index, such as those left behind when an
+    update failed part way.
+    """
+    updated_at: datetime
+    documents: int = 0
+    excerpts: int = 0
+    tokens: int = 0
+    vectors: Dict[str, int] = Field(default_factory=dict)
+    stale_files: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IndexStats']:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: str) -> None:
+        _write_atomically(path, self.model_dump_json(indent=2))
+
+
+class IndexRunReport(BaseModel):
+    """
+    Machine-readable summary of an indexing run: what was indexed, how fast, and where the time went.
+
+    Stage times are summed over every thread and process working on a stage, so when stages overlap
+    they can add up to more than ``seconds``.
+    """
+    operation: str
+    status: str
+    started_at: datetime
+    finished_at: datetime
+    seconds: float
+    documents_total: int = 0
+    documents: int = 0
+    unchanged_documents: int = 0
+    excerpts: int = 0
+    tokens: int = 0
+    embedded_documents: int = 0
+    embedded_excerpts: int = 0
+    documents_per_second: float = 0.0
+    excerpts_per_second: float = 0.0
+    stage_seconds: Dict[str, float] = Field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def slowest_stage(self) -> Optional[str]:
+        if not self.stage_seconds:
+            return None
+        return max(self.stage_seconds, key=self.stage_seconds.get)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IndexRunReport']:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: str) -> None:
+        _write_atomically(path, self.model_dump_json(indent=2))
+
+
+class IndexingStats:
+    """
+    Thread-safe stage timers and counters for an indexing run, readable while the run is in progress.
+
+    Stages are ``read`` (file access), ``parse`` (front matter), ``split`` (tokenizing and splitting into excerpts),
+    ``plan`` (comparing with the index), ``embed`` (embedding cache and model) and ``write`` (vector database).
+    """
+
+    def __init__(self, operation: str, documents_total: int = 0):
+        """
+        Start timing a run.
+
+        Args:
+            operation: What the run does, e.g. "reindex" or "update"
+            documents_total: Number of documents the run will process
+        """
+        self.operation = operation
+        self.documents_total = documents_total
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self._stage_seconds: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_seconds({stage: time.perf_counter() - started})
+
+    def add_stage_seconds(self, stage_seconds: Dict[str, float]) -> None:
+        with self._lock:
+            for stage, seconds in stage_seconds.items():
+                self._stage_seconds[stage] += seconds
+
+    def count(self, **counters: int) -> None:
+        with self._lock:
+            for name, value in counters.items():
+                self._counters[name] += value
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters[name]
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def documents_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.counter("documents") / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def excerpts_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.counter("excerpts") / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def remaining_seconds(self) -> Optional[float]:
+        """Estimated seconds until every document is processed, at the throughput so far."""
+        rate = self.documents_per_second
+        if rate <= 0:
+            return None
+        return max(self.documents_total - self.counter("documents"), 0) / rate
+
+    def report(self, status: str, error: Optional[str] = None) -> IndexRunReport:
+        """
+        Summarize the run so far.
+
+        Args:
+            status: How the run ended, e.g. "completed", "failed" or "interrupted"
+            error: The error that ended the run, if any
+
+        Returns:
+            The run report
+        """
+        seconds = self.elapsed_seconds
+        with self._lock:
+            counters = dict(self._counters)
+            stage_seconds = {stage: round(value, 4) for stage, value in self._stage_seconds.items()}
+        return IndexRunReport(
+            operation=self.operation,
+            status=status,
+            started_at=self.started_at,
+            finished_at=datetime.now(),
+            seconds=round(seconds, 4),
+            documents_total=self.documents_total,
+            documents=counters.get("documents", 0),
+            unchanged_documents=counters.get("unchanged_documents", 0),
+            excerpts=counters.get("excerpts", 0),
+            tokens=counters.get("tokens", 0),
+            embedded_documents=counters.get("embedded_documents", 0),
+            embedded_excerpts=counters.get("embedded_excerpts", 0),
+            documents_per_second=round(counters.get("documents", 0) / seconds, 2) if seconds > 0 else 0.0,
+            excerpts_per_second=round(counters.get("excerpts", 0) / seconds, 2) if seconds > 0 else 0.0,
+            stage_seconds=stage_seconds,
+            error=error
+        )
@@ -0,0 +1,72 @@
+import time
+
+from zk_chat.indexing_stats import IndexRunReport, IndexingStats, get_index_run_report_path
+
+
+class DescribeGetIndexRunReportPath:
+    def should_place_report_beside_manifest(self):
+        path = get_index_run_report_path("/vault/.zk_chat_db/ollama_index_manifest.json")
+
+        assert path == "/vault/.zk_chat_db/ollama_index_manifest_last_run.json"
+
+
+class DescribeIndexingStats:
+    def should_accumulate_time_per_stage(self):
+        stats = IndexingStats("update")
+
+        with stats.time("embed"):
+            time.sleep(0.01)
+        stats.add_stage_seconds({"read": 0.5, "embed": 1.0})
+
+        report = stats.report("completed")
+        assert report.stage_seconds["read"] == 0.5
+        assert report.stage_seconds["embed"] >= 1.01
+
+    def should_accumulate_counters(self):
+        stats = IndexingStats("update", documents_total=4)
+
+        stats.count(documents=1, excerpts=3, tokens=120)
+        stats.count(documents=1, excerpts=2, tokens=80, unchanged_documents=1)
+
+        report = stats.report("completed")
+        assert (report.documents, report.excerpts, report.tokens, report.unchanged_documents) == (2, 5, 200, 1)
+        assert report.documents_total == 4
+
+    def should_estimate_remaining_time_from_throughput(self):
+        stats = IndexingStats("reindex", documents_total=10)
+        stats._started -= 2.0
+
+        stats.count(documents=5)
+
+        assert 1.9 < stats.remaining_seconds < 2.1
+
+    def should_not_estimate_remaining_time_before_any_document(self):
+        assert IndexingStats("reindex", documents_total=10).remaining_seconds is None
+
+    def should_report_status_and_error(self):
+        report = IndexingStats("reindex").report("failed", "embedding model unavailable")
+
+        assert report.operation == "reindex"
+        assert report.status == "failed"
+        assert report.error == "embedding model unavailable"
+
+
+class DescribeIndexRunReport:
+    def should_round_trip_through_file(self, tmp_path):
+        stats = IndexingStats("update", documents_total=1)
+        stats.count(documents=1)
+        report = stats.report("completed")
+        path = str(tmp_path / "db" / "report.json")
+
+        report.save(path)
+
+        assert IndexRunReport.load(path) == report
+
+    def should_return_none_when_no_report_exists(self, tmp_path):
+        assert IndexRunReport.load(str(tmp_path / "missing.json")) is None
+
+    def should_name_stage_with_most_time_as_slowest(self):
+        stats = IndexingStats("update")
+        stats.add_stage_seconds({"read": 0.1, "embed": 2.0, "write": 0.5})
+
+        assert stats.report("completed").slowest_stage == "embed"
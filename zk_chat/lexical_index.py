@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Set
+
+import structlog
+
+from zk_chat.models import QueryResult, VectorDocument, VectorDocumentForStorage
+
+logger = structlog.get_logger()
+
+# Words as FTS5 tokenizes them: letters and digits, with underscores kept so code identifiers stay whole
+TERM_PATTERN = re.compile(r"\w+")
+
+DELETE_BATCH_SIZE = 500
+
+
+def get_lexical_index_path(pointers_path: str) -> str:
+    """Get the path to the lexical index of a vector store, beside the store's collection pointer file."""
+    return f"{os.path.splitext(pointers_path)[0]}_lexical.sqlite3"
+
+
+def query_terms(query_text: str) -> List[str]:
+    """Split a query into the distinct, lower-cased terms the lexical index matches against."""
+    return list(dict.fromkeys(term.lower() for term in TERM_PATTERN.findall(query_text)))
+
+
+class LexicalIndex:
+    """
+    Persistent BM25 inverted index of excerpts, stored in SQLite full-text search (FTS5) tables.
+
+    Embedding search misses exact terms such as names, acronyms and code identifiers; this index finds them.
+    Excerpts are kept per physical collection, mirroring the vector store's collections, so a shadow collection
+    being rebuilt has a lexical index of its own that becomes active when the rebuild is promoted.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the LexicalIndex, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+
+    def add_documents(self, collection: str, documents: Iterable[VectorDocument]) -> None:
+        """
+        Index excerpts, replacing indexed excerpts with the same ids.
+
+        Args:
+            collection: The physical collection the excerpts are stored in
+            documents: The excerpts to index
+        """
+        rows = [
+            (document.id, document.metadata.get("id"), document.metadata.get("title", ""), document.content,
+             json.dumps(document.metadata))
+            for document in documents
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._create_tables(collection)
+            self._delete_where(collection, "id", [row[0] for row in rows])
+            self._connection.executemany(
+                f'INSERT INTO "{collection}__items" (id, document_id, title, content, metadata) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._connection.commit()
+
+    def delete_documents(self, collection: str, ids: List[str]) -> None:
+        """
+        Remove excerpts from the index by id.
+
+        Args:
+            collection: The physical collection the excerpts are stored in
+            ids: The ids of the excerpts
+        """
+        with self._lock:
+            if self._has_tables(collection):
+                self._delete_where(collection, "id", ids)
+                self._connection.commit()
+
+    def delete_for_documents(self, collection: str, document_ids: List[str]) -> None:
+        """
+        Remove every excerpt of the given source documents from the index.
+
+        Args:
+            collection: The physical collection the excerpts are stored in
+            document_ids: Source document ids, matched against each excerpt's ``id`` metadata
+        """
+        with self._lock:
+            if self._has_tables(collection):
+                self._delete_where(collection, "document_id", document_ids)
+                self._connection.commit()
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            if not self._has_tables(collection):
+                return 0
+            return self._connection.execute(f'SELECT COUNT(*) FROM "{collection}__items"').fetchone()[0]
+
+    def reset(self, collection: str) -> None:
+        """Remove a collection's lexical index."""
+        with self._lock:
+            self._drop_tables(collection)
+            self._connection.commit()
+
+    def retain(self, collection_name: str, keep: Set[str]) -> None:
+        """
+        Remove the lexical indexes of a logical collection's physical collections that are no longer in use.
+
+        Args:
+            collection_name: The logical collection, e.g. "excerpts"
+            keep: The physical collections still in use
+        """
+        with self._lock:
+            for collection in self._collections():
+                is_version = collection == collection_name or collection.startswith(f"{collection_name}_v")
+                if is_version and collection not in keep:
+                    self._drop_tables(collection)
+            self._connection.commit()
+
+    def query(self, collection: str, query_text: str, n_results: int) -> List[QueryResult]:
+        """
+        Find the excerpts that best match any term of the query, ranked by BM25.
+
+        Args:
+            collection: The physical collection to search
+            query_text: The query text
+            n_results: The number of results to return
+
+        Returns:
+            The best matches first, each with its BM25 score and no distance, since BM25 scores are not comparable
+            with vector distances
+        """
+        terms = query_terms(query_text)
+        if not terms or n_results <= 0:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            if not self._has_tables(collection):
+                return []
+            rows = self._connection.execute(
+                f'SELECT i.id, i.content, i.metadata, bm25("{collection}__terms") AS rank '
+                f'FROM "{collection}__terms" JOIN "{collection}__items" i ON i.rowid = "{collection}__terms".rowid '
+                f'WHERE "{collection}__terms" MATCH ? ORDER BY rank LIMIT ?',
+                (match, n_results)
+            ).fetchall()
+        return [
+            QueryResult(
+                document=VectorDocumentForStorage(id=item_id, content=content, metadata=json.loads(metadata)),
+                score=max(-rank, 0.0)
+            )
+            for item_id, content, metadata, rank in rows
+        ]
+
+    def _collections(self) -> List[str]:
+        rows = self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_\\_items' ESCAPE '\\'"
+        ).fetchall()
+        return [name[:-len("__items")] for (name,) in rows]
+
+    def _has_tables(self, collection: str) -> bool:
+        return self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{collection}__items",)
+        ).fetchone() is not None
+
+    def _create_tables(self, collection: str) -> None:
+        """Create an excerpt table and an FTS5 index over it, kept in step by triggers."""
+        items, terms = f"{collection}__items", f"{collection}__terms"
+        self._connection.executescript(f'''
+            CREATE TABLE IF NOT EXISTS "{items}" (
+                rowid INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document_id TEXT, title TEXT NOT NULL,
+                content TEXT NOT NULL, metadata TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS "{items}_document_id" ON "{items}" (document_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS "{terms}" USING fts5(
+                title, content, content="{items}", content_rowid="rowid", tokenize="unicode61 tokenchars '_'");
+            CREATE TRIGGER IF NOT EXISTS "{items}_insert" AFTER INSERT ON "{items}" BEGIN
+                INSERT INTO "{terms}" (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS "{items}_delete" AFTER DELETE ON "{items}" BEGIN
+                INSERT INTO "{terms}" ("{terms}", rowid, title, content)
+                VALUES ('delete', old.rowid, old.title, old.content);
+            END;
+        ''')
+
+    def _drop_tables(self, collection: str) -> None:
+        self._connection.execute(f'DROP TABLE IF EXISTS "{collection}__terms"')
+        self._connection.execute(f'DROP TABLE IF EXISTS "{collection}__items"')
+
+    def _delete_where(self, collection: str, column: str, values: List[str]) -> None:
+        for start in range(0, len(values), DELETE_BATCH_SIZE):
+            batch = values[start:start + DELETE_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            self._connection.execute(f'DELETE FROM "{collection}__items" WHERE {column} IN ({placeholders})', batch)
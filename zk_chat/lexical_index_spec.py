@@ -0,0 +1,103 @@
+import pytest
+
+from zk_chat.lexical_index import LexicalIndex, query_terms
+from zk_chat.models import VectorDocumentForStorage
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LexicalIndex(str(tmp_path / "db" / "ollama_collections_lexical.sqlite3"))
+
+
+def excerpt(excerpt_id, content, document_id="note.md", title="note"):
+    return VectorDocumentForStorage(id=excerpt_id, content=content, metadata={"id": document_id, "title": title})
+
+
+def found_ids(index, query, collection="excerpts"):
+    return [result.document.id for result in index.query(collection, query, n_results=10)]
+
+
+class DescribeLexicalIndex:
+    """
+    Describes the LexicalIndex which ranks excerpts by BM25 over their terms
+    """
+
+    def should_find_excerpts_containing_exact_terms(self, index):
+        index.add_documents("excerpts", [
+            excerpt("a#0", "Notes on the plays of Oscar Wilde"),
+            excerpt("b#0", "Call parse_front_matter before splitting"),
+            excerpt("c#0", "Unrelated gardening notes"),
+        ])
+
+        assert found_ids(index, "@Oscar Wilde") == ["a#0"]
+        assert found_ids(index, "parse_front_matter") == ["b#0"]
+
+    def should_find_excerpts_by_title(self, index):
+        index.add_documents("excerpts", [excerpt("a#0", "Irish playwright", title="Oscar Wilde")])
+
+        assert found_ids(index, "wilde") == ["a#0"]
+
+    def should_rank_excerpts_matching_more_terms_first(self, index):
+        index.add_documents("excerpts", [
+            excerpt("a#0", "zettelkasten method"),
+            excerpt("b#0", "zettelkasten method for research notes"),
+            excerpt("c#0", "gardening"),
+            excerpt("d#0", "cooking"),
+        ])
+
+        assert found_ids(index, "research zettelkasten") == ["b#0", "a#0"]
+
+    def should_return_stored_content_and_metadata(self, index):
+        index.add_documents("excerpts", [excerpt("a#0", "Oscar Wilde", document_id="people/Wilde.md")])
+
+        result = index.query("excerpts", "wilde", n_results=1)[0]
+
+        assert result.document.content == "Oscar Wilde"
+        assert result.document.metadata["id"] == "people/Wilde.md"
+        assert result.distance is None
+        assert result.score > 0.0
+
+    def should_replace_excerpts_with_same_id(self, index):
+        index.add_documents("excerpts", [excerpt("a#0", "first version")])
+
+        index.add_documents("excerpts", [excerpt("a#0", "second version")])
+
+        assert found_ids(index, "first") == []
+        assert found_ids(index, "second") == ["a#0"]
+        assert index.count("excerpts") == 1
+
+    def should_delete_excerpts_by_id_and_source_document(self, index):
+        index.add_documents("excerpts", [
+            excerpt("a#0", "shared term", document_id="a.md"),
+            excerpt("b#0", "shared term", document_id="b.md"),
+            excerpt("c#0", "shared term", document_id="c.md"),
+        ])
+
+        index.delete_documents("excerpts", ["a#0"])
+        index.delete_for_documents("excerpts", ["b.md"])
+
+        assert found_ids(index, "shared") == ["c#0"]
+
+    def should_keep_collections_apart_and_retain_only_those_in_use(self, index):
+        index.add_documents("excerpts", [excerpt("old#0", "term")])
+        index.add_documents("excerpts_v1", [excerpt("new#0", "term")])
+
+        index.retain("excerpts", {"excerpts_v1"})
+
+        assert found_ids(index, "term") == []
+        assert found_ids(index, "term", collection="excerpts_v1") == ["new#0"]
+
+    def should_find_nothing_in_missing_collection(self, index):
+        assert found_ids(index, "anything") == []
+
+
+class DescribeQueryTerms:
+    """
+    Describes splitting a query into the terms the lexical index matches
+    """
+
+    def should_lower_case_and_deduplicate_words(self):
+        assert query_terms("Oscar @oscar WILDE's \"plays\"") == ["oscar", "wilde", "s", "plays"]
+
+    def should_keep_identifiers_whole(self):
+        assert query_terms("call snake_case") == ["call", "snake_case"]
@@ -60,6 +60,7 @@ def create_args_namespace(
     visual_model: Optional[str] = None,
     reindex: bool = False,
     full: bool = False,
+    resume: bool = False,
     unsafe: bool = False,
     git: bool = False,
     store_prompt: bool = True,
@@ -77,6 +78,7 @@ def create_args_namespace(
             self.visual_model = visual_model
             self.reindex = reindex
             self.full = full
+            self.resume = resume
             self.unsafe = unsafe
             self.git = git
             self.store_prompt = store_prompt
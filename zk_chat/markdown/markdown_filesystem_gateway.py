@@ -62,8 +62,18 @@ class MarkdownFilesystemGateway(FilesystemGateway):
         Returns:
             Tuple[Dict, str]: A tuple containing the metadata dictionary and the content string
         """
-        full_path = self._get_full_path(relative_path)
-        return MarkdownUtilities.load_markdown(full_path)
+        return self.parse_markdown(self.read_file(relative_path))
+
+    def parse_markdown(self, file_content: str) -> Tuple[Dict, str]:
+        """Split the text of a markdown file into metadata and content, as ``read_markdown`` does.
+
+        Args:
+            file_content: Raw text of the markdown file
+
+        Returns:
+            Tuple[Dict, str]: A tuple containing the metadata dictionary and the content string
+        """
+        return MarkdownUtilities.split_metadata_and_content(file_content)
 
     def write_markdown(self, relative_path: str, metadata: Dict, content: str) -> None:
         """Write metadata and content to a markdown file.
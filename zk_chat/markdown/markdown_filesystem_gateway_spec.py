@@ -53,6 +53,15 @@ class DescribeMarkdownFilesystemGateway:
 
         assert found_files == expected_files
 
+    def should_resolve_wikilink_to_file_in_subdirectory(self, gateway):
+        assert gateway.resolve_wikilink("[[test3]]") == str(Path("subdir") / "test3.md")
+
+    def should_not_resolve_wikilink_to_file_in_ignored_directory(self, temp_dir):
+        gateway = MarkdownFilesystemGateway(str(temp_dir), exclude_globs=["subdir/"])
+
+        with pytest.raises(ValueError):
+            gateway.resolve_wikilink("[[test3]]")
+
 
 class DescribeWikiLink:
     """Tests for the WikiLink class which handles wiki-style links."""
@@ -11,6 +11,7 @@ import structlog
 
 from zk_chat.memory.smart_memory import SmartMemory
 from zk_chat.tools.create_or_overwrite_zk_document import CreateOrOverwriteZkDocument
+from zk_chat.tools.find_excerpts_for_queries import FindExcerptsForQueries
 from zk_chat.tools.find_excerpts_related_to import FindExcerptsRelatedTo
 from zk_chat.tools.find_zk_documents_related_to import FindZkDocumentsRelatedTo
 from zk_chat.tools.read_zk_document import ReadZkDocument
@@ -61,6 +62,7 @@ class MCPServer:
         # Register read-only tools
         self._register_tool(ReadZkDocument(self.zk))
         self._register_tool(FindExcerptsRelatedTo(self.zk))
+        self._register_tool(FindExcerptsForQueries(self.zk))
         self._register_tool(FindZkDocumentsRelatedTo(self.zk))
         self._register_tool(RetrieveFromSmartMemory(self.smart_memory))
         self._register_tool(StoreInSmartMemory(self.smart_memory))
@@ -4,7 +4,7 @@ from typing import Union
 import structlog
 from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
 
-from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.collection_pointers import VersionedCollections
 from zk_chat.chroma_collections import ZkCollectionName
 
 logger = structlog.get_logger()
@@ -15,12 +15,12 @@ class SmartMemory:
     A memory system that stores and retrieves information using vector embeddings.
     """
 
-    def __init__(self, chroma_gateway: ChromaGateway, gateway: Union[OllamaGateway, OpenAIGateway]):
+    def __init__(self, chroma_gateway: VersionedCollections, gateway: Union[OllamaGateway, OpenAIGateway]):
         """
-        Initialize SmartMemory with a ChromaGateway and a gateway for embeddings.
+        Initialize SmartMemory with a vector store gateway and a gateway for embeddings.
 
         Args:
-            chroma_gateway: The gateway to the Chroma vector database
+            chroma_gateway: The gateway to the vector store, a ChromaGateway or NumpyVectorGateway
             gateway: The gateway for calculating embeddings (OllamaGateway or OpenAIGateway)
         """
         self.chroma = chroma_gateway
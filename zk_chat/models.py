@@ -1,6 +1,6 @@
 import os
 import re
-from typing import List, Any
+from typing import List, Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -33,7 +33,8 @@ class ZkDocumentExcerpt(BaseModel):
 
 class ZkQueryExcerptResult(BaseModel):
     excerpt: ZkDocumentExcerpt
-    distance: float
+    distance: Optional[float] = None
+    score: Optional[float] = None
 
 class ZkQueryDocumentResult(BaseModel):
     document: ZkDocument
@@ -52,9 +53,15 @@ class VectorDocumentForStorage(VectorDocument):
 
 
 class QueryResult(BaseModel):
-    """Document with its distance from the query vector"""
+    """
+    Document with its distance from the query vector.
+
+    Results found only by full-text search have no distance. Their ``score`` ranks them instead, higher first: the
+    BM25 score in lexical mode, and the reciprocal rank fusion score of every result in hybrid mode.
+    """
     document: VectorDocumentForStorage
-    distance: float
+    distance: Optional[float] = None
+    score: Optional[float] = None
 
 
 class VectorDocumentWithEmbeddings(VectorDocument):
@@ -0,0 +1,548 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.collection_pointers import CollectionPointers, VersionedCollections
+from zk_chat.config import ModelGateway, VectorPrecision
+from zk_chat.file_lock import file_lock
+
+logger = structlog.get_logger()
+
+# Rows scored per block, so float16 matrices are widened to float32 a few megabytes at a time
+QUERY_BLOCK_ROWS = 16384
+# Dead rows tolerated before a collection is compacted, as long as they do not outnumber the live rows
+COMPACT_MIN_DEAD_ROWS = 1024
+
+META_FILE_NAME = "meta.json"
+LOCK_FILE_NAME = "write.lock"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def matches_where(metadata: Optional[Dict], where: Optional[Dict]) -> bool:
+    """
+    Check whether metadata matches a Chroma-style ``where`` filter.
+
+    Supports equality on a key, e.g. ``{"id": "note.md"}``, and the ``$eq``, ``$ne``, ``$in`` and ``$nin`` operators.
+
+    Args:
+        metadata: The metadata of an item
+        where: The filter, or None to match every item
+
+    Returns:
+        True if the metadata matches every condition of the filter
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator
+    """
+    metadata = metadata or {}
+    for key, condition in (where or {}).items():
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported where operator: {key}")
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator == "$eq":
+                matched = value == operand
+            elif operator == "$ne":
+                matched = value != operand
+            elif operator == "$in":
+                matched = value in operand
+            elif operator == "$nin":
+                matched = value not in operand
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+            if not matched:
+                return False
+    return True
+
+
+class NumpyCollection:
+    """
+    A collection stored as a memory-mapped matrix of unit-length vectors, one row per item, beside an append-only
+    log holding each row's id, document and metadata.
+
+    Upserts append rows and deletes append tombstones, so the matrix is never rewritten in place. Only ids, metadata
+    and log offsets are kept in memory; documents are read from the log when they are returned. Rows left dead by
+    upserts and deletes are dropped by compacting into a new generation of files once they outnumber the live rows.
+    ``meta.json`` names the current generation and is replaced atomically, so a process reading the collection
+    reloads it when another process compacted it, and otherwise replays only the log lines appended since it last
+    looked. Writes and compactions hold a lock on ``write.lock`` in the collection's directory, so processes sharing
+    the collection never number rows from the same end of the matrix or append to a generation being replaced.
+    """
+
+    def __init__(self, path: str, precision: VectorPrecision = VectorPrecision.FLOAT16):
+        """
+        Initialize the collection, creating nothing on disk until items are added.
+
+        Args:
+            path: The directory holding the collection's files
+            precision: Precision of the stored vectors, if the collection is new
+        """
+        self.path = path
+        self.precision = precision
+        self._lock = threading.RLock()
+        self._meta_signature = None
+        self._reset(generation=None, dimensions=None, dtype=precision.value)
+
+    def _reset(self, generation: Optional[int], dimensions: Optional[int], dtype: str) -> None:
+        self._generation = generation
+        self._dimensions = dimensions
+        self._dtype = np.dtype(dtype)
+        self._row_of: Dict[str, int] = {}
+        # Live rows, with the id, metadata, and offset and length of the log line that stored them
+        self._entries: Dict[int, Tuple[str, Optional[Dict], int, int]] = {}
+        self._log_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_size = 0
+        self._live_mask: Optional[np.ndarray] = None
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, f"vectors-{self._generation}.bin")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, f"items-{self._generation}.jsonl")
+
+    @property
+    def _row_bytes(self) -> int:
+        return self._dimensions * self._dtype.itemsize
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    def upsert(self, ids: List[str], documents: Optional[List[Optional[str]]], metadatas: Optional[List[Optional[Dict]]],
+               embeddings) -> None:
+        """
+        Add items, replacing any stored items with the same ids.
+
+        Args:
+            ids: The ids of the items
+            documents: The document of each item, or None
+            metadatas: The metadata of each item, or None
+            embeddings: The embedding of each item
+
+        Raises:
+            ValueError: If the embeddings do not have the collection's number of dimensions
+        """
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        with self._writing():
+            self._refresh()
+            if self._generation is None:
+                self._write_generation(1, vectors.shape[1])
+            elif vectors.shape[1] != self._dimensions:
+                raise ValueError(f"Embeddings have {vectors.shape[1]} dimensions, "
+                                 f"the collection holds {self._dimensions}")
+
+            first_row = self._truncate_partial_row()
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.astype(self._dtype).tobytes())
+            lines = [
+                {"row": first_row + i, "id": item_id,
+                 "document": documents[i] if documents else None,
+                 "metadata": metadatas[i] if metadatas else None}
+                for i, item_id in enumerate(ids)
+            ]
+            self._append_log(lines)
+            self._refresh()
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            include: Optional[List[str]] = None) -> Dict:
+        """
+        Get stored items, selected by id and metadata filter.
+
+        Args:
+            ids: The ids of the items to get (all items if None)
+            where: A metadata filter selecting the items to get (all items if None)
+            include: The fields to include: "documents", "metadatas" and "embeddings"
+
+        Returns:
+            The ids and included fields of the items, like Chroma's ``get``
+        """
+        include = include or ["metadatas"]
+        with self._lock:
+            self._refresh()
+            rows = self._select(ids, where)
+            results = {"ids": [self._entries[row][0] for row in rows]}
+            if "documents" in include:
+                results["documents"] = self._read_documents(rows)
+            if "metadatas" in include:
+                results["metadatas"] = [self._entries[row][1] for row in rows]
+            if "embeddings" in include:
+                results["embeddings"] = [np.asarray(self._matrix[row], dtype=np.float32) for row in rows]
+            return results
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
+        """
+        Delete items by id or metadata filter, compacting the collection if dead rows have piled up.
+
+        Args:
+            ids: The ids of the items to delete
+            where: A metadata filter selecting the items to delete
+        """
+        if ids is None and where is None:
+            return
+        with self._writing():
+            self._refresh()
+            rows = self._select(ids, where)
+            if not rows:
+                return
+            self._append_log([{"deleted": self._entries[row][0]} for row in rows])
+            self._refresh()
+            self._compact_if_needed()
+
+    def query(self, query_embeddings, n_results: int) -> Dict:
+        """
+        Find the items nearest to each query embedding by exact cosine similarity.
+
+        Distances are reported as squared Euclidean distances between unit vectors (2 - 2 cos), the scale Chroma
+        reports, so distance thresholds work the same with either store.
+
+        Args:
+            query_embeddings: One embedding, or a list of embeddings
+            n_results: The number of results for each query embedding
+
+        Returns:
+            The results for each query embedding, like Chroma's ``query``
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+        queries = _normalize(queries)
+
+        with self._lock:
+            self._refresh()
+            results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            k = min(n_results, len(self._entries))
+            if k <= 0:
+                for key in results:
+                    results[key] = [[] for _ in queries]
+                return results
+            if queries.shape[1] != self._dimensions:
+                raise ValueError(f"Query embeddings have {queries.shape[1]} dimensions, "
+                                 f"the collection holds {self._dimensions}")
+
+            scores = self._scores(queries)
+            for column in scores.T:
+                top = np.argpartition(-column, k - 1)[:k]
+                top = top[np.argsort(-column[top], kind="stable")]
+                rows = [int(row) for row in top]
+                results["ids"].append([self._entries[row][0] for row in rows])
+                results["documents"].append(self._read_documents(rows))
+                results["metadatas"].append([self._entries[row][1] for row in rows])
+                results["distances"].append([float(max(2.0 - 2.0 * column[row], 0.0)) for row in rows])
+            return results
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the collection against writes by other threads and processes."""
+        with self._lock, file_lock(os.path.join(self.path, LOCK_FILE_NAME)):
+            yield
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row to every query, with dead rows scored lowest."""
+        size = self._matrix_size
+        scores = np.empty((size, len(queries)), dtype=np.float32)
+        for start in range(0, size, QUERY_BLOCK_ROWS):
+            block = np.asarray(self._matrix[start:start + QUERY_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ queries.T
+        if self._live_mask is None:
+            self._live_mask = np.zeros(size, dtype=bool)
+            self._live_mask[list(self._entries)] = True
+        scores[~self._live_mask] = -np.inf
+        return scores
+
+    def _select(self, ids: Optional[List[str]], where: Optional[Dict]) -> List[int]:
+        if ids is not None:
+            rows = [self._row_of[item_id] for item_id in dict.fromkeys(ids) if item_id in self._row_of]
+        else:
+            rows = list(self._row_of.values())
+        if where:
+            rows = [row for row in rows if matches_where(self._entries[row][1], where)]
+        return rows
+
+    def _read_documents(self, rows: List[int]) -> List[Optional[str]]:
+        if not rows:
+            return []
+        documents = []
+        with open(self._log_path, "rb") as f:
+            for row in rows:
+                _, _, offset, length = self._entries[row]
+                f.seek(offset)
+                documents.append(json.loads(f.read(length))["document"])
+        return documents
+
+    def _refresh(self) -> None:
+        """Catch up with changes made on disk, by this or another process, since the collection was last read."""
+        meta_path = os.path.join(self.path, META_FILE_NAME)
+        try:
+            stat = os.stat(meta_path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._meta_signature:
+            self._meta_signature = signature
+            if signature is None:
+                self._reset(generation=None, dimensions=None, dtype=self.precision.value)
+                return
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["generation"] != self._generation:
+                self._reset(meta["generation"], meta["dimensions"], meta["dtype"])
+        if self._generation is None:
+            return
+        self._replay_log()
+        self._map_vectors()
+
+    def _replay_log(self) -> None:
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._log_offset)
+                appended = f.read()
+        except FileNotFoundError:
+            return
+        offset = self._log_offset
+        # A line without its newline is still being written, and is replayed once it is complete
+        for line in appended.split(b"\n")[:-1]:
+            entry = json.loads(line)
+            if "deleted" in entry:
+                row = self._row_of.pop(entry["deleted"], None)
+                self._entries.pop(row, None)
+            else:
+                replaced = self._row_of.get(entry["id"])
+                if replaced is not None:
+                    del self._entries[replaced]
+                self._row_of[entry["id"]] = entry["row"]
+                self._entries[entry["row"]] = (entry["id"], entry["metadata"], offset, len(line))
+            offset += len(line) + 1
+        if offset != self._log_offset:
+            self._log_offset = offset
+            self._live_mask = None
+
+    def _map_vectors(self) -> None:
+        try:
+            size = os.path.getsize(self._vectors_path) // self._row_bytes
+        except FileNotFoundError:
+            size = 0
+        if size != self._matrix_size:
+            self._matrix = np.memmap(self._vectors_path, dtype=self._dtype, mode="r",
+                                     shape=(size, self._dimensions)) if size else None
+            self._matrix_size = size
+            self._live_mask = None
+
+    def _truncate_partial_row(self) -> int:
+        """Drop a row left half-written by an interrupted upsert, returning the number of whole rows."""
+        try:
+            size = os.path.getsize(self._vectors_path)
+        except FileNotFoundError:
+            return 0
+        rows = size // self._row_bytes
+        if size != rows * self._row_bytes:
+            os.truncate(self._vectors_path, rows * self._row_bytes)
+        return rows
+
+    def _append_log(self, entries: List[Dict]) -> None:
+        with open(self._log_path, "ab") as f:
+            f.write(b"".join(json.dumps(entry).encode("utf-8") + b"\n" for entry in entries))
+
+    def _write_generation(self, generation: int, dimensions: int) -> None:
+        """Point meta.json at a generation of files, replacing it atomically."""
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, META_FILE_NAME)
+        temporary_path = f"{meta_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump({"generation": generation, "dimensions": dimensions, "dtype": self._dtype.name}, f)
+        os.replace(temporary_path, meta_path)
+        self._refresh()
+
+    def _compact_if_needed(self) -> None:
+        dead_rows = self._matrix_size - len(self._entries)
+        if dead_rows < COMPACT_MIN_DEAD_ROWS or dead_rows <= len(self._entries):
+            return
+        self._compact()
+
+    def compact(self) -> None:
+        """Rewrite the collection into a new generation of files holding only its live rows."""
+        with self._writing():
+            self._refresh()
+            self._compact()
+
+    def _compact(self) -> None:
+        if self._generation is None:
+            return
+        old_vectors_path, old_log_path = self._vectors_path, self._log_path
+        rows = sorted(self._entries)
+        generation = self._generation + 1
+        with open(os.path.join(self.path, f"vectors-{generation}.bin"), "wb") as f:
+            for start in range(0, len(rows), QUERY_BLOCK_ROWS):
+                f.write(np.ascontiguousarray(self._matrix[rows[start:start + QUERY_BLOCK_ROWS]]).tobytes())
+        with open(os.path.join(self.path, f"items-{generation}.jsonl"), "wb") as f:
+            for start in range(0, len(rows), QUERY_BLOCK_ROWS):
+                batch = rows[start:start + QUERY_BLOCK_ROWS]
+                for new_row, row, document in zip(range(start, start + len(batch)), batch,
+                                                  self._read_documents(batch)):
+                    item_id, metadata, _, _ = self._entries[row]
+                    entry = {"row": new_row, "id": item_id, "document": document, "metadata": metadata}
+                    f.write(json.dumps(entry).encode("utf-8") + b"\n")
+        logger.info("Compacted vector collection", path=self.path, live_rows=len(rows),
+                    dropped_rows=self._matrix_size - len(rows))
+        self._write_generation(generation, self._dimensions)
+        for path in (old_vectors_path, old_log_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class NumpyVectorGateway(VersionedCollections):
+    """
+    Vector store that keeps each collection in a memory-mapped NumPy matrix and searches it exactly.
+
+    A drop-in alternative to ChromaGateway for vaults of up to a few hundred thousand excerpts, where scanning
+    every vector is fast and opening it costs nothing like starting Chroma. Vectors are stored normalized to unit
+    length, as float16 by default, so the index is a quarter the size of Chroma's. Collections can be rebuilt into
+    versioned shadow collections while queries keep using the active ones, as described in VersionedCollections.
+    """
+
+    def __init__(self, gateway: ModelGateway, db_dir: str, precision: VectorPrecision = VectorPrecision.FLOAT16):
+        """
+        Initialize the NumpyVectorGateway.
+
+        Args:
+            gateway: The model gateway, which keeps separate vectors for each gateway
+            db_dir: The directory where the vector database is stored
+            precision: Precision of the vectors in newly created collections
+        """
+        super().__init__(os.path.join(db_dir, f"{gateway.value}_numpy_collections.json"))
+        self.root_path = os.path.join(db_dir, f"{gateway.value}_numpy")
+        self.precision = precision
+        self._collections: Dict[str, NumpyCollection] = {}
+
+    def get_collection(self, collection_name: ZkCollectionName, shadow: bool = False) -> NumpyCollection:
+        """
+        Get or create a collection with the specified name.
+
+        Args:
+            collection_name: The name of the collection to get or create
+            shadow: Get the shadow collection being rebuilt instead of the active one
+
+        Returns:
+            The requested collection
+        """
+        physical_name = self._physical_name(collection_name, shadow)
+        if physical_name not in self._collections:
+            self._collections[physical_name] = NumpyCollection(os.path.join(self.root_path, physical_name),
+                                                               self.precision)
+        return self._collections[physical_name]
+
+    def add_items(self, ids, documents, metadatas, embeddings, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN,
+                  shadow: bool = False):
+        """
+        Add items to a collection, replacing stored items with the same ids.
+
+        Args:
+            ids: The IDs of the items to add
+            documents: The documents to add
+            metadatas: The metadata for each document
+            embeddings: The embeddings for each document
+            collection_name: The name of the collection to add items to
+            shadow: Add the items to the shadow collection being rebuilt
+        """
+        self.get_collection(collection_name, shadow).upsert(ids, documents, metadatas, embeddings)
+        if not shadow:
+            self._bump_version()
+
+    def get_items(self, where: Optional[Dict] = None, include: Optional[List[str]] = None,
+                  collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False):
+        """
+        Get stored items from a collection, optionally filtered by metadata.
+
+        Args:
+            where: A metadata filter selecting the items to get (all items if None)
+            include: The fields to include, e.g. "documents", "metadatas" or "embeddings"
+            collection_name: The name of the collection to get items from
+            shadow: Get the items from the shadow collection being rebuilt
+
+        Returns:
+            The stored items
+        """
+        return self.get_collection(collection_name, shadow).get(where=where, include=include)
+
+    def delete_items(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+                     collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False):
+        """
+        Delete items from a collection by id or by metadata filter.
+
+        Args:
+            ids: The IDs of the items to delete
+            where: A metadata filter selecting the items to delete
+            collection_name: The name of the collection to delete items from
+            shadow: Delete the items from the shadow collection being rebuilt
+        """
+        self.get_collection(collection_name, shadow).delete(ids=ids, where=where)
+        if not shadow:
+            self._bump_version()
+
+    def count_items(self, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN, shadow: bool = False) -> int:
+        """
+        Count the items in a collection without reading them.
+
+        Args:
+            collection_name: The name of the collection to count
+            shadow: Count the items in the shadow collection being rebuilt
+
+        Returns:
+            The number of items in the collection
+        """
+        return self.get_collection(collection_name, shadow).count()
+
+    def reset_indexes(self, collection_name: Optional[ZkCollectionName] = None):
+        """
+        Reset the indexes for a collection or all collections.
+
+        Args:
+            collection_name: The name of the collection to reset (resets all if None)
+        """
+        if collection_name:
+            self._drop_collection(self._physical_name(collection_name))
+        else:
+            shutil.rmtree(self.root_path, ignore_errors=True)
+            self._collections = {}
+            self._save_pointers(CollectionPointers(generation=self._load_pointers().generation))
+        self._bump_version()
+
+    def query(self, query_embeddings, n_results, collection_name: ZkCollectionName = ZkCollectionName.ZETTELKASTEN,
+              shadow: bool = False):
+        """
+        Query a collection.
+
+        Args:
+            query_embeddings: The embeddings to query with
+            n_results: The number of results to return
+            collection_name: The name of the collection to query
+            shadow: Query the shadow collection being rebuilt
+
+        Returns:
+            The query results
+        """
+        return self.get_collection(collection_name, shadow).query(query_embeddings, n_results)
+
+    def _drop_collection(self, physical_name: str) -> None:
+        shutil.rmtree(os.path.join(self.root_path, physical_name), ignore_errors=True)
+        self._collections.pop(physical_name, None)
@@ -0,0 +1,194 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.config import ModelGateway, VectorPrecision
+from zk_chat.numpy_vector_gateway import NumpyCollection, NumpyVectorGateway, matches_where
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NumpyVectorGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+
+
+def add_item(store, item_id, embedding=(0.1, 0.2), shadow=False, metadata=None):
+    store.add_items(ids=[item_id], documents=[f"text of {item_id}"], metadatas=[metadata or {"id": item_id}],
+                    embeddings=[list(embedding)], collection_name=ZkCollectionName.EXCERPTS, shadow=shadow)
+
+
+def stored_ids(store, shadow=False):
+    return store.get_items(collection_name=ZkCollectionName.EXCERPTS, shadow=shadow)['ids']
+
+
+def write_items(path, prefix, embedding, count):
+    collection = NumpyCollection(path, VectorPrecision.FLOAT32)
+    for i in range(count):
+        collection.upsert([f"{prefix}{i}"], None, None, [embedding])
+        if i % 2:
+            collection.delete(ids=[f"{prefix}{i - 1}"])
+
+
+class DescribeNumpyVectorGateway:
+    """
+    Describes the NumpyVectorGateway which stores vectors in memory-mapped matrices and searches them exactly
+    """
+
+    def should_return_nearest_items_first(self, store):
+        add_item(store, "east", (1.0, 0.0))
+        add_item(store, "north", (0.0, 1.0))
+        add_item(store, "northeast", (1.0, 1.0))
+
+        results = store.query([[0.9, 0.1]], n_results=2, collection_name=ZkCollectionName.EXCERPTS)
+
+        assert results["ids"] == [["east", "northeast"]]
+        assert results["documents"] == [["text of east", "text of northeast"]]
+        assert results["metadatas"] == [[{"id": "east"}, {"id": "northeast"}]]
+
+    def should_report_distances_on_chroma_scale(self, store):
+        add_item(store, "same", (1.0, 0.0))
+        add_item(store, "opposite", (-1.0, 0.0))
+
+        results = store.query([[2.0, 0.0]], n_results=2, collection_name=ZkCollectionName.EXCERPTS)
+
+        assert results["distances"][0] == pytest.approx([0.0, 4.0], abs=1e-3)
+
+    def should_replace_items_with_same_id(self, store):
+        add_item(store, "a", (1.0, 0.0))
+        add_item(store, "a", (0.0, 1.0))
+
+        results = store.query([[0.0, 1.0]], n_results=5, collection_name=ZkCollectionName.EXCERPTS)
+
+        assert store.count_items(ZkCollectionName.EXCERPTS) == 1
+        assert results["ids"] == [["a"]]
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-3)
+
+    def should_delete_items_by_id_and_filter(self, store):
+        add_item(store, "a", metadata={"id": "one.md"})
+        add_item(store, "b", metadata={"id": "two.md"})
+        add_item(store, "c", metadata={"id": "three.md"})
+
+        store.delete_items(ids=["a"], collection_name=ZkCollectionName.EXCERPTS)
+        store.delete_items(where={"id": {"$in": ["two.md"]}}, collection_name=ZkCollectionName.EXCERPTS)
+
+        assert stored_ids(store) == ["c"]
+
+    def should_get_items_matching_filter_with_requested_fields(self, store):
+        add_item(store, "a", metadata={"id": "one.md"})
+        add_item(store, "b", metadata={"id": "two.md"})
+
+        items = store.get_items(where={"id": "two.md"}, include=["documents", "embeddings"],
+                                collection_name=ZkCollectionName.EXCERPTS)
+
+        assert items["ids"] == ["b"]
+        assert items["documents"] == ["text of b"]
+        assert np.allclose(items["embeddings"][0], [0.4472, 0.8944], atol=1e-3)
+        assert "metadatas" not in items
+
+    def should_see_items_added_by_another_gateway(self, store, tmp_path):
+        add_item(store, "a")
+        assert stored_ids(store) == ["a"]
+        writer = NumpyVectorGateway(ModelGateway.OLLAMA, db_dir=str(tmp_path))
+
+        add_item(writer, "b")
+
+        assert stored_ids(store) == ["a", "b"]
+
+    def should_serve_shadow_collection_once_promoted(self, store):
+        add_item(store, "old")
+        store.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(store, "new", shadow=True)
+        assert stored_ids(store) == ["old"]
+
+        store.promote_shadow_collections()
+
+        assert stored_ids(store) == ["new"]
+
+    def should_keep_retired_collection_until_next_rebuild(self, store, tmp_path):
+        add_item(store, "old")
+        store.create_shadow_collection(ZkCollectionName.EXCERPTS)
+        add_item(store, "new", shadow=True)
+        store.promote_shadow_collections()
+        assert (tmp_path / "ollama_numpy" / "excerpts").exists()
+
+        store.create_shadow_collection(ZkCollectionName.EXCERPTS)
+
+        assert not (tmp_path / "ollama_numpy" / "excerpts").exists()
+        assert (tmp_path / "ollama_numpy" / "excerpts_v1").exists()
+
+    def should_reset_all_collections(self, store):
+        add_item(store, "a")
+
+        store.reset_indexes()
+
+        assert store.count_items(ZkCollectionName.EXCERPTS) == 0
+
+    def should_return_empty_results_from_empty_collection(self, store):
+        results = store.query([[1.0, 0.0]], n_results=3, collection_name=ZkCollectionName.EXCERPTS)
+
+        assert results["ids"] == [[]]
+
+
+class DescribeNumpyCollection:
+    """
+    Describes the NumpyCollection which keeps one collection's vectors in a memory-mapped matrix
+    """
+
+    def should_store_vectors_at_configured_precision(self, tmp_path):
+        collection = NumpyCollection(str(tmp_path / "c"), VectorPrecision.FLOAT16)
+
+        collection.upsert(["a"], ["text"], [None], [[3.0, 4.0]])
+
+        assert (tmp_path / "c" / "vectors-1.bin").stat().st_size == 2 * 2
+
+    def should_keep_live_items_when_compacted(self, tmp_path):
+        collection = NumpyCollection(str(tmp_path / "c"), VectorPrecision.FLOAT32)
+        collection.upsert(["a", "b", "c"], ["A", "B", "C"], [None, None, None], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+        collection.delete(ids=["b"])
+
+        collection.compact()
+
+        assert collection.get(include=["documents"]) == {"ids": ["a", "c"], "documents": ["A", "C"]}
+        assert collection.query([[0.0, 1.0]], n_results=1)["ids"] == [["c"]]
+        assert not (tmp_path / "c" / "vectors-1.bin").exists()
+
+    def should_keep_ids_on_their_rows_when_processes_write_at_once(self, tmp_path):
+        context = multiprocessing.get_context("spawn")
+        writers = [context.Process(target=write_items, args=(str(tmp_path / "c"), "x", [1.0, 0.0], 300)),
+                   context.Process(target=write_items, args=(str(tmp_path / "c"), "y", [0.0, 1.0], 300))]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+        stored = NumpyCollection(str(tmp_path / "c")).get(include=["embeddings"])
+        assert [writer.exitcode for writer in writers] == [0, 0]
+        assert len(stored["ids"]) == 300
+        for item_id, embedding in zip(stored["ids"], stored["embeddings"]):
+            assert list(embedding) == ([1.0, 0.0] if item_id.startswith("x") else [0.0, 1.0])
+
+    def should_reject_embeddings_of_different_size(self, tmp_path):
+        collection = NumpyCollection(str(tmp_path / "c"))
+        collection.upsert(["a"], None, None, [[1.0, 0.0]])
+
+        with pytest.raises(ValueError):
+            collection.upsert(["b"], None, None, [[1.0, 0.0, 0.0]])
+
+
+class DescribeMatchesWhere:
+    """
+    Describes matching metadata against Chroma-style where filters
+    """
+
+    def should_match_equality(self):
+        assert matches_where({"id": "a.md"}, {"id": "a.md"})
+        assert not matches_where({"id": "b.md"}, {"id": "a.md"})
+
+    def should_match_membership(self):
+        assert matches_where({"id": "a.md"}, {"id": {"$in": ["a.md", "b.md"]}})
+        assert not matches_where({"id": "a.md"}, {"id": {"$nin": ["a.md"]}})
+
+    def should_reject_unsupported_operators(self):
+        with pytest.raises(ValueError):
+            matches_where({"id": "a.md"}, {"id": {"$gt": 1}})
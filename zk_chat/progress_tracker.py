@@ -13,6 +13,8 @@ from rich.progress import (
 from rich.console import Console
 import structlog
 
+from zk_chat.indexing_stats import IndexingStats
+
 logger = structlog.get_logger()
 
 ProgressCallback = Callable[[str, int, int], None]
@@ -60,12 +62,13 @@ class ProgressTracker:
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeElapsedColumn(),
             TimeRemainingColumn(),
+            TextColumn("{task.fields[throughput]}", style="dim"),
             console=self.console,
             transient=False  # Keep progress visible after completion
         )
 
         self._progress.start()
-        self._main_task = self._progress.add_task(description, total=total, current_file="")
+        self._main_task = self._progress.add_task(description, total=total, current_file="", throughput="")
 
         logger.info("Started progress tracking", description=description, total=total)
         return self._main_task
@@ -193,12 +196,14 @@ class IndexingProgressTracker(ProgressTracker):
             )
             self._last_processed_count = 0
 
-    def update_file_processing(self, filename: str, processed_count: int) -> None:
+    def update_file_processing(self, filename: str, processed_count: int,
+                               stats: Optional[IndexingStats] = None) -> None:
         """Update progress for file processing.
 
         Args:
             filename: Current file being processed
             processed_count: Number of files processed so far
+            stats: Optional stats of the indexing run, shown as live throughput
         """
         # Extract just the filename from the path for cleaner display
         display_name = filename.split('/')[-1] if '/' in filename else filename
@@ -210,4 +215,11 @@ class IndexingProgressTracker(ProgressTracker):
         self.update_progress(
             advance=advance_by,
             current_file=display_name
-        )
\ No newline at end of file
+        )
+        if stats is not None and self._progress and self._main_task is not None:
+            self._progress.update(self._main_task, throughput=format_throughput(stats))
+
+
+def format_throughput(stats: IndexingStats) -> str:
+    """Format the live throughput of an indexing run, e.g. "12.5 docs/s, 40.1 excerpts/s"."""
+    return f"{stats.documents_per_second:.1f} docs/s, {stats.excerpts_per_second:.1f} excerpts/s"
\ No newline at end of file
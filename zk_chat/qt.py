@@ -10,20 +10,19 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QLabel, QLineEdit, QComboBox, QFileDialog, QSplitter, QHBoxLayout, QSizePolicy,
                                QTextBrowser, QScrollArea, QProgressBar)
 from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
-from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 from mojentic.llm.tools.date_resolver import ResolveDateTool
 
-from zk_chat.chat import ChatSession, LLMBroker, ChromaGateway, Zettelkasten
-from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.chat import ChatSession, LLMBroker
 from zk_chat.config import Config, get_available_models, ModelGateway
-from zk_chat.filesystem_gateway import MarkdownFilesystemGateway
 from zk_chat.tools.analyze_image import AnalyzeImage
+from zk_chat.tools.find_excerpts_for_queries import FindExcerptsForQueries
 from zk_chat.tools.find_excerpts_related_to import FindExcerptsRelatedTo
 from zk_chat.tools.find_zk_documents_related_to import FindZkDocumentsRelatedTo
 from zk_chat.tools.list_zk_images import ListZkImages
 from zk_chat.tools.read_zk_document import ReadZkDocument
 from zk_chat.tools.resolve_wikilink import ResolveWikiLink
-from zk_chat.vector_database import VectorDatabase
+from zk_chat.vector_store import create_vector_gateway
+from zk_chat.zettelkasten_factory import create_zettelkasten
 
 
 class LoadingSpinnerWidget(QWidget):
@@ -340,7 +339,7 @@ class MainWindow(QMainWindow):
 
     def initialize_chat_session(self):
         db_dir = os.path.join(self.config.vault, ".zk_chat_db")
-        chroma = ChromaGateway(self.config.gateway, db_dir=db_dir)
+        chroma = create_vector_gateway(self.config, db_dir)
 
         # Create the appropriate gateway based on configuration
         if self.config.gateway == ModelGateway.OLLAMA:
@@ -351,19 +350,7 @@ class MainWindow(QMainWindow):
             # Default to Ollama if not specified
             gateway = OllamaGateway()
 
-        zk = Zettelkasten(
-            tokenizer_gateway=TokenizerGateway(),
-            excerpts_db=VectorDatabase(
-                chroma_gateway=chroma,
-                gateway=gateway,
-                collection_name=ZkCollectionName.EXCERPTS
-            ),
-            documents_db=VectorDatabase(
-                chroma_gateway=chroma,
-                gateway=gateway,
-                collection_name=ZkCollectionName.DOCUMENTS
-            ),
-            filesystem_gateway=MarkdownFilesystemGateway(self.config.vault))
+        zk = create_zettelkasten(self.config, chroma, gateway, for_queries=True)
         # Create LLM broker for chat
         chat_llm = LLMBroker(self.config.model, gateway=self.config.gateway.value)
 
@@ -373,6 +360,7 @@ class MainWindow(QMainWindow):
             ReadZkDocument(zk),
             ListZkImages(zk),
             FindExcerptsRelatedTo(zk),
+            FindExcerptsForQueries(zk),
             FindZkDocumentsRelatedTo(zk),
             ResolveWikiLink(zk.filesystem_gateway),
         ]
@@ -0,0 +1,108 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+
+from zk_chat.embedding_gateway import EmbeddingGateway
+
+logger = structlog.get_logger()
+
+
+def normalize_query(query_text: str) -> str:
+    """Normalize a query so that queries differing only in whitespace or Unicode composition share an embedding."""
+    return " ".join(unicodedata.normalize("NFC", query_text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    In-memory, bounded LRU cache of query embeddings, keyed by embedding model and normalized query text.
+
+    Agents and chat sessions often repeat a query within a session, and each repeat would otherwise wait for
+    the embedding model. Share one cache between the excerpt and document databases so a query searched in both
+    is embedded once. Embeddings survive across sessions when the EmbeddingGateway has a persistent EmbeddingCache,
+    which is only consulted when this cache misses.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the QueryEmbeddingCache.
+
+        Args:
+            max_entries: Maximum number of query embeddings kept, least recently used are evicted first
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._embeddings: OrderedDict[Tuple[str, str], List[float]] = OrderedDict()
+
+    def get_embedding(self, gateway: EmbeddingGateway, query_text: str) -> List[float]:
+        """
+        Get the embedding of a query, calculating it with the gateway only if it is not cached.
+
+        Args:
+            gateway: The gateway that calculates the embedding on a miss
+            query_text: The query text
+
+        Returns:
+            The embedding of the normalized query text
+        """
+        normalized = normalize_query(query_text)
+        embedding = self._lookup(gateway.model_key, normalized)
+        if embedding is not None:
+            return embedding
+
+        logger.debug("Query embedding cache miss", query_text=normalized)
+        embedding = gateway.calculate_embeddings(normalized)
+        self._store(gateway.model_key, {normalized: embedding})
+        return embedding
+
+    def get_embeddings(self, gateway: EmbeddingGateway, query_texts: List[str]) -> List[List[float]]:
+        """
+        Get the embeddings of several queries, calculating those not cached in one batch.
+
+        Args:
+            gateway: The gateway that calculates the embeddings on a miss
+            query_texts: The query texts
+
+        Returns:
+            The embedding of each normalized query text, in the same order
+        """
+        normalized = [normalize_query(query_text) for query_text in query_texts]
+        embeddings: Dict[str, List[float]] = {}
+        for text in normalized:
+            embedding = self._lookup(gateway.model_key, text)
+            if embedding is not None:
+                embeddings[text] = embedding
+
+        missing = list(dict.fromkeys(text for text in normalized if text not in embeddings))
+        if missing:
+            logger.debug("Query embedding cache misses", n_queries=len(normalized), n_missing=len(missing))
+            calculated = dict(zip(missing, gateway.calculate_embeddings_batch(missing)))
+            self._store(gateway.model_key, calculated)
+            embeddings.update(calculated)
+        return [embeddings[text] for text in normalized]
+
+    def _lookup(self, model_key: str, normalized: str) -> Optional[List[float]]:
+        key = (model_key, normalized)
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is not None:
+                self._embeddings.move_to_end(key)
+            return embedding
+
+    def _store(self, model_key: str, embeddings: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for normalized, embedding in embeddings.items():
+                self._embeddings[(model_key, normalized)] = embedding
+                self._embeddings.move_to_end((model_key, normalized))
+            while len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._embeddings)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._embeddings.clear()
@@ -0,0 +1,82 @@
+from unittest.mock import Mock
+
+import pytest
+
+from zk_chat.embedding_gateway import EmbeddingGateway
+from zk_chat.query_embedding_cache import QueryEmbeddingCache, normalize_query
+
+
+@pytest.fixture
+def gateway():
+    mock = Mock(spec=EmbeddingGateway)
+    mock.model_key = "ollama:model"
+    mock.calculate_embeddings.side_effect = lambda text: [float(len(text))]
+    return mock
+
+
+class DescribeQueryEmbeddingCache:
+    """
+    Describes the QueryEmbeddingCache which keeps recent query embeddings in memory
+    """
+
+    def should_embed_repeated_query_once(self, gateway):
+        cache = QueryEmbeddingCache()
+
+        first = cache.get_embedding(gateway, "zettelkasten")
+        second = cache.get_embedding(gateway, "zettelkasten")
+
+        assert first == second == [12.0]
+        gateway.calculate_embeddings.assert_called_once_with("zettelkasten")
+
+    def should_share_embedding_between_queries_differing_in_whitespace(self, gateway):
+        cache = QueryEmbeddingCache()
+
+        cache.get_embedding(gateway, "  note   taking ")
+        cache.get_embedding(gateway, "note taking")
+
+        gateway.calculate_embeddings.assert_called_once_with("note taking")
+
+    def should_keep_embeddings_of_different_models_apart(self, gateway):
+        cache = QueryEmbeddingCache()
+        other = Mock(spec=EmbeddingGateway)
+        other.model_key = "openai:model"
+        other.calculate_embeddings.return_value = [1.0]
+
+        cache.get_embedding(gateway, "query")
+
+        assert cache.get_embedding(other, "query") == [1.0]
+
+    def should_evict_least_recently_used_query(self, gateway):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.get_embedding(gateway, "a")
+        cache.get_embedding(gateway, "b")
+        cache.get_embedding(gateway, "a")
+
+        cache.get_embedding(gateway, "c")
+        cache.get_embedding(gateway, "a")
+        cache.get_embedding(gateway, "b")
+
+        assert len(cache) == 2
+        assert [call.args[0] for call in gateway.calculate_embeddings.call_args_list] == ["a", "b", "c", "b"]
+
+    def should_embed_only_uncached_queries_in_one_batch(self, gateway):
+        gateway.calculate_embeddings_batch.side_effect = lambda texts: [[float(len(text))] for text in texts]
+        cache = QueryEmbeddingCache()
+        cache.get_embedding(gateway, "cached")
+
+        embeddings = cache.get_embeddings(gateway, ["new", "cached", " new ", "other"])
+
+        assert embeddings == [[3.0], [6.0], [3.0], [5.0]]
+        gateway.calculate_embeddings_batch.assert_called_once_with(["new", "other"])
+
+
+class DescribeNormalizeQuery:
+    """
+    Describes normalizing query text before it is embedded
+    """
+
+    def should_collapse_whitespace(self):
+        assert normalize_query(" a\n\tb  ") == "a b"
+
+    def should_compose_unicode(self):
+        assert normalize_query("cafe\u0301") == "caf\u00e9"
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class QueryResultCache:
+    """
+    In-memory, bounded LRU cache of query results.
+
+    Callers include the index version in each key, so a result is never served once the index it was
+    searched in has changed, and entries left behind by earlier versions age out of the cache.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """
+        Initialize the QueryResultCache.
+
+        Args:
+            max_entries: Maximum number of results kept, least recently used are evicted first
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results: OrderedDict[Hashable, List[Any]] = OrderedDict()
+
+    def get_or_query(self, key: Hashable, query: Callable[[], List[Any]]) -> List[Any]:
+        """
+        Get the cached results for a key, running the query only if they are not cached.
+
+        Args:
+            key: Identifies the query, its parameters and the index version it searches
+            query: Runs the query
+
+        Returns:
+            A copy of the results, so callers cannot change the cached list
+        """
+        results = self.get(key)
+        if results is not None:
+            return results
+        results = query()
+        self.put(key, results)
+        return list(results)
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """
+        Get a copy of the cached results for a key.
+
+        Args:
+            key: Identifies the query, its parameters and the index version it searches
+
+        Returns:
+            The results, or None if they are not cached
+        """
+        with self._lock:
+            results = self._results.get(key)
+            if results is None:
+                return None
+            self._results.move_to_end(key)
+            return list(results)
+
+    def put(self, key: Hashable, results: List[Any]) -> None:
+        """
+        Cache the results of a query, evicting the least recently used results if the cache is full.
+
+        Args:
+            key: Identifies the query, its parameters and the index version it searches
+            results: The results
+        """
+        with self._lock:
+            self._results[key] = list(results)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,44 @@
+from unittest.mock import Mock
+
+from zk_chat.query_result_cache import QueryResultCache
+
+
+class DescribeQueryResultCache:
+    """
+    Describes the QueryResultCache which keeps recent query results in memory
+    """
+
+    def should_run_query_once_per_key(self):
+        cache = QueryResultCache()
+        query = Mock(return_value=["result"])
+
+        cache.get_or_query(("notes", "v1"), query)
+        results = cache.get_or_query(("notes", "v1"), query)
+
+        assert results == ["result"]
+        query.assert_called_once()
+
+    def should_report_uncached_key(self):
+        cache = QueryResultCache()
+        cache.put("cached", ["result"])
+
+        assert cache.get("cached") == ["result"]
+        assert cache.get("missing") is None
+
+    def should_not_share_cached_list_with_callers(self):
+        cache = QueryResultCache()
+        cache.get_or_query("key", lambda: ["result"]).append("added by caller")
+
+        assert cache.get_or_query("key", lambda: []) == ["result"]
+
+    def should_evict_least_recently_used_results(self):
+        cache = QueryResultCache(max_entries=2)
+        cache.get_or_query("a", lambda: ["a"])
+        cache.get_or_query("b", lambda: ["b"])
+        cache.get_or_query("a", lambda: ["stale"])
+
+        cache.get_or_query("c", lambda: ["c"])
+
+        assert len(cache) == 2
+        assert cache.get_or_query("a", lambda: ["new"]) == ["a"]
+        assert cache.get_or_query("b", lambda: ["new"]) == ["new"]
@@ -0,0 +1,140 @@
+import re
+from typing import Dict, List, Optional, Set
+
+from zk_chat.models import QueryResult, VectorDocumentForStorage
+
+_TERM = re.compile(r"\w+")
+
+# Excerpts sharing at least this fraction of their distinct terms are treated as saying the same thing
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+# Weight given to novelty over relevance when ordering results by maximal marginal relevance
+MMR_DIVERSITY = 0.3
+
+# Joins adjacent excerpts whose text does not overlap, standing in for the blank lines between markdown blocks
+PASSAGE_SEPARATOR = "\n\n"
+
+
+def merge_adjacent_excerpts(results: List[QueryResult]) -> List[QueryResult]:
+    """
+    Merge excerpts of the same note that overlap or follow one another into single passages.
+
+    Excerpts are placed by the ``start`` and ``end`` character offsets stored with them, and are adjacent when
+    their ``ordinal`` positions are consecutive. Excerpts stored without offsets are returned unchanged.
+
+    Args:
+        results: Excerpt query results, best first
+
+    Returns:
+        The passages, each ranked where its best excerpt was and carrying that excerpt's distance and score
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, result in enumerate(results):
+        if _location(result) is not None:
+            groups.setdefault(result.document.metadata.get("id"), []).append(index)
+
+    merged: Dict[int, QueryResult] = {}
+    absorbed: Set[int] = set()
+    for indexes in groups.values():
+        ordered = sorted(indexes, key=lambda index: _location(results[index]))
+        passage = [ordered[0]]
+        for index in ordered[1:]:
+            if _follows(results[passage[-1]], results[index]):
+                passage.append(index)
+            else:
+                _record_passage(results, passage, merged, absorbed)
+                passage = [index]
+        _record_passage(results, passage, merged, absorbed)
+
+    return [merged.get(index, result) for index, result in enumerate(results) if index not in absorbed]
+
+
+def remove_near_duplicates(results: List[QueryResult], threshold: float = NEAR_DUPLICATE_SIMILARITY,
+                           diversity: float = MMR_DIVERSITY) -> List[QueryResult]:
+    """
+    Order results by maximal marginal relevance, dropping any that nearly repeat a result already chosen.
+
+    Relevance comes from each result's rank, so results from vector, lexical and hybrid searches are treated alike,
+    and similarity is the overlap of the results' distinct terms.
+
+    Args:
+        results: Query results, best first
+        threshold: Similarity to a chosen result at or above which a result is dropped
+        diversity: Weight of novelty against relevance, from 0 (rank order) to 1 (most novel first)
+
+    Returns:
+        The remaining results, most relevant and novel first
+    """
+    terms = [_terms(result.document.content) for result in results]
+    relevance = [1.0 - index / len(results) for index in range(len(results))]
+    redundancy = [0.0] * len(results)
+    remaining = list(range(len(results)))
+    chosen: List[int] = []
+    while remaining:
+        best = max(remaining, key=lambda index: (1.0 - diversity) * relevance[index] - diversity * redundancy[index])
+        remaining.remove(best)
+        if redundancy[best] >= threshold:
+            continue
+        chosen.append(best)
+        for index in remaining:
+            redundancy[index] = max(redundancy[index], _similarity(terms[index], terms[best]))
+    return [results[index] for index in chosen]
+
+
+def _location(result: QueryResult) -> Optional[int]:
+    metadata = result.document.metadata
+    if isinstance(metadata.get("start"), int) and isinstance(metadata.get("end"), int):
+        return metadata["start"]
+    return None
+
+
+def _follows(previous: QueryResult, current: QueryResult) -> bool:
+    """Check whether an excerpt overlaps, touches or directly follows the one before it in its note."""
+    previous_metadata, current_metadata = previous.document.metadata, current.document.metadata
+    if current_metadata["start"] <= previous_metadata["end"]:
+        return True
+    previous_ordinal, current_ordinal = previous_metadata.get("ordinal"), current_metadata.get("ordinal")
+    return previous_ordinal is not None and current_ordinal == previous_ordinal + 1
+
+
+def _record_passage(results: List[QueryResult], passage: List[int], merged: Dict[int, QueryResult],
+                    absorbed: Set[int]) -> None:
+    if len(passage) == 1:
+        return
+    best = min(passage)
+    merged[best] = _join(results[best], [results[index] for index in passage])
+    absorbed.update(index for index in passage if index != best)
+
+
+def _join(best: QueryResult, parts: List[QueryResult]) -> QueryResult:
+    """Join excerpts ordered by position into one passage, keeping the text they overlap on once."""
+    text = parts[0].document.content
+    end = parts[0].document.metadata["end"]
+    for part in parts[1:]:
+        part_end = part.document.metadata["end"]
+        if part_end <= end:
+            continue
+        overlap = end - part.document.metadata["start"]
+        text += part.document.content[overlap:] if overlap >= 0 else PASSAGE_SEPARATOR + part.document.content
+        end = part_end
+    metadata = {
+        **best.document.metadata,
+        "start": parts[0].document.metadata["start"],
+        "end": end,
+        "ordinal": parts[0].document.metadata.get("ordinal"),
+    }
+    return QueryResult(
+        document=VectorDocumentForStorage(id=best.document.id, content=text, metadata=metadata),
+        distance=best.distance,
+        score=best.score
+    )
+
+
+def _terms(text: str) -> Set[str]:
+    return {term.lower() for term in _TERM.findall(text)}
+
+
+def _similarity(first: Set[str], second: Set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
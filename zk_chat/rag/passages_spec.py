@@ -0,0 +1,79 @@
+from zk_chat.models import QueryResult, VectorDocumentForStorage
+from zk_chat.rag.passages import merge_adjacent_excerpts, remove_near_duplicates
+
+NOTE = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota."
+
+
+def hit(start, end, ordinal, distance, document_id="Note.md", content=None):
+    return QueryResult(
+        document=VectorDocumentForStorage(
+            id=f"{document_id}#{ordinal}", content=content if content is not None else NOTE[start:end],
+            metadata={"id": document_id, "title": document_id[:-3], "ordinal": ordinal, "start": start, "end": end}
+        ),
+        distance=distance
+    )
+
+
+def texts(results):
+    return [result.document.content for result in results]
+
+
+class DescribeMergeAdjacentExcerpts:
+    """
+    Describes merging excerpts of the same note into passages
+    """
+
+    def should_join_overlapping_excerpts_without_repeating_overlap(self):
+        merged = merge_adjacent_excerpts([hit(18, 53, 1, 0.4), hit(0, 36, 0, 0.2)])
+
+        assert texts(merged) == [NOTE]
+        assert merged[0].distance == 0.4
+        assert merged[0].document.metadata["start"] == 0
+
+    def should_join_consecutive_excerpts_with_gap_between_them(self):
+        merged = merge_adjacent_excerpts([hit(0, 17, 0, 0.2), hit(18, 37, 1, 0.3)])
+
+        assert texts(merged) == ["Alpha beta gamma.\n\nDelta epsilon zeta."]
+
+    def should_keep_distant_excerpts_apart(self):
+        merged = merge_adjacent_excerpts([hit(0, 17, 0, 0.2), hit(38, 53, 2, 0.3)])
+
+        assert len(merged) == 2
+
+    def should_keep_excerpts_of_other_notes_in_rank_order(self):
+        other = hit(0, 10, 0, 0.25, document_id="Other.md", content="Other note")
+
+        merged = merge_adjacent_excerpts([hit(0, 17, 0, 0.2), other, hit(18, 37, 1, 0.3)])
+
+        assert texts(merged) == ["Alpha beta gamma.\n\nDelta epsilon zeta.", "Other note"]
+
+    def should_leave_excerpts_without_offsets_unchanged(self):
+        result = QueryResult(
+            document=VectorDocumentForStorage(id="Old.md#0", content="text", metadata={"id": "Old.md"}),
+            distance=0.1
+        )
+
+        assert merge_adjacent_excerpts([result, result]) == [result, result]
+
+
+class DescribeRemoveNearDuplicates:
+    """
+    Describes dropping results that repeat a better result, by maximal marginal relevance
+    """
+
+    def should_drop_result_repeating_better_one(self):
+        results = [
+            hit(0, 0, 0, 0.1, content="The cat sat on the mat"),
+            hit(0, 0, 0, 0.2, document_id="Copy.md", content="the cat sat on the mat!"),
+            hit(0, 0, 0, 0.3, document_id="Dog.md", content="A dog barked"),
+        ]
+
+        assert texts(remove_near_duplicates(results)) == ["The cat sat on the mat", "A dog barked"]
+
+    def should_keep_rank_order_of_distinct_results(self):
+        results = [hit(0, 0, 0, 0.1, content="first"), hit(0, 0, 0, 0.2, content="second")]
+
+        assert remove_near_duplicates(results) == results
+
+    def should_return_nothing_for_no_results(self):
+        assert remove_near_duplicates([]) == []
@@ -0,0 +1,24 @@
+import math
+from typing import List
+
+
+def pool_embeddings(embeddings: List[List[float]], weights: List[float]) -> List[float]:
+    """
+    Combine embeddings into one vector by weighted mean, scaled to unit length.
+
+    Scaling to unit length keeps pooled vectors comparable with embeddings calculated by the model.
+
+    Args:
+        embeddings: The embeddings to combine, all with the same dimensions
+        weights: The weight of each embedding, e.g. the length of the text it embeds
+
+    Returns:
+        The pooled embedding
+    """
+    if not sum(weights):
+        weights = [1.0] * len(embeddings)
+    total_weight = sum(weights)
+    weighted = [[weight * value for value in embedding] for embedding, weight in zip(embeddings, weights)]
+    pooled = [sum(values) / total_weight for values in zip(*weighted)]
+    norm = math.sqrt(sum(value * value for value in pooled))
+    return [value / norm for value in pooled] if norm else pooled
@@ -0,0 +1,23 @@
+import math
+
+from zk_chat.rag.pooling import pool_embeddings
+
+
+class DescribePoolEmbeddings:
+    def should_weight_embeddings_by_their_weights(self):
+        pooled = pool_embeddings([[1.0, 0.0], [0.0, 1.0]], [3, 1])
+
+        assert pooled[0] > pooled[1] > 0
+
+    def should_scale_pooled_embedding_to_unit_length(self):
+        pooled = pool_embeddings([[3.0, 0.0], [0.0, 4.0]], [1, 1])
+
+        assert math.isclose(math.hypot(*pooled), 1.0)
+
+    def should_return_single_unit_embedding_unchanged(self):
+        assert pool_embeddings([[0.6, 0.8]], [10]) == [0.6, 0.8]
+
+    def should_treat_zero_weights_as_equal(self):
+        pooled = pool_embeddings([[1.0, 0.0], [0.0, 1.0]], [0, 0])
+
+        assert math.isclose(pooled[0], pooled[1])
@@ -0,0 +1,32 @@
+from typing import Callable, Dict, Hashable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Damps the weight of top ranks, as in the original reciprocal rank fusion paper
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: List[List[T]], key: Callable[[T], Hashable],
+                           k: int = RRF_K) -> List[Tuple[T, float]]:
+    """
+    Merge ranked lists by reciprocal rank fusion: each item scores the sum of ``1 / (k + rank)`` over the lists.
+
+    Only ranks are used, so lists scored on different scales, e.g. vector distances and BM25 scores, combine fairly.
+
+    Args:
+        rankings: The ranked lists, best first
+        key: Identifies an item, so the same item found by several lists is merged
+        k: Damping constant; larger values flatten the difference between top and lower ranks
+
+    Returns:
+        The distinct items with their fused scores, best first. Where lists share an item, the instance from the
+        earliest list is kept.
+    """
+    scores: Dict[Hashable, float] = {}
+    items: Dict[Hashable, T] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(item_key, item)
+    return [(items[item_key], scores[item_key]) for item_key in sorted(scores, key=lambda item_key: -scores[item_key])]
@@ -0,0 +1,34 @@
+from zk_chat.rag.rank_fusion import RRF_K, reciprocal_rank_fusion
+
+
+def fused_items(rankings, key=str):
+    return [item for item, _ in reciprocal_rank_fusion(rankings, key=key)]
+
+
+class DescribeReciprocalRankFusion:
+    """
+    Describes merging ranked lists by reciprocal rank fusion
+    """
+
+    def should_rank_items_found_by_both_lists_first(self):
+        fused = fused_items([["a", "b", "c"], ["d", "c"]])
+
+        assert fused[0] == "c"
+        assert set(fused) == {"a", "b", "c", "d"}
+
+    def should_keep_order_of_a_single_list(self):
+        assert fused_items([["a", "b", "c"]]) == ["a", "b", "c"]
+
+    def should_score_items_by_sum_of_reciprocal_ranks(self):
+        fused = dict(reciprocal_rank_fusion([["a", "b"], ["b"]], key=str))
+
+        assert fused["a"] == 1.0 / (RRF_K + 1)
+        assert fused["b"] == 1.0 / (RRF_K + 2) + 1.0 / (RRF_K + 1)
+
+    def should_keep_instance_from_earliest_list(self):
+        vector_hit = {"id": "a", "source": "vector"}
+        lexical_hit = {"id": "a", "source": "lexical"}
+
+        fused = fused_items([[vector_hit], [lexical_hit]], key=lambda hit: hit["id"])
+
+        assert fused == [vector_hit]
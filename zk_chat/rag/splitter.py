@@ -1,3 +1,9 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+
 def split_tokens(tokens, excerpt_size=500, excerpt_overlap=100):
     start_index = 0
     chunks = []
@@ -8,3 +14,192 @@ def split_tokens(tokens, excerpt_size=500, excerpt_overlap=100):
             break
         start_index += excerpt_size - excerpt_overlap
     return chunks
+
+
+_HEADING = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)[ \t#]*$")
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LIST_ITEM = re.compile(r"^[ \t]*(?:[-*+]|\d+[.)])[ \t]+")
+_SEPARATORS = [re.compile(r"\n"), re.compile(r"(?<=[.!?])\s+"), re.compile(r"\s+")]
+
+
+class MarkdownChunk(BaseModel):
+    """A chunk of a markdown text, with its character offsets, the headings it falls under and its token count."""
+    text: str
+    start: int
+    end: int
+    heading_path: List[str] = Field(default_factory=list)
+    tokens: int = 0
+
+
+class _Block(BaseModel):
+    kind: str
+    start: int
+    end: int
+    tokens: int = 0
+    heading_path: List[str] = Field(default_factory=list)
+
+
+def split_markdown(text: str, count_tokens: Callable[[str], int], excerpt_size: int = 500,
+                   excerpt_overlap: int = 100) -> List[MarkdownChunk]:
+    """
+    Split markdown into chunks of whole headings, paragraphs, lists and fenced blocks.
+
+    Blocks are packed into chunks of at most ``excerpt_size`` tokens, and a heading is kept with the content
+    that follows it. Blocks larger than a chunk are split at line, then sentence, then word boundaries.
+    Each chunk after the first starts with trailing blocks of the previous chunk, up to ``excerpt_overlap`` tokens.
+    Chunks are slices of the original text, so only token counts are needed from the tokenizer.
+
+    Args:
+        text: The markdown to split
+        count_tokens: Counts the tokens in a piece of text
+        excerpt_size: Maximum number of tokens in a chunk
+        excerpt_overlap: Maximum number of tokens repeated from the end of the previous chunk
+
+    Returns:
+        The chunks, in document order
+    """
+    pieces = []
+    for block in _parse_blocks(text):
+        block.tokens = count_tokens(text[block.start:block.end])
+        if block.tokens <= excerpt_size:
+            pieces.append(block)
+            continue
+        pieces.extend(
+            _Block(kind=block.kind, start=start, end=end, tokens=tokens, heading_path=block.heading_path)
+            for start, end, tokens in _split_span(text, block.start, block.end, count_tokens, excerpt_size,
+                                                  _SEPARATORS)
+        )
+
+    chunks = []
+    current: List[_Block] = []
+    first_new = 0
+    for piece in pieces:
+        if current and sum(block.tokens for block in current) + piece.tokens > excerpt_size:
+            carried_headings = _carried_headings(current, excerpt_size - piece.tokens)
+            del current[len(current) - len(carried_headings):]
+            room = excerpt_size - piece.tokens - sum(block.tokens for block in carried_headings)
+            if len(current) > first_new:
+                chunks.append(_create_chunk(text, current, first_new))
+                current = _overlap(current, excerpt_overlap, room)
+            else:
+                current = []
+            first_new = len(current)
+            current.extend(carried_headings)
+        current.append(piece)
+    if len(current) > first_new:
+        chunks.append(_create_chunk(text, current, first_new))
+    return chunks
+
+
+def _parse_blocks(text: str) -> List[_Block]:
+    blocks: List[_Block] = []
+    headings: List[str] = []
+    fence: Optional[str] = None
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        start, end = offset, offset + len(line.rstrip("\r\n"))
+        offset += len(line)
+        content = line.rstrip("\r\n")
+        current = blocks[-1] if blocks else None
+
+        if fence is not None:
+            current.end = end
+            if content.strip().startswith(fence):
+                fence = None
+            continue
+        if not content.strip():
+            if current is not None and current.kind != "heading":
+                current.kind = f"closed {current.kind}"
+            continue
+
+        fence_match = _FENCE.match(content)
+        heading_match = _HEADING.match(content)
+        if fence_match:
+            fence = fence_match.group(1)
+            blocks.append(_Block(kind="fence", start=start, end=end, heading_path=list(headings)))
+        elif heading_match:
+            level = len(heading_match.group(1))
+            headings = headings[:level - 1] + [heading_match.group(2)]
+            blocks.append(_Block(kind="heading", start=start, end=end, heading_path=list(headings)))
+        elif _LIST_ITEM.match(content) or (current is not None and current.kind.endswith("list")
+                                            and content[:1] in (" ", "\t")):
+            if current is not None and current.kind.endswith("list"):
+                current.kind = "list"
+                current.end = end
+            else:
+                blocks.append(_Block(kind="list", start=start, end=end, heading_path=list(headings)))
+        elif current is not None and current.kind in ("paragraph", "list"):
+            current.end = end
+        else:
+            blocks.append(_Block(kind="paragraph", start=start, end=end, heading_path=list(headings)))
+
+    for block in blocks:
+        block.kind = block.kind.replace("closed ", "")
+    return blocks
+
+
+def _split_span(text: str, start: int, end: int, count_tokens: Callable[[str], int], excerpt_size: int,
+                separators: List[re.Pattern]) -> List[Tuple[int, int, int]]:
+    """Split a span into pieces of at most ``excerpt_size`` tokens, preferring the earliest separators."""
+    tokens = count_tokens(text[start:end])
+    if tokens <= excerpt_size or end - start <= 1:
+        return [(start, end, tokens)]
+
+    if separators:
+        boundaries = [match.end() for match in separators[0].finditer(text, start, end) if match.end() < end]
+        if not boundaries:
+            return _split_span(text, start, end, count_tokens, excerpt_size, separators[1:])
+        edges = [start] + boundaries + [end]
+        parts = [(edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+    else:
+        middle = (start + end) // 2
+        parts = [(start, middle), (middle, end)]
+
+    pieces = [
+        piece for part_start, part_end in parts
+        for piece in _split_span(text, part_start, part_end, count_tokens, excerpt_size, separators[1:])
+    ]
+    return _pack(pieces, excerpt_size)
+
+
+def _pack(pieces: List[Tuple[int, int, int]], excerpt_size: int) -> List[Tuple[int, int, int]]:
+    packed = []
+    for start, end, tokens in pieces:
+        if packed and packed[-1][2] + tokens <= excerpt_size:
+            packed[-1] = (packed[-1][0], end, packed[-1][2] + tokens)
+        else:
+            packed.append((start, end, tokens))
+    return packed
+
+
+def _carried_headings(blocks: List[_Block], room: int) -> List[_Block]:
+    """Take the trailing headings to move into the next chunk, or none when they do not fit beside its first block."""
+    headings: List[_Block] = []
+    for block in reversed(blocks):
+        if block.kind != "heading":
+            break
+        headings.insert(0, block)
+    return headings if sum(block.tokens for block in headings) <= room else []
+
+
+def _overlap(blocks: List[_Block], excerpt_overlap: int, room: int) -> List[_Block]:
+    """Take trailing blocks up to the overlap budget that still leave room for the next block."""
+    budget = min(excerpt_overlap, room)
+    overlap: List[_Block] = []
+    tokens = 0
+    for block in reversed(blocks):
+        if tokens + block.tokens > budget:
+            break
+        overlap.insert(0, block)
+        tokens += block.tokens
+    return overlap
+
+
+def _create_chunk(text: str, blocks: List[_Block], first_new: int) -> MarkdownChunk:
+    start, end = blocks[0].start, blocks[-1].end
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return MarkdownChunk(text=text[start:end], start=start, end=end, heading_path=blocks[first_new].heading_path,
+                         tokens=sum(block.tokens for block in blocks))
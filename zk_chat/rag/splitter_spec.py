@@ -1,4 +1,6 @@
-from zk_chat.rag.splitter import split_tokens
+import pytest
+
+from zk_chat.rag.splitter import split_markdown, split_tokens
 
 
 class DescribeSplitter:
@@ -49,3 +51,104 @@ class DescribeSplitter:
         expected_chunks = []
         chunks = split_tokens(tokens, chunk_size, chunk_overlap)
         assert chunks == expected_chunks
+
+
+def count_words(text):
+    return len(text.split())
+
+
+NOTE = """# Title
+
+Intro paragraph. It has two sentences.
+
+## Section
+
+- item one
+- item two
+  continued
+
+```python
+code line
+
+more code
+```
+
+## Next
+
+Final words here.
+"""
+
+
+class DescribeMarkdownSplitter:
+    def should_keep_short_note_as_single_chunk(self):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=500, excerpt_overlap=0)
+
+        assert len(chunks) == 1
+        assert chunks[0].text == NOTE.strip()
+
+    def should_slice_chunks_from_original_text(self):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=12, excerpt_overlap=0)
+
+        assert all(NOTE[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+
+    def should_not_split_lists_or_fenced_blocks(self):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=12, excerpt_overlap=0)
+
+        assert any(chunk.text.endswith("- item one\n- item two\n  continued") for chunk in chunks)
+        assert any(chunk.text.startswith("```python\ncode line\n\nmore code\n```") for chunk in chunks)
+
+    def should_keep_heading_with_following_content(self):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=12, excerpt_overlap=0)
+
+        assert [chunk.text.split("\n")[0] for chunk in chunks] == ["# Title", "## Section", "```python"]
+
+    def should_record_heading_path_of_each_chunk(self):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=12, excerpt_overlap=0)
+
+        assert [chunk.heading_path for chunk in chunks] == [["Title"], ["Title", "Section"], ["Title", "Section"]]
+
+    def should_split_oversized_paragraph_at_sentence_boundaries(self):
+        text = "One two three. Four five six. Seven eight nine."
+
+        chunks = split_markdown(text, count_words, excerpt_size=6, excerpt_overlap=0)
+
+        assert [chunk.text for chunk in chunks] == ["One two three. Four five six.", "Seven eight nine."]
+
+    def should_split_unbroken_text_that_exceeds_chunk_size(self):
+        text = "a" * 20
+
+        chunks = split_markdown(text, len, excerpt_size=5, excerpt_overlap=0)
+
+        assert "".join(chunk.text for chunk in chunks) == text
+        assert all(len(chunk.text) <= 5 for chunk in chunks)
+
+    def should_repeat_trailing_blocks_within_overlap(self):
+        text = "Alpha beta.\n\nGamma delta.\n\nEpsilon zeta."
+
+        chunks = split_markdown(text, count_words, excerpt_size=4, excerpt_overlap=2)
+
+        assert [chunk.text for chunk in chunks] == ["Alpha beta.\n\nGamma delta.", "Gamma delta.\n\nEpsilon zeta."]
+
+    def should_return_no_chunks_for_blank_text(self):
+        assert split_markdown("\n\n", count_words) == []
+
+    def should_record_token_count_of_each_chunk(self):
+        text = "Alpha beta.\n\nGamma delta.\n\nEpsilon zeta."
+
+        chunks = split_markdown(text, count_words, excerpt_size=4, excerpt_overlap=0)
+
+        assert [chunk.tokens for chunk in chunks] == [4, 2]
+
+    def should_fit_carried_heading_and_overlap_within_chunk_size(self):
+        text = "Alpha beta.\n\nGamma delta.\n\n## Next\n\nEpsilon zeta eta."
+
+        chunks = split_markdown(text, count_words, excerpt_size=6, excerpt_overlap=4)
+
+        assert [chunk.text for chunk in chunks] == ["Alpha beta.\n\nGamma delta.", "## Next\n\nEpsilon zeta eta."]
+
+    @pytest.mark.parametrize("excerpt_size,excerpt_overlap", [(4, 2), (6, 4), (8, 4), (8, 8), (12, 6)])
+    def should_not_exceed_chunk_size(self, excerpt_size, excerpt_overlap):
+        chunks = split_markdown(NOTE, count_words, excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)
+
+        assert all(chunk.tokens <= excerpt_size for chunk in chunks)
+        assert all(count_words(chunk.text) <= excerpt_size for chunk in chunks)
@@ -0,0 +1,50 @@
+import json
+from typing import List
+
+import structlog
+from mojentic.llm.tools.llm_tool import LLMTool
+
+from zk_chat.console_service import RichConsoleService
+from zk_chat.models import ZkQueryExcerptResult
+from zk_chat.zettelkasten import Zettelkasten
+
+logger = structlog.get_logger()
+
+
+class FindExcerptsForQueries(LLMTool):
+    def __init__(self, zk: Zettelkasten, console_service: RichConsoleService = None):
+        self.zk = zk
+        self.console_service = console_service or RichConsoleService()
+
+    def run(self, queries: List[str]) -> str:
+        self.console_service.print(f"[tool.info]Querying excerpts related to {', '.join(queries)}[/]")
+        grouped_results: List[List[ZkQueryExcerptResult]] = self.zk.query_excerpts_many(queries, max_distance=200.0)
+        # Use model_dump with mode='json' to handle datetime serialization
+        return json.dumps([
+            {
+                "query": query,
+                "results": [result.model_dump(mode='json') for result in results]
+            }
+            for query, results in zip(queries, grouped_results)
+        ])
+
+    @property
+    def descriptor(self) -> dict:
+        return {
+            "type": "function",
+            "function": {
+                "name": "find_excerpts_for_queries",
+                "description": "Search for passages or excerpts within documents in the Zettelkasten knowledge base that are relevant to each of several queries at once. This is faster than searching for each query separately, so use it when you have more than one thing to look up. Results are grouped by query.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "queries": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "The search queries to find relevant excerpts for."
+                        }
+                    },
+                    "required": ["queries"]
+                },
+            },
+        }
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+
+from zk_chat.models import ZkQueryExcerptResult, ZkDocumentExcerpt
+from zk_chat.tools.find_excerpts_for_queries import FindExcerptsForQueries
+
+
+@pytest.fixture
+def mock_zk(mocker: MockerFixture):
+    return mocker.Mock()
+
+
+@pytest.fixture
+def find_excerpts_tool(mock_zk):
+    return FindExcerptsForQueries(mock_zk)
+
+
+def test_find_excerpts_for_queries(find_excerpts_tool, mock_zk):
+    queries = ["first query", "second query"]
+    first_result = ZkQueryExcerptResult(
+        excerpt=ZkDocumentExcerpt(
+            document_id="doc1",
+            document_title="Test Doc 1",
+            text="Sample text 1"
+        ),
+        distance=0.1
+    )
+    mock_zk.query_excerpts_many.return_value = [[first_result], []]
+
+    result = find_excerpts_tool.run(queries)
+
+    mock_zk.query_excerpts_many.assert_called_once_with(queries, max_distance=200.0)
+    assert json.loads(result) == [
+        {"query": "first query", "results": [first_result.model_dump(mode='json')]},
+        {"query": "second query", "results": []}
+    ]
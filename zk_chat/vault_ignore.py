@@ -0,0 +1,169 @@
+import os
+import re
+from typing import Iterator, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+IGNORE_FILE_NAME = ".zkchatignore"
+
+# Tool, version control and trash folders, which never hold notes to index
+DEFAULT_IGNORE_PATTERNS = [".zk_chat_db/", ".git/", ".obsidian/", ".trash/"]
+
+
+def _translate_glob(glob: str) -> str:
+    """Translate a glob to a regular expression in which only ``**`` crosses directory boundaries."""
+    regex = ""
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif glob.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif glob[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif glob[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(glob[i])
+            i += 1
+    return regex
+
+
+class GlobPattern:
+    """
+    A path glob with gitignore-like anchoring.
+
+    A glob without a slash matches a file or directory name at any depth, e.g. ``*.pdf`` or ``attachments/``;
+    one with a slash matches the path from the vault root, e.g. ``journal/2019/**``. A trailing slash matches
+    directories only.
+    """
+
+    def __init__(self, glob: str):
+        self.glob = glob
+        self.directory_only = glob.endswith("/")
+        stripped = glob.strip("/")
+        self.anchored = "/" in glob.rstrip("/")
+        self._regex = re.compile(_translate_glob(stripped))
+
+    def matches(self, relative_path: str, is_directory: bool = False) -> bool:
+        """
+        Check whether a path matches the glob.
+
+        Args:
+            relative_path: Path from the vault root, with forward slashes
+            is_directory: Whether the path is a directory
+
+        Returns:
+            True if the path matches
+        """
+        if self.directory_only and not is_directory:
+            return False
+        target = relative_path if self.anchored else relative_path.rsplit("/", 1)[-1]
+        return self._regex.fullmatch(target) is not None
+
+
+class VaultIgnore:
+    """
+    Decides which vault files and directories are skipped when the vault is walked.
+
+    Paths matching an exclude glob are skipped, as is everything below an excluded directory, so excluded
+    directories are pruned from the walk instead of being listed and filtered. When include globs are given,
+    only files matching one of them are kept. Tool, version control and trash folders are always excluded.
+    """
+
+    def __init__(self, exclude_globs: Optional[List[str]] = None, include_globs: Optional[List[str]] = None):
+        """
+        Initialize the rules.
+
+        Args:
+            exclude_globs: Globs of files and directories to skip, in addition to the defaults
+            include_globs: Globs of the only files to keep, or None to keep every file not excluded
+        """
+        self.exclude = [GlobPattern(glob) for glob in DEFAULT_IGNORE_PATTERNS + list(exclude_globs or [])]
+        self.include = [GlobPattern(glob) for glob in include_globs or []]
+
+    @classmethod
+    def load(cls, root_path: str, include_globs: Optional[List[str]] = None,
+             exclude_globs: Optional[List[str]] = None) -> 'VaultIgnore':
+        """
+        Combine the vault's ``.zkchatignore`` file, if it has one, with globs from the configuration.
+
+        The ignore file lists one exclude glob per line; blank lines and lines starting with ``#`` are skipped.
+
+        Args:
+            root_path: The vault directory
+            include_globs: Globs of the only files to keep
+            exclude_globs: Globs of files and directories to skip
+
+        Returns:
+            The combined rules
+        """
+        globs = list(exclude_globs or [])
+        ignore_file_path = os.path.join(root_path, IGNORE_FILE_NAME)
+        if os.path.isfile(ignore_file_path):
+            with open(ignore_file_path, "r") as f:
+                globs.extend(cls._parse_ignore_file(f.read()))
+        return cls(exclude_globs=globs, include_globs=include_globs)
+
+    @staticmethod
+    def _parse_ignore_file(content: str) -> List[str]:
+        globs = []
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("!"):
+                logger.warning("Negated ignore patterns are not supported, skipping", pattern=line)
+                continue
+            globs.append(line)
+        return globs
+
+    def is_ignored(self, relative_path: str, is_directory: bool = False) -> bool:
+        """
+        Check whether a path is skipped, either itself or because a directory above it is.
+
+        Args:
+            relative_path: Path from the vault root
+            is_directory: Whether the path is a directory
+
+        Returns:
+            True if the path is skipped
+        """
+        parts = relative_path.replace(os.sep, "/").split("/")
+        for depth in range(1, len(parts)):
+            if self._is_excluded("/".join(parts[:depth]), is_directory=True):
+                return True
+        return self._is_skipped("/".join(parts), is_directory)
+
+    def walk(self, root_path: str, top: Optional[str] = None) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Walk the vault like ``os.walk``, without descending into skipped directories or listing skipped files.
+
+        Args:
+            root_path: The vault directory, which paths are matched from
+            top: A directory in the vault to walk instead of the whole vault
+
+        Yields:
+            Tuples of a directory path, its kept subdirectory names and its kept file names
+        """
+        for root, dirs, files in os.walk(top or root_path):
+            relative_root = os.path.relpath(root, root_path).replace(os.sep, "/")
+            prefix = "" if relative_root == "." else f"{relative_root}/"
+            dirs[:] = [directory for directory in dirs if not self._is_excluded(prefix + directory, is_directory=True)]
+            yield root, dirs, [file for file in files if not self._is_skipped(prefix + file, is_directory=False)]
+
+    def _is_excluded(self, relative_path: str, is_directory: bool) -> bool:
+        return any(pattern.matches(relative_path, is_directory) for pattern in self.exclude)
+
+    def _is_skipped(self, relative_path: str, is_directory: bool) -> bool:
+        if self._is_excluded(relative_path, is_directory):
+            return True
+        if is_directory or not self.include:
+            return False
+        return not any(pattern.matches(relative_path) for pattern in self.include)
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from zk_chat.vault_ignore import GlobPattern, VaultIgnore
+
+
+class DescribeGlobPattern:
+    @pytest.mark.parametrize("glob, path, is_directory, expected", [
+        ("*.pdf", "papers/paper.pdf", False, True),
+        ("*.pdf", "paper.pdf.md", False, False),
+        ("attachments/", "notes/attachments", True, True),
+        ("attachments/", "attachments", False, False),
+        ("journal/*.md", "journal/2019.md", False, True),
+        ("journal/*.md", "journal/2019/January.md", False, False),
+        ("journal/**/*.md", "journal/2019/January.md", False, True),
+        ("journal/**/*.md", "journal/today.md", False, True),
+        ("/drafts", "drafts", True, True),
+        ("/drafts", "notes/drafts", True, False),
+    ])
+    def should_match_paths_like_gitignore(self, glob, path, is_directory, expected):
+        assert GlobPattern(glob).matches(path, is_directory) == expected
+
+
+class DescribeVaultIgnore:
+    @pytest.fixture
+    def vault(self, tmp_path):
+        for relative_path in ["Note.md", "topic/Idea.md", "topic/attachments/scan.md", ".obsidian/workspace.md",
+                              ".zk_chat_db/cache.md", "archive/Old.md"]:
+            path = tmp_path / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("content")
+        return tmp_path
+
+    def walked_files(self, ignore, vault):
+        return sorted(os.path.relpath(os.path.join(root, file), vault)
+                      for root, _, files in ignore.walk(str(vault)) for file in files if file.endswith(".md"))
+
+    def should_skip_tool_and_version_control_directories_by_default(self, vault):
+        assert self.walked_files(VaultIgnore(), vault) == [
+            "Note.md", "archive/Old.md", "topic/Idea.md", "topic/attachments/scan.md"]
+
+    def should_not_descend_into_excluded_directories(self, vault):
+        walked_roots = [root for root, _, _ in VaultIgnore(exclude_globs=["attachments/"]).walk(str(vault))]
+
+        assert str(vault / "topic" / "attachments") not in walked_roots
+
+    def should_read_exclude_globs_from_zkchatignore(self, vault):
+        (vault / ".zkchatignore").write_text("# Old notes\n\narchive/\n!archive/Keep.md\n")
+
+        ignore = VaultIgnore.load(str(vault), exclude_globs=["attachments/"])
+
+        assert self.walked_files(ignore, vault) == ["Note.md", "topic/Idea.md"]
+
+    def should_keep_only_files_matching_include_globs(self, vault):
+        ignore = VaultIgnore(include_globs=["topic/**"])
+
+        assert self.walked_files(ignore, vault) == ["topic/Idea.md", "topic/attachments/scan.md"]
+
+    def should_ignore_paths_below_excluded_directories(self):
+        ignore = VaultIgnore(exclude_globs=["attachments/"])
+
+        assert ignore.is_ignored("topic/attachments/scan.md")
+        assert ignore.is_ignored(".git/HEAD")
+        assert not ignore.is_ignored("topic/Idea.md")
@@ -0,0 +1,346 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple, Union
+
+import structlog
+from pydantic import BaseModel, Field
+
+from zk_chat.vault_ignore import VaultIgnore
+from zk_chat.zettelkasten import Zettelkasten
+
+logger = structlog.get_logger()
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class VaultChanges(BaseModel):
+    """Markdown files that may have changed, or a request to rescan the vault when changes could not be tracked."""
+    paths: Set[str] = Field(default_factory=set)
+    rescan: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.paths) or self.rescan
+
+
+def _is_markdown(name: str) -> bool:
+    return name.lower().endswith(".md")
+
+
+class InotifyChangeSource:
+    """
+    Reports changed markdown files using Linux inotify, waiting in the kernel at no cost while the vault is idle.
+
+    Every directory in the vault that is not ignored gets a watch. Deleting or moving a directory, or an event
+    queue overflow, is reported as a rescan because the files it held cannot be listed any more.
+    """
+
+    def __init__(self, root_path: str, ignore: Optional[VaultIgnore] = None):
+        """
+        Initialize the change source and watch every directory in the vault.
+
+        Args:
+            root_path: The vault directory to watch
+            ignore: Which files and directories to skip (the vault's .zkchatignore if not given)
+
+        Raises:
+            OSError: If inotify is not available or cannot be initialized
+        """
+        self.root_path = root_path
+        self.ignore = ignore or VaultIgnore.load(root_path)
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, str] = {}
+        self._watch_tree(root_path)
+
+    @staticmethod
+    def is_available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            InotifyChangeSource._load_libc()
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _load_libc():
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        return libc
+
+    def poll(self, timeout: float) -> VaultChanges:
+        """
+        Wait up to ``timeout`` seconds for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The changes seen, which are empty if nothing changed
+        """
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return VaultChanges()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return VaultChanges()
+        return self._parse_events(buffer)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _parse_events(self, buffer: bytes) -> VaultChanges:
+        changes = VaultChanges()
+        new_directories = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="surrogateescape")
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                logger.warning("Watch event queue overflowed, rescanning vault")
+                changes.rescan = True
+                continue
+            if mask & _IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            directory = self._directories.get(wd)
+            if directory is None or not name:
+                continue
+
+            full_path = os.path.join(directory, name)
+            relative_path = os.path.relpath(full_path, self.root_path)
+            if mask & _IN_ISDIR:
+                if self.ignore.is_ignored(relative_path, is_directory=True):
+                    continue
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    new_directories.append(full_path)
+                if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    changes.rescan = True
+            elif _is_markdown(name) and not self.ignore.is_ignored(relative_path):
+                changes.paths.add(relative_path)
+
+        for directory in new_directories:
+            changes.paths.update(self._watch_tree(directory))
+        return changes
+
+    def _watch_tree(self, top: str) -> Set[str]:
+        """Watch a directory and its subdirectories, returning the markdown files already in them."""
+        found = set()
+        for root, _, files in self.ignore.walk(self.root_path, top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), _WATCH_MASK)
+            if wd < 0:
+                logger.warning("Could not watch directory", directory=root, errno=ctypes.get_errno())
+                continue
+            self._directories[wd] = root
+            found.update(os.path.relpath(os.path.join(root, file), self.root_path) for file in files if _is_markdown(file))
+        return found
+
+
+class PollingChangeSource:
+    """
+    Reports changed markdown files by comparing the size and modification time of every file between scans.
+
+    Used where inotify is unavailable. Each scan only stats files, so it never reads unchanged notes.
+    """
+
+    def __init__(self, root_path: str, interval: float = 5.0, ignore: Optional[VaultIgnore] = None):
+        """
+        Initialize the change source with a snapshot of the vault.
+
+        Args:
+            root_path: The vault directory to watch
+            interval: Number of seconds between scans
+            ignore: Which files and directories to skip (the vault's .zkchatignore if not given)
+        """
+        self.root_path = root_path
+        self.ignore = ignore or VaultIgnore.load(root_path)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def poll(self, timeout: float) -> VaultChanges:
+        """
+        Wait up to ``timeout`` seconds, scanning the vault if a scan falls due.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The changes seen, which are empty if nothing changed or no scan was due
+        """
+        wait = min(max(timeout, 0), max(self._next_scan - time.monotonic(), 0))
+        time.sleep(wait)
+        if time.monotonic() < self._next_scan:
+            return VaultChanges()
+
+        snapshot = self._scan()
+        self._next_scan = time.monotonic() + self.interval
+        changed = {
+            relative_path for relative_path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(relative_path) != self._snapshot.get(relative_path)
+        }
+        self._snapshot = snapshot
+        return VaultChanges(paths=changed)
+
+    def close(self) -> None:
+        pass
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for root, _, files in self.ignore.walk(self.root_path):
+            for file in files:
+                if not _is_markdown(file):
+                    continue
+                full_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                snapshot[os.path.relpath(full_path, self.root_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+ChangeSource = Union[InotifyChangeSource, PollingChangeSource]
+
+
+def create_change_source(root_path: str, polling: bool = False, polling_interval: float = 5.0,
+                         ignore: Optional[VaultIgnore] = None) -> ChangeSource:
+    """
+    Create the most efficient change source available for a vault.
+
+    Args:
+        root_path: The vault directory to watch
+        polling: Always scan the vault instead of using inotify
+        polling_interval: Number of seconds between scans when polling
+        ignore: Which files and directories to skip (the vault's .zkchatignore if not given)
+
+    Returns:
+        An InotifyChangeSource where inotify is available, otherwise a PollingChangeSource
+    """
+    if not polling and InotifyChangeSource.is_available():
+        try:
+            return InotifyChangeSource(root_path, ignore=ignore)
+        except OSError as e:
+            logger.warning("Could not use inotify, falling back to polling", error=str(e))
+    return PollingChangeSource(root_path, interval=polling_interval, ignore=ignore)
+
+
+class VaultWatcher:
+    """
+    Keeps the index of a vault up to date by feeding file changes into Zettelkasten's per-document indexing.
+
+    Changes are collected until the vault has been quiet for ``debounce_seconds``, so the bursts of events
+    written by editors and sync tools are indexed once. Continuous changes are still indexed at least every
+    ``max_delay_seconds``. When indexing fails, e.g. because the embedding model is unavailable, the changes are
+    kept and retried after ``retry_seconds``.
+    """
+
+    def __init__(self, zettelkasten: Zettelkasten, source: ChangeSource, excerpt_size: int = 500, excerpt_overlap: int = 100,
+                 debounce_seconds: float = 2.0, max_delay_seconds: float = 30.0, retry_seconds: float = 30.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            zettelkasten: The Zettelkasten whose index to keep up to date
+            source: Where file changes come from
+            excerpt_size: Size of text excerpts for indexing
+            excerpt_overlap: Overlap between excerpts
+            debounce_seconds: How long the vault must be quiet before changes are indexed
+            max_delay_seconds: The longest changes wait while the vault keeps changing
+            retry_seconds: How long to wait before retrying after indexing failed
+        """
+        self.zettelkasten = zettelkasten
+        self.source = source
+        self.excerpt_size = excerpt_size
+        self.excerpt_overlap = excerpt_overlap
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.retry_seconds = retry_seconds
+        self._pending = VaultChanges()
+        self._first_change: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._not_before = 0.0
+
+    def run(self, stop: Optional[threading.Event] = None, idle_timeout: float = 1.0) -> None:
+        """
+        Watch the vault until ``stop`` is set, or forever if no event is given.
+
+        Args:
+            stop: Optional event that stops the watcher
+            idle_timeout: How often to check ``stop`` while the vault is idle
+        """
+        logger.info("Watching vault for changes", source=type(self.source).__name__)
+        try:
+            while stop is None or not stop.is_set():
+                self.step(idle_timeout)
+        finally:
+            self.source.close()
+
+    def step(self, idle_timeout: float = 1.0) -> None:
+        """Wait for changes once, and index pending changes if they are due."""
+        changes = self.source.poll(self._next_timeout(idle_timeout))
+        now = time.monotonic()
+        if changes:
+            self._pending.paths.update(changes.paths)
+            self._pending.rescan = self._pending.rescan or changes.rescan
+            self._first_change = self._first_change if self._first_change is not None else now
+            self._last_change = now
+        if self._is_due(now):
+            self._flush(now)
+
+    def _next_timeout(self, idle_timeout: float) -> float:
+        if not self._pending:
+            return idle_timeout
+        now = time.monotonic()
+        due = min(self._last_change + self.debounce_seconds, self._first_change + self.max_delay_seconds)
+        return max(min(max(due, self._not_before) - now, idle_timeout), 0)
+
+    def _is_due(self, now: float) -> bool:
+        if not self._pending or now < self._not_before:
+            return False
+        return (now - self._last_change >= self.debounce_seconds
+                or now - self._first_change >= self.max_delay_seconds)
+
+    def _flush(self, now: float) -> None:
+        pending = self._pending
+        try:
+            if pending.rescan:
+                logger.info("Rescanning vault")
+                self.zettelkasten.update_index(excerpt_size=self.excerpt_size, excerpt_overlap=self.excerpt_overlap)
+            else:
+                logger.info("Indexing changed documents", n_documents=len(pending.paths))
+                self.zettelkasten.update_documents(sorted(pending.paths), excerpt_size=self.excerpt_size,
+                                                   excerpt_overlap=self.excerpt_overlap)
+        except Exception as e:
+            logger.error("Indexing changes failed, will retry", error=str(e), retry_seconds=self.retry_seconds)
+            self._not_before = now + self.retry_seconds
+            return
+        self._pending = VaultChanges()
+        self._first_change = None
+        self._last_change = None
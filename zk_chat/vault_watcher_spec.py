@@ -0,0 +1,175 @@
+import os
+import shutil
+from unittest.mock import Mock
+
+import pytest
+
+from zk_chat.vault_watcher import InotifyChangeSource, PollingChangeSource, VaultChanges, VaultWatcher
+from zk_chat.zettelkasten import Zettelkasten
+
+
+@pytest.fixture
+def vault(tmp_path):
+    (tmp_path / "First.md").write_text("First note")
+    (tmp_path / ".zk_chat_db").mkdir()
+    return tmp_path
+
+
+class DescribePollingChangeSource:
+    """
+    Describes the PollingChangeSource which finds changed markdown files by comparing scans of the vault
+    """
+
+    def should_report_created_modified_and_deleted_markdown_files(self, vault):
+        source = PollingChangeSource(str(vault), interval=0)
+        (vault / "Second.md").write_text("Second note")
+        (vault / "First.md").write_text("First note, edited")
+        os.utime(vault / "First.md", (0, 0))
+
+        changes = source.poll(0)
+
+        assert changes.paths == {"First.md", "Second.md"}
+
+        (vault / "Second.md").unlink()
+
+        assert source.poll(0).paths == {"Second.md"}
+
+    def should_ignore_other_files_and_the_index_database(self, vault):
+        source = PollingChangeSource(str(vault), interval=0)
+        (vault / "image.png").write_bytes(b"png")
+        (vault / ".zk_chat_db" / "Notes.md").write_text("not a note")
+
+        assert not source.poll(0)
+
+    def should_ignore_files_excluded_by_zkchatignore(self, vault):
+        (vault / ".zkchatignore").write_text("drafts/\n")
+        (vault / "drafts").mkdir()
+        source = PollingChangeSource(str(vault), interval=0)
+        (vault / "drafts" / "Draft.md").write_text("Draft note")
+
+        assert not source.poll(0)
+
+    def should_not_scan_before_interval_elapses(self, vault):
+        source = PollingChangeSource(str(vault), interval=60)
+        (vault / "Second.md").write_text("Second note")
+
+        assert not source.poll(0)
+
+
+@pytest.mark.skipif(not InotifyChangeSource.is_available(), reason="inotify is not available")
+class DescribeInotifyChangeSource:
+    """
+    Describes the InotifyChangeSource which is told about changed markdown files by the kernel
+    """
+
+    def should_report_written_markdown_file(self, vault):
+        source = InotifyChangeSource(str(vault))
+        (vault / "Second.md").write_text("Second note")
+
+        assert source.poll(1).paths == {"Second.md"}
+        source.close()
+
+    def should_report_both_sides_of_a_move(self, vault):
+        source = InotifyChangeSource(str(vault))
+        (vault / "First.md").rename(vault / "Renamed.md")
+
+        assert source.poll(1).paths == {"First.md", "Renamed.md"}
+        source.close()
+
+    def should_watch_new_directories_and_report_their_files(self, vault):
+        source = InotifyChangeSource(str(vault))
+        (vault / "staging").mkdir()
+        (vault / "staging" / "Moved.md").write_text("Moved note")
+        shutil.move(str(vault / "staging"), str(vault / "topic"))
+        source.poll(1)
+
+        (vault / "topic" / "Later.md").write_text("Later note")
+
+        assert os.path.join("topic", "Later.md") in source.poll(1).paths
+        source.close()
+
+    def should_not_report_files_in_ignored_directories(self, vault):
+        (vault / ".zkchatignore").write_text("attachments/\n")
+        source = InotifyChangeSource(str(vault))
+        (vault / "attachments").mkdir()
+        (vault / "attachments" / "Export.md").write_text("Exported")
+
+        assert not source.poll(1).paths
+        source.close()
+
+    def should_request_rescan_when_directory_is_removed(self, vault):
+        (vault / "topic").mkdir()
+        (vault / "topic" / "Note.md").write_text("Note")
+        source = InotifyChangeSource(str(vault))
+
+        shutil.rmtree(vault / "topic")
+
+        assert source.poll(1).rescan
+        source.close()
+
+
+class DescribeVaultWatcher:
+    """
+    Describes the VaultWatcher which indexes changed notes once the vault is quiet
+    """
+
+    @pytest.fixture
+    def mock_source(self):
+        mock = Mock(spec=PollingChangeSource)
+        mock.poll.return_value = VaultChanges()
+        return mock
+
+    @pytest.fixture
+    def mock_zettelkasten(self):
+        return Mock(spec=Zettelkasten)
+
+    def should_wait_for_quiet_period_before_indexing(self, mock_source, mock_zettelkasten):
+        watcher = VaultWatcher(mock_zettelkasten, mock_source, debounce_seconds=60)
+        mock_source.poll.return_value = VaultChanges(paths={"First.md"})
+
+        watcher.step(0)
+
+        mock_zettelkasten.update_documents.assert_not_called()
+
+    def should_index_collected_changes_together(self, mock_source, mock_zettelkasten):
+        watcher = VaultWatcher(mock_zettelkasten, mock_source, excerpt_size=250, excerpt_overlap=50,
+                               debounce_seconds=0)
+        mock_source.poll.side_effect = [VaultChanges(paths={"b.md"}), VaultChanges(paths={"a.md"})]
+        watcher.debounce_seconds = 60
+        watcher.step(0)
+        watcher.debounce_seconds = 0
+
+        watcher.step(0)
+
+        mock_zettelkasten.update_documents.assert_called_once_with(["a.md", "b.md"], excerpt_size=250,
+                                                                   excerpt_overlap=50)
+
+    def should_rescan_vault_when_changes_were_lost(self, mock_source, mock_zettelkasten):
+        watcher = VaultWatcher(mock_zettelkasten, mock_source, debounce_seconds=0)
+        mock_source.poll.return_value = VaultChanges(rescan=True)
+
+        watcher.step(0)
+
+        mock_zettelkasten.update_index.assert_called_once()
+        mock_zettelkasten.update_documents.assert_not_called()
+
+    def should_keep_changes_and_wait_before_retrying_failed_indexing(self, mock_source, mock_zettelkasten):
+        watcher = VaultWatcher(mock_zettelkasten, mock_source, debounce_seconds=0, retry_seconds=60)
+        mock_zettelkasten.update_documents.side_effect = ConnectionError("ollama stopped")
+        mock_source.poll.side_effect = [VaultChanges(paths={"a.md"}), VaultChanges()]
+
+        watcher.step(0)
+        watcher.step(0)
+
+        assert mock_zettelkasten.update_documents.call_count == 1
+        assert watcher._pending.paths == {"a.md"}
+
+    def should_stop_when_stop_event_is_set(self, mock_source, mock_zettelkasten):
+        stop = Mock()
+        stop.is_set.side_effect = [False, True]
+        watcher = VaultWatcher(mock_zettelkasten, mock_source)
+
+        watcher.run(stop, idle_timeout=0)
+
+        mock_source.poll.assert_called_once()
+        mock_source.close.assert_called_once()
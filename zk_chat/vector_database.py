@@ -1,60 +1,259 @@
-from typing import List, Union
+from typing import List, Optional, Set
 
 import structlog
-# CollectionName import no longer needed in ChromaDB 1.1.0
-from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
 
 from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.embedding_gateway import EmbeddingGateway
+from zk_chat.lexical_index import LexicalIndex
 from zk_chat.models import VectorDocumentForStorage, VectorDocumentWithEmbeddings, QueryResult
-from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.query_embedding_cache import QueryEmbeddingCache
+from zk_chat.collection_pointers import VersionedCollections
 
 logger = structlog.get_logger()
 
+DELETE_BATCH_SIZE = 500
+
 class VectorDatabase:
 
-    chroma_gateway: ChromaGateway
-    gateway: Union[OllamaGateway, OpenAIGateway]
+    chroma_gateway: VersionedCollections
+    gateway: EmbeddingGateway
     collection_name: ZkCollectionName
+    batch_size: int
+    shadow: bool
+    query_cache: Optional[QueryEmbeddingCache]
+    lexical_index: Optional[LexicalIndex]
 
-    def __init__(self, chroma_gateway: ChromaGateway, gateway: Union[OllamaGateway, OpenAIGateway], collection_name: ZkCollectionName):
+    def __init__(self, chroma_gateway: VersionedCollections, gateway: EmbeddingGateway, collection_name: ZkCollectionName,
+                 batch_size: int = 32, shadow: bool = False, query_cache: Optional[QueryEmbeddingCache] = None,
+                 lexical_index: Optional[LexicalIndex] = None):
         """
-        Initialize the VectorDatabase with a ChromaGateway and a gateway for embeddings.
+        Initialize the VectorDatabase with a vector store gateway and a gateway for embeddings.
 
         Args:
-            chroma_gateway: The gateway to the Chroma vector database
-            gateway: The gateway for calculating embeddings (OllamaGateway or OpenAIGateway)
+            chroma_gateway: The gateway to the vector store, a ChromaGateway or NumpyVectorGateway
+            gateway: The gateway for calculating embeddings
             collection_name: The name of the collection to use
+            batch_size: The number of documents embedded per request to the embedding gateway
+            shadow: Use the shadow collection being rebuilt instead of the active one
+            query_cache: Optional cache of query embeddings, so repeated queries skip the embedding model
+            lexical_index: Optional BM25 index kept in step with every write, for ``query_lexical``
         """
         self.chroma_gateway = chroma_gateway
         self.gateway = gateway
         self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.shadow = shadow
+        self.query_cache = query_cache
+        self.lexical_index = lexical_index
+
+    def create_shadow(self) -> 'VectorDatabase':
+        """
+        Create an empty shadow copy of the collection to rebuild into, while queries keep using the active one.
+
+        Returns:
+            A VectorDatabase that reads and writes the shadow collection
+        """
+        self.chroma_gateway.create_shadow_collection(self.collection_name)
+        return VectorDatabase(self.chroma_gateway, self.gateway, self.collection_name, self.batch_size, shadow=True,
+                              query_cache=self.query_cache, lexical_index=self.lexical_index)
+
+    def resume_shadow(self) -> Optional['VectorDatabase']:
+        """
+        Reopen the shadow collection left by an interrupted rebuild, keeping what it already holds.
+
+        Returns:
+            A VectorDatabase that reads and writes the shadow collection, or None if no rebuild was in progress
+        """
+        if not self.chroma_gateway.has_shadow_collection(self.collection_name):
+            return None
+        return VectorDatabase(self.chroma_gateway, self.gateway, self.collection_name, self.batch_size, shadow=True,
+                              query_cache=self.query_cache, lexical_index=self.lexical_index)
+
+    def promote(self) -> None:
+        """
+        Make the shadow collections being rebuilt the active ones.
+
+        Every shadow collection of the same vector store gateway is promoted in one atomic step,
+        so excerpts and documents rebuilt together always switch together.
+        """
+        self.chroma_gateway.promote_shadow_collections()
+        if self.lexical_index is not None:
+            self.lexical_index.retain(self.collection_name.value,
+                                      {self.chroma_gateway.physical_collection_name(self.collection_name)})
+
+    def index_version(self) -> str:
+        """
+        Get a token that changes whenever the active collections of the vector store are written to.
+
+        Returns:
+            The vector store's current version token
+        """
+        return self.chroma_gateway.index_version()
 
     def add_documents(self, documents: List[VectorDocumentForStorage]) -> None:
         """
-        Add documents to the vector database.
+        Add documents to the vector database, embedding them in batches of ``batch_size``.
 
         Args:
             documents: The documents to add
         """
-        vector_docs = []
-        for doc in documents:
-            embedding = self.gateway.calculate_embeddings(doc.content)
-            vector_docs.append(VectorDocumentWithEmbeddings.from_document(doc, embedding))
+        self.add_documents_with_embeddings(self.embed_documents(documents))
+
+    def embed_documents(self, documents: List[VectorDocumentForStorage]) -> List[VectorDocumentWithEmbeddings]:
+        """
+        Calculate embeddings for documents in batches of ``batch_size``, without storing them.
+
+        Args:
+            documents: The documents to embed
+
+        Returns:
+            The documents with their embeddings, in the same order
+        """
+        embedded = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            embeddings = self.gateway.calculate_embeddings_batch([doc.content for doc in batch])
+            embedded.extend(
+                VectorDocumentWithEmbeddings.from_document(doc, embedding)
+                for doc, embedding in zip(batch, embeddings)
+            )
+        return embedded
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """
+        Delete documents from the vector database by id.
+
+        Args:
+            ids: The ids of the documents to delete
+        """
+        if ids:
+            self.chroma_gateway.delete_items(ids=ids, collection_name=self.collection_name, shadow=self.shadow)
+            if self.lexical_index is not None:
+                self.lexical_index.delete_documents(self._physical_name(), ids)
+
+    def delete_for_documents(self, document_ids: List[str]) -> None:
+        """
+        Delete every stored entry that belongs to the given source documents.
 
+        Args:
+            document_ids: Source document ids, matched against each entry's ``id`` metadata
+        """
+        for start in range(0, len(document_ids), DELETE_BATCH_SIZE):
+            batch = document_ids[start:start + DELETE_BATCH_SIZE]
+            self.chroma_gateway.delete_items(where={"id": {"$in": batch}}, collection_name=self.collection_name,
+                                             shadow=self.shadow)
+        if self.lexical_index is not None and document_ids:
+            self.lexical_index.delete_for_documents(self._physical_name(), document_ids)
+
+    def get_for_document(self, document_id: str) -> List[VectorDocumentWithEmbeddings]:
+        """
+        Get the stored entries of a source document, including their embeddings.
+
+        Args:
+            document_id: Source document id, matched against each entry's ``id`` metadata
+
+        Returns:
+            The stored entries with their embeddings
+        """
+        results = self.chroma_gateway.get_items(
+            where={"id": document_id},
+            include=["documents", "metadatas", "embeddings"],
+            collection_name=self.collection_name,
+            shadow=self.shadow
+        )
+        return [
+            VectorDocumentWithEmbeddings(
+                id=results['ids'][i],
+                content=results['documents'][i],
+                metadata=results['metadatas'][i],
+                embedding=list(results['embeddings'][i])
+            )
+            for i in range(len(results['ids']))
+        ]
+
+    def get_indexed_document_ids(self) -> Set[str]:
+        """
+        Get the ids of all source documents with entries in the vector database.
+
+        Returns:
+            The distinct ``id`` metadata values of all stored entries
+        """
+        results = self.chroma_gateway.get_items(include=["metadatas"], collection_name=self.collection_name,
+                                                shadow=self.shadow)
+        return {metadata['id'] for metadata in results['metadatas'] if metadata and 'id' in metadata}
+
+    def count(self) -> int:
+        """
+        Count the entries in the vector database.
+
+        Returns:
+            The number of stored vectors
+        """
+        return self.chroma_gateway.count_items(collection_name=self.collection_name, shadow=self.shadow)
+
+    def add_documents_with_embeddings(self, documents: List[VectorDocumentWithEmbeddings]) -> None:
+        """
+        Store documents whose embeddings are already known, without calling the embedding gateway.
+
+        Args:
+            documents: The documents to store
+        """
+        if not documents:
+            return
         self.chroma_gateway.add_items(
-            ids=[doc.id for doc in vector_docs],
-            documents=[doc.content for doc in vector_docs],
-            metadatas=[doc.metadata for doc in vector_docs],
-            embeddings=[doc.embedding for doc in vector_docs],
-            collection_name=self.collection_name
+            ids=[doc.id for doc in documents],
+            documents=[doc.content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            embeddings=[doc.embedding for doc in documents],
+            collection_name=self.collection_name,
+            shadow=self.shadow
         )
+        if self.lexical_index is not None:
+            self.lexical_index.add_documents(self._physical_name(), documents)
 
     def reset(self) -> None:
         """
         Reset the vector database.
         """
+        if self.lexical_index is not None:
+            self.lexical_index.reset(self.chroma_gateway.physical_collection_name(self.collection_name))
         self.chroma_gateway.reset_indexes(collection_name=self.collection_name)
 
+    def sync_lexical_index(self) -> None:
+        """
+        Build the lexical index from the stored entries if it is empty, e.g. for an index built before it existed.
+        """
+        if self.lexical_index is None or self.lexical_index.count(self._physical_name()) > 0:
+            return
+        results = self.chroma_gateway.get_items(include=["documents", "metadatas"], collection_name=self.collection_name,
+                                                shadow=self.shadow)
+        if not results['ids']:
+            return
+        logger.info("Building lexical index from stored entries", n_entries=len(results['ids']))
+        self.lexical_index.add_documents(self._physical_name(), [
+            VectorDocumentForStorage(id=results['ids'][i], content=results['documents'][i],
+                                     metadata=results['metadatas'][i] or {})
+            for i in range(len(results['ids']))
+        ])
+
+    def query_lexical(self, query_text: str, n_results: int) -> List[QueryResult]:
+        """
+        Query the lexical index by BM25 over the terms of the query, without embedding it.
+
+        Args:
+            query_text: The text to query with
+            n_results: The number of results to return
+
+        Returns:
+            A list of query results, empty without a lexical index
+        """
+        if self.lexical_index is None:
+            return []
+        return self.lexical_index.query(self._physical_name(), query_text, n_results)
+
+    def _physical_name(self) -> str:
+        return self.chroma_gateway.physical_collection_name(self.collection_name, self.shadow)
+
     def query(self, query_text: str, n_results: int) -> List[QueryResult]:
         """
         Query the vector database.
@@ -66,24 +265,69 @@ class VectorDatabase:
         Returns:
             A list of query results
         """
-        query_embedding = self.gateway.calculate_embeddings(query_text)
+        if self.query_cache is not None:
+            query_embedding = self.query_cache.get_embedding(self.gateway, query_text)
+        else:
+            query_embedding = self.gateway.calculate_embeddings(query_text)
 
         results = self.chroma_gateway.query(
             query_embeddings=query_embedding,
             n_results=n_results,
-            collection_name=self.collection_name
+            collection_name=self.collection_name,
+            shadow=self.shadow
+        )
+
+        query_results = self._parse_query_results(results, 0)
+        self._log_query_results(query_text, query_results)
+        return query_results
+
+    def query_many(self, query_texts: List[str], n_results: int) -> List[List[QueryResult]]:
+        """
+        Query the vector database with several queries, embedding them in one batch and searching in one request.
+
+        Args:
+            query_texts: The texts to query with
+            n_results: The number of results to return for each query
+
+        Returns:
+            A list of query results for each query text, in the same order
+        """
+        if not query_texts:
+            return []
+        if self.query_cache is not None:
+            query_embeddings = self.query_cache.get_embeddings(self.gateway, query_texts)
+        else:
+            query_embeddings = self.gateway.calculate_embeddings_batch(query_texts)
+
+        results = self.chroma_gateway.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            collection_name=self.collection_name,
+            shadow=self.shadow
         )
 
+        grouped_results = []
+        for i, query_text in enumerate(query_texts):
+            query_results = self._parse_query_results(results, i)
+            self._log_query_results(query_text, query_results)
+            grouped_results.append(query_results)
+        return grouped_results
+
+    @staticmethod
+    def _parse_query_results(results, query_index: int) -> List[QueryResult]:
         query_results = []
-        for i in range(len(results['ids'][0])):
+        for i in range(len(results['ids'][query_index])):
             doc = VectorDocumentForStorage(
-                id=results['ids'][0][i],
-                content=results['documents'][0][i],
-                metadata=results['metadatas'][0][i]
+                id=results['ids'][query_index][i],
+                content=results['documents'][query_index][i],
+                metadata=results['metadatas'][query_index][i]
             )
-            distance = results['distances'][0][i]
+            distance = results['distances'][query_index][i]
             query_results.append(QueryResult(document=doc, distance=distance))
+        return query_results
 
+    @staticmethod
+    def _log_query_results(query_text: str, query_results: List[QueryResult]) -> None:
         logger.info(
             "Vector query results",
             extra = {
@@ -93,5 +337,3 @@ class VectorDatabase:
                 "max_distance": max(r.distance for r in query_results) if query_results else None
             }
         )
-
-        return query_results
@@ -0,0 +1,152 @@
+from unittest.mock import Mock
+
+import pytest
+
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.chroma_gateway import ChromaGateway
+from zk_chat.embedding_gateway import EmbeddingGateway
+from zk_chat.lexical_index import LexicalIndex
+from zk_chat.models import VectorDocumentForStorage
+from zk_chat.query_embedding_cache import QueryEmbeddingCache
+from zk_chat.vector_database import VectorDatabase
+
+
+@pytest.fixture
+def mock_chroma_gateway():
+    return Mock(spec=ChromaGateway)
+
+
+@pytest.fixture
+def mock_embedding_gateway():
+    mock = Mock(spec=EmbeddingGateway)
+    mock.calculate_embeddings_batch.side_effect = lambda texts: [[float(len(text))] for text in texts]
+    return mock
+
+
+@pytest.fixture
+def vector_db(mock_chroma_gateway, mock_embedding_gateway):
+    return VectorDatabase(mock_chroma_gateway, mock_embedding_gateway, ZkCollectionName.EXCERPTS, batch_size=2)
+
+
+def make_documents(count: int):
+    return [
+        VectorDocumentForStorage(id=f"id-{i}", content=f"content {i}", metadata={"id": f"doc-{i}"})
+        for i in range(count)
+    ]
+
+
+class DescribeVectorDatabase:
+    """
+    Describes the VectorDatabase which embeds documents and stores them in a Chroma collection
+    """
+
+    def should_embed_documents_in_batches(self, vector_db, mock_embedding_gateway):
+        vector_db.add_documents(make_documents(3))
+
+        assert mock_embedding_gateway.calculate_embeddings_batch.call_count == 2
+
+    def should_store_embedded_documents_in_one_upsert(self, vector_db, mock_chroma_gateway):
+        vector_db.add_documents(make_documents(3))
+
+        mock_chroma_gateway.add_items.assert_called_once()
+        assert mock_chroma_gateway.add_items.call_args.kwargs["ids"] == ["id-0", "id-1", "id-2"]
+
+    def should_embed_documents_without_storing_them(self, vector_db, mock_chroma_gateway):
+        embedded = vector_db.embed_documents(make_documents(3))
+
+        assert [doc.embedding for doc in embedded] == [[9.0], [9.0], [9.0]]
+        mock_chroma_gateway.add_items.assert_not_called()
+
+    def should_delete_entries_of_source_documents_by_metadata(self, vector_db, mock_chroma_gateway):
+        vector_db.delete_for_documents(["a.md", "b.md"])
+
+        mock_chroma_gateway.delete_items.assert_called_once_with(
+            where={"id": {"$in": ["a.md", "b.md"]}},
+            collection_name=ZkCollectionName.EXCERPTS,
+            shadow=False
+        )
+
+    def should_list_indexed_source_document_ids(self, vector_db, mock_chroma_gateway):
+        mock_chroma_gateway.get_items.return_value = {
+            "ids": ["a#0", "a#1", "b#0"],
+            "metadatas": [{"id": "a.md"}, {"id": "a.md"}, {"id": "b.md"}]
+        }
+
+        document_ids = vector_db.get_indexed_document_ids()
+
+        assert document_ids == {"a.md", "b.md"}
+
+    def should_write_to_shadow_collection_it_creates(self, vector_db, mock_chroma_gateway):
+        shadow_db = vector_db.create_shadow()
+
+        shadow_db.delete_documents(["id-0"])
+
+        mock_chroma_gateway.create_shadow_collection.assert_called_once_with(ZkCollectionName.EXCERPTS)
+        mock_chroma_gateway.delete_items.assert_called_once_with(
+            ids=["id-0"], collection_name=ZkCollectionName.EXCERPTS, shadow=True
+        )
+
+    def should_promote_shadow_collections_through_gateway(self, vector_db, mock_chroma_gateway):
+        vector_db.create_shadow().promote()
+
+        mock_chroma_gateway.promote_shadow_collections.assert_called_once()
+
+    def should_count_entries_through_gateway(self, vector_db, mock_chroma_gateway):
+        mock_chroma_gateway.count_items.return_value = 7
+
+        assert vector_db.count() == 7
+        mock_chroma_gateway.count_items.assert_called_once_with(collection_name=ZkCollectionName.EXCERPTS, shadow=False)
+
+    def should_embed_repeated_query_once_with_query_cache(self, mock_chroma_gateway, mock_embedding_gateway):
+        mock_embedding_gateway.model_key = "model"
+        mock_embedding_gateway.calculate_embeddings.return_value = [1.0]
+        mock_chroma_gateway.query.return_value = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        vector_db = VectorDatabase(mock_chroma_gateway, mock_embedding_gateway, ZkCollectionName.EXCERPTS,
+                                   query_cache=QueryEmbeddingCache())
+
+        vector_db.query("zettelkasten", n_results=3)
+        vector_db.query("zettelkasten", n_results=3)
+
+        mock_embedding_gateway.calculate_embeddings.assert_called_once_with("zettelkasten")
+        assert mock_chroma_gateway.query.call_count == 2
+
+    def should_search_several_queries_in_one_request(self, vector_db, mock_chroma_gateway,
+                                                     mock_embedding_gateway):
+        mock_chroma_gateway.query.return_value = {
+            "ids": [["a"], ["b", "c"]],
+            "documents": [["A"], ["B", "C"]],
+            "metadatas": [[{}], [{}, {}]],
+            "distances": [[0.1], [0.2, 0.3]]
+        }
+
+        results = vector_db.query_many(["first", "second"], n_results=2)
+
+        assert [[result.document.id for result in group] for group in results] == [["a"], ["b", "c"]]
+        mock_embedding_gateway.calculate_embeddings_batch.assert_called_once_with(["first", "second"])
+        mock_chroma_gateway.query.assert_called_once_with(
+            query_embeddings=[[5.0], [6.0]], n_results=2, collection_name=ZkCollectionName.EXCERPTS, shadow=False
+        )
+
+    def should_mirror_writes_into_lexical_index(self, mock_chroma_gateway, mock_embedding_gateway, tmp_path):
+        mock_chroma_gateway.physical_collection_name.return_value = "excerpts"
+        lexical_index = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+        vector_db = VectorDatabase(mock_chroma_gateway, mock_embedding_gateway, ZkCollectionName.EXCERPTS,
+                                   lexical_index=lexical_index)
+
+        vector_db.add_documents(make_documents(3))
+        vector_db.delete_for_documents(["doc-1"])
+
+        assert [result.document.id for result in vector_db.query_lexical("content", n_results=5)] == ["id-0", "id-2"]
+
+    def should_build_empty_lexical_index_from_stored_entries(self, mock_chroma_gateway, mock_embedding_gateway,
+                                                             tmp_path):
+        mock_chroma_gateway.physical_collection_name.return_value = "excerpts"
+        mock_chroma_gateway.get_items.return_value = {
+            "ids": ["a#0"], "documents": ["stored text"], "metadatas": [{"id": "a.md"}]
+        }
+        vector_db = VectorDatabase(mock_chroma_gateway, mock_embedding_gateway, ZkCollectionName.EXCERPTS,
+                                   lexical_index=LexicalIndex(str(tmp_path / "lexical.sqlite3")))
+
+        vector_db.sync_lexical_index()
+
+        assert [result.document.id for result in vector_db.query_lexical("stored", n_results=5)] == ["a#0"]
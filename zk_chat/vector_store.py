@@ -0,0 +1,22 @@
+from zk_chat.config import Config, VectorStore
+
+
+def create_vector_gateway(config: Config, db_dir: str):
+    """
+    Open the vector store selected by the vault's configuration.
+
+    Each store is imported only when selected, so the NumPy store opens without loading Chroma.
+
+    Args:
+        config: The vault configuration
+        db_dir: The directory where the vector database is stored
+
+    Returns:
+        A NumpyVectorGateway or a ChromaGateway, which share the same interface
+    """
+    if config.vector_store == VectorStore.NUMPY:
+        from zk_chat.numpy_vector_gateway import NumpyVectorGateway
+        return NumpyVectorGateway(config.gateway, db_dir=db_dir, precision=config.vector_precision)
+
+    from zk_chat.chroma_gateway import ChromaGateway
+    return ChromaGateway(config.gateway, db_dir=db_dir)
@@ -1,19 +1,41 @@
 import hashlib
+import json
+import os
+import time
 from datetime import datetime
-from typing import List, Iterator, Any, Optional, Callable
+from functools import partial
+from typing import List, Iterator, Any, Optional, Callable, Tuple
 
 import structlog
 import yaml
 from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.config import ChunkingStrategy, DocumentVectorStrategy, RetrievalMode, VectorStore
+from zk_chat.document_cache import DocumentCache, shared_document_cache
+from zk_chat.index_manifest import IndexManifest, IndexedFile, get_rebuild_checkpoint_path, hash_content
+from zk_chat.index_plan import IndexPlan, PlannedFile
+from zk_chat.indexing_pipeline import EmbeddedWork, IndexingPipeline, IndexingWork, PreparedDocument
+from zk_chat.indexing_stats import IndexRunReport, IndexStats, IndexingStats, get_index_run_report_path, \
+    get_index_stats_path
 from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
 from zk_chat.models import ZkDocument, ZkDocumentExcerpt, ZkQueryExcerptResult, VectorDocumentForStorage, \
-    ZkQueryDocumentResult, QueryResult
-from zk_chat.rag.splitter import split_tokens
+    ZkQueryDocumentResult, QueryResult, VectorDocumentWithEmbeddings
+from zk_chat.query_result_cache import QueryResultCache
+from zk_chat.rag.passages import merge_adjacent_excerpts, remove_near_duplicates
+from zk_chat.rag.rank_fusion import reciprocal_rank_fusion
+from zk_chat.rag.pooling import pool_embeddings
+from zk_chat.rag.splitter import split_markdown, split_tokens
 from zk_chat.vector_database import VectorDatabase
 
 logger = structlog.get_logger()
 
+# Candidates taken from each of the vector and lexical searches per hybrid result, so fusion has depth to work with
+HYBRID_CANDIDATES_PER_RESULT = 2
+
+# Most passes made over the vault after a rebuild to pick up notes edited, moved or deleted while it ran
+REBUILD_CATCH_UP_PASSES = 3
+
 # Type alias for progress callback functions
 ProgressCallback = Callable[[str, int, int], None]
 
@@ -23,14 +45,38 @@ class Zettelkasten:
     Manages a Zettelkasten (note-taking system) with vector database integration.
 
     This class provides functionality for reading, writing, and querying Zettelkasten documents,
-    as well as indexing document content for vector search capabilities.
+    as well as indexing document content for vector search capabilities. With a manifest path,
+    updates only re-embed notes whose content changed, and the index is rebuilt when the way notes
+    are chunked, embedded or stored changes.
     """
     def __init__(self, tokenizer_gateway: TokenizerGateway, excerpts_db: VectorDatabase,
-                 documents_db: VectorDatabase, filesystem_gateway: MarkdownFilesystemGateway):
+                 documents_db: VectorDatabase, filesystem_gateway: MarkdownFilesystemGateway,
+                 manifest_path: Optional[str] = None, indexing_workers: int = 1, embedding_concurrency: int = 1,
+                 checkpoint_interval: int = 100, chunking: ChunkingStrategy = ChunkingStrategy.MARKDOWN,
+                 document_vectors: DocumentVectorStrategy = DocumentVectorStrategy.FULL_TEXT,
+                 result_cache_size: int = 128, retrieval_mode: RetrievalMode = RetrievalMode.VECTOR,
+                 document_cache: Optional[DocumentCache] = None, merge_excerpts: bool = True,
+                 embedding_format: Optional[str] = None, vector_store: Optional[VectorStore] = None):
         self.tokenizer_gateway: TokenizerGateway = tokenizer_gateway
         self.excerpts_db: VectorDatabase = excerpts_db
         self.documents_db: VectorDatabase = documents_db
         self.filesystem_gateway: MarkdownFilesystemGateway = filesystem_gateway
+        self.manifest_path: Optional[str] = manifest_path
+        self.indexing_workers: int = indexing_workers
+        self.embedding_concurrency: int = embedding_concurrency
+        self.checkpoint_interval: int = checkpoint_interval
+        self.chunking: ChunkingStrategy = chunking
+        self.document_vectors: DocumentVectorStrategy = document_vectors
+        self.indexing_stats: Optional[IndexingStats] = None
+        self.last_run: Optional[IndexRunReport] = None
+        self.result_cache: Optional[QueryResultCache] = \
+            QueryResultCache(result_cache_size) if result_cache_size > 0 else None
+        self.retrieval_mode: RetrievalMode = retrieval_mode
+        self.merge_excerpts: bool = merge_excerpts
+        self.embedding_format: Optional[str] = embedding_format
+        self.vector_store: Optional[VectorStore] = vector_store
+        self.document_cache: DocumentCache = \
+            document_cache if document_cache is not None else shared_document_cache()
 
     def _iterate_markdown_files(self) -> Iterator[str]:
         """Yields relative paths for all markdown files in the zk"""
@@ -43,14 +89,24 @@ class Zettelkasten:
         return self.file_exists(relative_path)
 
     def read_document(self, relative_path: str) -> ZkDocument:
+        """Read and parse a note, from ``document_cache`` while its modification time and size are unchanged."""
+        key = self._document_cache_key(relative_path)
+        signature = self.filesystem_gateway.get_file_signature(relative_path)
+        document = self.document_cache.get(key, signature)
+        if document is not None:
+            return document
         (metadata, content) = self.filesystem_gateway.read_markdown(relative_path)
         document = ZkDocument(
             relative_path=relative_path,
             metadata=metadata,
             content=content
         )
+        self.document_cache.put(key, signature, document)
         return document
 
+    def _document_cache_key(self, relative_path: str) -> Tuple[str, str]:
+        return self.filesystem_gateway.root_path, relative_path
+
     def create_or_append_document(self, document: ZkDocument) -> None:
         if self.document_exists(document.relative_path):
             self.append_to_document(document)
@@ -77,6 +133,7 @@ class Zettelkasten:
             logger.debug("Writing document", path=document.relative_path)
             try:
                 self.filesystem_gateway.write_markdown(document.relative_path, document.metadata, document.content)
+                self.document_cache.invalidate(self._document_cache_key(document.relative_path))
                 logger.info("Document written successfully", path=document.relative_path)
             except yaml.YAMLError as e:
                 logger.error("Failed to serialize document metadata",
@@ -95,71 +152,697 @@ class Zettelkasten:
             yield self.read_document(relative_path)
 
     def reindex(self, excerpt_size: int = 500, excerpt_overlap: int = 100,
-                progress_callback: Optional[ProgressCallback] = None) -> None:
+                progress_callback: Optional[ProgressCallback] = None, resume: bool = False) -> None:
         """Reindex all documents in the Zettelkasten.
 
+        The index is rebuilt into shadow collections, so queries keep using the current index until
+        the rebuild completes and the shadow collections are promoted. Indexed files are checkpointed
+        every ``checkpoint_interval`` documents, so an interrupted rebuild can be resumed.
+
+        Notes written, moved or deleted while the rebuild runs only reach the active collections, so before
+        promoting, the vault is compared with the rebuild's manifest again and those changes are applied to
+        the shadow collections too.
+
         Args:
             excerpt_size: Size of text excerpts for indexing
             excerpt_overlap: Overlap between excerpts
             progress_callback: Optional callback for progress updates (filename, processed_count, total_count)
+            resume: Continue an interrupted rebuild from its last checkpoint instead of starting over
         """
-        self.excerpts_db.reset()
-        self.documents_db.reset()
-
         # Collect all files first to get accurate count for progress
         all_files = list(self._iterate_markdown_files())
-        total_files = len(all_files)
-
-        logger.info("Starting reindex", total_files=total_files)
-
-        for i, relative_path in enumerate(all_files):
-            if progress_callback:
-                progress_callback(relative_path, i + 1, total_files)
-
-            self._index_document(relative_path, excerpt_size, excerpt_overlap)
-
-        logger.info("Reindex completed", processed_files=total_files)
+        checkpoint_path = self._rebuild_checkpoint_path()
+
+        rebuild = self._resume_rebuild(excerpt_size, excerpt_overlap) if resume else None
+        if rebuild is not None:
+            manifest, excerpts_db, documents_db = rebuild
+            logger.info("Resuming reindex", completed_files=len(manifest.files))
+            processed_files = self._catch_up_rebuild(manifest, excerpt_size, excerpt_overlap, progress_callback,
+                                                     excerpts_db, documents_db, checkpoint_path, operation="resume")
+        else:
+            excerpts_db = self.excerpts_db.create_shadow()
+            documents_db = self.documents_db.create_shadow()
+            manifest = self._create_manifest(excerpt_size, excerpt_overlap)
+            logger.info("Starting reindex", total_files=len(all_files))
+            self._index_files(all_files, manifest, excerpt_size, excerpt_overlap, progress_callback,
+                              excerpts_db, documents_db, checkpoint_path, operation="reindex", empty_collections=True)
+            processed_files = len(all_files)
+
+        processed_files += self._catch_up_rebuild(manifest, excerpt_size, excerpt_overlap, progress_callback,
+                                                  excerpts_db, documents_db, checkpoint_path, operation="catch_up")
+        excerpts_db.promote()
+        documents_db.promote()
+        if self.manifest_path is not None:
+            manifest.save(self.manifest_path)
+        self._save_index_stats(manifest, stale_files=0)
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        logger.info("Reindex completed", processed_files=processed_files)
+
+    def _catch_up_rebuild(self, manifest: IndexManifest, excerpt_size: int, excerpt_overlap: int,
+                          progress_callback: Optional[ProgressCallback], excerpts_db: VectorDatabase,
+                          documents_db: VectorDatabase, checkpoint_path: Optional[str], operation: str) -> int:
+        """Bring shadow collections up to date with the vault, repeating while notes keep changing under the rebuild.
 
-    def update_index(self, since: datetime, excerpt_size: int = 500, excerpt_overlap: int = 100,
+        Returns:
+            The number of files indexed
+        """
+        processed_files = 0
+        for _ in range(REBUILD_CATCH_UP_PASSES):
+            all_files = list(self._iterate_markdown_files())
+            removed_files = sorted(set(manifest.files) - set(all_files))
+            files_to_process = [
+                relative_path for relative_path in all_files if self._content_changed(relative_path, manifest, None)
+            ]
+            if not removed_files and not files_to_process:
+                break
+            logger.info("Catching up rebuild with vault changes", operation=operation,
+                        removed_files=len(removed_files), changed_files=len(files_to_process))
+            if removed_files:
+                excerpts_db.delete_for_documents(removed_files)
+                documents_db.delete_for_documents(removed_files)
+                for relative_path in removed_files:
+                    del manifest.files[relative_path]
+            if files_to_process:
+                self._index_files(files_to_process, manifest, excerpt_size, excerpt_overlap, progress_callback,
+                                  excerpts_db, documents_db, checkpoint_path, operation=operation)
+                processed_files += len(files_to_process)
+        return processed_files
+
+    def _resume_rebuild(self, excerpt_size: int,
+                        excerpt_overlap: int) -> Optional[Tuple[IndexManifest, VectorDatabase, VectorDatabase]]:
+        """Reopen an interrupted rebuild's checkpoint and shadow collections, if they can be continued."""
+        checkpoint_path = self._rebuild_checkpoint_path()
+        checkpoint = IndexManifest.load(checkpoint_path) if checkpoint_path is not None else None
+        if not self._manifest_matches(checkpoint, excerpt_size, excerpt_overlap):
+            logger.info("No resumable reindex checkpoint found, starting over")
+            return None
+        excerpts_db = self.excerpts_db.resume_shadow()
+        documents_db = self.documents_db.resume_shadow()
+        if excerpts_db is None or documents_db is None:
+            logger.info("Interrupted reindex left no shadow collections, starting over")
+            return None
+        return checkpoint, excerpts_db, documents_db
+
+    def _create_manifest(self, excerpt_size: int, excerpt_overlap: int) -> IndexManifest:
+        manifest = IndexManifest(excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap, chunking=self.chunking,
+                                 document_vectors=self.document_vectors, embedding_format=self.embedding_format)
+        if self.vector_store is not None:
+            manifest.vector_store = self.vector_store
+        return manifest
+
+    def _create_adopted_manifest(self, excerpt_size: int, excerpt_overlap: int) -> IndexManifest:
+        """
+        Describe an index built before manifests existed, whose excerpts are token windows in Chroma and whose vectors
+        came from the single-text endpoints, so it is rebuilt when this index chunks, embeds or stores notes differently.
+        """
+        manifest = self._create_manifest(excerpt_size, excerpt_overlap)
+        manifest.chunking = ChunkingStrategy.TOKENS
+        manifest.document_vectors = DocumentVectorStrategy.FULL_TEXT
+        manifest.embedding_format = None
+        manifest.vector_store = VectorStore.CHROMA
+        return manifest
+
+    def _manifest_matches(self, manifest: Optional[IndexManifest], excerpt_size: int, excerpt_overlap: int) -> bool:
+        """Check that a manifest exists and was built with the same chunking, embeddings and store as this index."""
+        return self._rebuild_reason(manifest, excerpt_size, excerpt_overlap) is None
+
+    def _rebuild_reason(self, manifest: Optional[IndexManifest], excerpt_size: int,
+                        excerpt_overlap: int) -> Optional[str]:
+        if manifest is None:
+            return "no index manifest"
+        if not manifest.matches_parameters(excerpt_size, excerpt_overlap, self.chunking, self.document_vectors):
+            return "chunking parameters changed"
+        if not manifest.matches_embedding_format(self.embedding_format):
+            return "embedding model changed"
+        if not manifest.matches_vector_store(self.vector_store):
+            return "vector store changed"
+        return None
+
+    def _rebuild_checkpoint_path(self) -> Optional[str]:
+        if self.manifest_path is None:
+            return None
+        return get_rebuild_checkpoint_path(self.manifest_path)
+
+    def update_index(self, since: Optional[datetime] = None, excerpt_size: int = 500, excerpt_overlap: int = 100,
                      progress_callback: Optional[ProgressCallback] = None) -> None:
-        """Update the index for documents modified since a given date.
+        """Update the index for documents whose content changed since they were last indexed.
+
+        Files are compared against the index manifest by size and modification time, and by content
+        hash when those differ. If the manifest was built with different chunking parameters the whole
+        index is rebuilt.
 
         Args:
-            since: Only reindex documents modified after this date
+            since: When no manifest exists yet, files modified before this date are assumed to be indexed
             excerpt_size: Size of text excerpts for indexing
             excerpt_overlap: Overlap between excerpts
             progress_callback: Optional callback for progress updates (filename, processed_count, total_count)
         """
+        manifest = self._load_manifest()
+        adopting = manifest is None
+        if adopting:
+            manifest = self._create_adopted_manifest(excerpt_size, excerpt_overlap)
+        if not self._manifest_matches(manifest, excerpt_size, excerpt_overlap):
+            logger.info("Index parameters changed, rebuilding index",
+                        reason=self._rebuild_reason(manifest, excerpt_size, excerpt_overlap),
+                        previous_embedding_format=manifest.embedding_format, embedding_format=self.embedding_format,
+                        previous_vector_store=manifest.vector_store.value,
+                        vector_store=self.vector_store.value if self.vector_store else None,
+                        previous_excerpt_size=manifest.excerpt_size, previous_excerpt_overlap=manifest.excerpt_overlap,
+                        previous_chunking=manifest.chunking.value,
+                        previous_document_vectors=manifest.document_vectors.value, excerpt_size=excerpt_size,
+                        excerpt_overlap=excerpt_overlap, chunking=self.chunking.value,
+                        document_vectors=self.document_vectors.value)
+            self.reindex(excerpt_size, excerpt_overlap, progress_callback)
+            return
+
+        self.excerpts_db.sync_lexical_index()
+
         # Pre-scan to find files that need reindexing
-        files_to_process = []
-        for relative_path in self._iterate_markdown_files():
-            if self._needs_reindex(relative_path, since):
-                files_to_process.append(relative_path)
+        all_files = list(self._iterate_markdown_files())
+        files_to_process = [
+            relative_path for relative_path in all_files
+            if self._content_changed(relative_path, manifest, since if adopting else None)
+        ]
+
+        removed_files = sorted(set(manifest.files) - set(all_files))
+        if removed_files:
+            logger.info("Removing deleted documents from index", n_documents=len(removed_files))
+            self._remove_from_index(removed_files)
+            for relative_path in removed_files:
+                del manifest.files[relative_path]
+        if adopting:
+            self.remove_orphaned_documents(all_files)
 
         total_files = len(files_to_process)
         logger.info("Starting incremental update", total_files=total_files, since=since)
 
-        for i, relative_path in enumerate(files_to_process):
-            if progress_callback:
-                progress_callback(relative_path, i + 1, total_files)
-
-            self._index_document(relative_path, excerpt_size, excerpt_overlap)
+        self._index_files(files_to_process, manifest, excerpt_size, excerpt_overlap, progress_callback,
+                          self.excerpts_db, self.documents_db, self.manifest_path, operation="update")
+        self._save_manifest(manifest)
+        self._save_index_stats(manifest, stale_files=0)
 
         logger.info("Incremental update completed", processed_files=total_files)
 
+    def update_documents(self, relative_paths: List[str], excerpt_size: int = 500, excerpt_overlap: int = 100,
+                         progress_callback: Optional[ProgressCallback] = None) -> None:
+        """Update the index for specific files, such as those a file watcher saw change, without scanning the vault.
+
+        Files that no longer exist are removed from the index. When a removed file reappears under a new
+        path in the same update with identical content, its vectors are moved instead of re-embedded.
+
+        Args:
+            relative_paths: Relative paths of the files that were created, modified, moved or deleted
+            excerpt_size: Size of text excerpts for indexing
+            excerpt_overlap: Overlap between excerpts
+            progress_callback: Optional callback for progress updates (filename, processed_count, total_count)
+        """
+        manifest = self._load_manifest()
+        if not self._manifest_matches(manifest, excerpt_size, excerpt_overlap):
+            self.update_index(excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap,
+                              progress_callback=progress_callback)
+            return
+
+        existing = [relative_path for relative_path in relative_paths if self.file_exists(relative_path)]
+        removed = [
+            relative_path for relative_path in relative_paths
+            if relative_path in manifest.files and not self.file_exists(relative_path)
+        ]
+
+        for source_path, target_path in self._find_moves(removed, existing, manifest):
+            self._move_in_index(source_path, target_path, manifest)
+            removed.remove(source_path)
+
+        if removed:
+            logger.info("Removing deleted documents from index", n_documents=len(removed))
+            self._remove_from_index(removed)
+            for relative_path in removed:
+                del manifest.files[relative_path]
+
+        files_to_process = [
+            relative_path for relative_path in existing if self._content_changed(relative_path, manifest, None)
+        ]
+        self._index_files(files_to_process, manifest, excerpt_size, excerpt_overlap, progress_callback,
+                          self.excerpts_db, self.documents_db, self.manifest_path, operation="update_documents")
+        self._save_manifest(manifest)
+        self._save_index_stats(manifest)
+
+        logger.info("Documents updated", indexed_files=len(files_to_process), removed_files=len(removed))
+
+    def plan_update(self, since: Optional[datetime] = None, excerpt_size: int = 500, excerpt_overlap: int = 100,
+                    full: bool = False) -> IndexPlan:
+        """Work out what an index update would do, without embedding anything or changing the index.
+
+        Files are compared against the manifest as ``update_index`` compares them, then the files to be
+        indexed are read and split, and the excerpts and documents that would be embedded are counted
+        in tokens, so the cost of the update can be estimated before running it.
+
+        Args:
+            since: When no manifest exists yet, files modified before this date are assumed to be indexed
+            excerpt_size: Size of text excerpts for indexing
+            excerpt_overlap: Overlap between excerpts
+            full: Plan a full reindex instead of an incremental update
+
+        Returns:
+            The files that would be added, changed and removed, with what would be embedded for each
+        """
+        manifest = self._load_manifest()
+        reason = None
+        if full:
+            reason = "full reindex requested"
+        adopting = manifest is None
+        if adopting:
+            manifest = self._create_adopted_manifest(excerpt_size, excerpt_overlap)
+        if reason is None:
+            reason = self._rebuild_reason(manifest, excerpt_size, excerpt_overlap)
+        indexed_files = set(manifest.files)
+
+        all_files = list(self._iterate_markdown_files())
+        if reason is not None:
+            files_to_process = all_files
+        else:
+            files_to_process = [
+                relative_path for relative_path in all_files
+                if self._content_changed(relative_path, manifest, since if adopting else None)
+            ]
+
+        plan = IndexPlan(full_rebuild=reason is not None, reason=reason,
+                         removed=sorted(indexed_files - set(all_files)),
+                         unchanged=len(all_files) - len(files_to_process))
+        for relative_path in files_to_process:
+            prepared = self._prepare_document(relative_path, excerpt_size, excerpt_overlap)
+            previous = manifest.files.get(relative_path) if reason is None else None
+            planned = self._plan_embedding(self._plan_indexing(prepared, previous))
+            (plan.changed if relative_path in indexed_files else plan.added).append(planned)
+
+        logger.info("Planned index update", full_rebuild=plan.full_rebuild, added=len(plan.added),
+                    changed=len(plan.changed), removed=len(plan.removed), excerpts=plan.excerpts, tokens=plan.tokens)
+        return plan
+
+    def _plan_embedding(self, work: IndexingWork) -> PlannedFile:
+        """Count what would be sent to the embedding model for a document; pooled document vectors need none."""
+        documents = work.documents if self.document_vectors == DocumentVectorStrategy.FULL_TEXT else []
+        return PlannedFile(
+            relative_path=work.relative_path,
+            excerpts=len(work.excerpts),
+            documents=len(documents),
+            tokens=sum(self._count_tokens(item.content) for item in work.excerpts + documents)
+        )
+
+    def _find_moves(self, removed: List[str], existing: List[str],
+                    manifest: IndexManifest) -> List[Tuple[str, str]]:
+        """Pair removed files with new files whose content is identical, as happens when a note is moved."""
+        removed_by_hash = {manifest.files[relative_path].content_hash: relative_path for relative_path in removed}
+        moves = []
+        for target_path in existing:
+            if not removed_by_hash:
+                break
+            if target_path in manifest.files:
+                continue
+            source_path = removed_by_hash.pop(hash_content(self.filesystem_gateway.read_file(target_path)), None)
+            if source_path is not None:
+                moves.append((source_path, target_path))
+        return moves
+
+    def remove_orphaned_documents(self, vault_files: Optional[List[str]] = None) -> List[str]:
+        """Remove index entries whose source document no longer exists in the vault.
+
+        Args:
+            vault_files: Relative paths of the markdown files in the vault (listed from the vault if not given)
+
+        Returns:
+            The ids of the orphaned documents that were removed
+        """
+        if vault_files is None:
+            vault_files = list(self._iterate_markdown_files())
+        existing = set(vault_files)
+        indexed = self.documents_db.get_indexed_document_ids() | self.excerpts_db.get_indexed_document_ids()
+        orphans = sorted(indexed - existing)
+        if orphans:
+            logger.info("Removing orphaned documents from index", n_documents=len(orphans))
+            self._remove_from_index(orphans)
+        return orphans
+
+    def _remove_from_index(self, document_ids: List[str]) -> None:
+        self.documents_db.delete_for_documents(document_ids)
+        self.excerpts_db.delete_for_documents(document_ids)
+
+    def _move_in_index(self, source_path: str, target_path: str, manifest: Optional[IndexManifest]) -> None:
+        """Move a document's stored vectors to its new path, reusing the embeddings instead of recomputing them."""
+        target = ZkDocument(relative_path=target_path, metadata={}, content="")
+
+        moved_documents = [
+            self._relocated(stored, target.id, target)
+            for stored in self.documents_db.get_for_document(source_path)
+        ]
+        moved_excerpts = [
+            self._relocated(stored, self._excerpt_id(target, stored.metadata.get("ordinal", i), stored.content), target)
+            for i, stored in enumerate(self.excerpts_db.get_for_document(source_path))
+        ]
+
+        self._remove_from_index([source_path])
+        self.documents_db.add_documents_with_embeddings(moved_documents)
+        self.excerpts_db.add_documents_with_embeddings(moved_excerpts)
+
+        if manifest is not None and source_path in manifest.files:
+            entry = manifest.files.pop(source_path)
+            entry.chunk_ids = [excerpt.id for excerpt in moved_excerpts]
+            manifest.files[target_path] = entry
+
+        logger.info("Moved document in index", source=source_path, target=target_path,
+                    n_excerpts=len(moved_excerpts))
+
+    def _relocated(self, stored: VectorDocumentWithEmbeddings, new_id: str,
+                   target: ZkDocument) -> VectorDocumentWithEmbeddings:
+        return VectorDocumentWithEmbeddings(
+            id=new_id,
+            content=stored.content,
+            metadata={**stored.metadata, "id": target.id, "title": target.title},
+            embedding=stored.embedding
+        )
+
+    def _index_files(self, relative_paths: List[str], manifest: IndexManifest, excerpt_size: int,
+                     excerpt_overlap: int, progress_callback: Optional[ProgressCallback],
+                     excerpts_db: VectorDatabase, documents_db: VectorDatabase,
+                     checkpoint_path: Optional[str] = None, operation: str = "update",
+                     empty_collections: bool = False) -> None:
+        """Run files through the indexing pipeline, checkpointing the manifest as documents are written.
+
+        With ``empty_collections``, as in a new shadow rebuild, nothing is stored yet that needs replacing.
+
+        The manifest is saved to ``checkpoint_path`` every ``checkpoint_interval`` documents and when indexing
+        fails or is interrupted, so it always lists documents whose vectors are already stored.
+        The run is timed by stage in ``indexing_stats``, and its report is saved when the run ends, however it ends.
+        """
+        stats = IndexingStats(operation, documents_total=len(relative_paths))
+        self.indexing_stats = stats
+        written_since_checkpoint = 0
+        written = set()
+
+        def plan(prepared: PreparedDocument) -> IndexingWork:
+            stats.add_stage_seconds(prepared.stage_seconds)
+            with stats.time("plan"):
+                work = self._plan_indexing(prepared, manifest.files.get(prepared.document.relative_path),
+                                           replace_unlisted=not empty_collections)
+            stats.count(documents=1, excerpts=len(prepared.excerpts), tokens=prepared.tokens,
+                        unchanged_documents=0 if work.embedding_count else 1)
+            return work
+
+        def embed(works: List[IndexingWork]) -> EmbeddedWork:
+            with stats.time("embed"):
+                embedded = self._embed_work(works, excerpts_db, documents_db)
+            stats.count(embedded_documents=len(embedded.documents), embedded_excerpts=len(embedded.excerpts))
+            return embedded
+
+        def write(embedded: EmbeddedWork) -> None:
+            nonlocal written_since_checkpoint
+            with stats.time("write"):
+                self._write_work(embedded, manifest, excerpts_db, documents_db)
+            written.update(work.relative_path for work in embedded.works)
+            written_since_checkpoint += len(embedded.works)
+            if checkpoint_path is not None and written_since_checkpoint >= self.checkpoint_interval:
+                self._save_checkpoint(manifest, checkpoint_path)
+                written_since_checkpoint = 0
+
+        pipeline = IndexingPipeline(workers=self.indexing_workers, embedding_concurrency=self.embedding_concurrency,
+                                    batch_size=excerpts_db.batch_size)
+        if self.indexing_workers > 1:
+            prepare = partial(_prepare_in_worker, excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)
+            initializer, initargs = _initialize_preparation_worker, (self.filesystem_gateway.root_path, self.chunking)
+        else:
+            prepare = partial(self._prepare_document, excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)
+            initializer, initargs = None, ()
+
+        try:
+            pipeline.run(
+                relative_paths,
+                prepare=prepare,
+                plan=plan,
+                embed=embed,
+                write=write,
+                progress_callback=progress_callback,
+                worker_initializer=initializer,
+                worker_initargs=initargs
+            )
+        except BaseException as e:
+            if checkpoint_path is not None:
+                logger.info("Indexing interrupted, saving checkpoint", indexed_files=len(manifest.files))
+                self._save_checkpoint(manifest, checkpoint_path)
+            if checkpoint_path is not None and checkpoint_path == self.manifest_path:
+                self._save_index_stats(manifest, stale_files=len(set(relative_paths) - written))
+            self._save_run_report(stats, "failed" if isinstance(e, Exception) else "interrupted", str(e) or None)
+            raise
+        self._save_run_report(stats, "completed")
+
+    def _save_run_report(self, stats: IndexingStats, status: str, error: Optional[str] = None) -> None:
+        report = stats.report(status, error)
+        self.last_run = report
+        logger.info("Indexing run finished", operation=report.operation, status=status, documents=report.documents,
+                    excerpts=report.excerpts, seconds=report.seconds, stage_seconds=report.stage_seconds)
+        if self.manifest_path is not None:
+            report.save(get_index_run_report_path(self.manifest_path))
+
+    def _save_index_stats(self, manifest: IndexManifest, stale_files: Optional[int] = None) -> None:
+        """Record the size of the index, keeping the previous stale file count when ``stale_files`` is not known."""
+        if self.manifest_path is None:
+            return
+        path = get_index_stats_path(self.manifest_path)
+        if stale_files is None:
+            previous = IndexStats.load(path)
+            stale_files = previous.stale_files if previous is not None else 0
+        IndexStats(
+            updated_at=datetime.now(),
+            documents=len(manifest.files),
+            excerpts=sum(len(indexed_file.chunk_ids) for indexed_file in manifest.files.values()),
+            tokens=sum(indexed_file.tokens for indexed_file in manifest.files.values()),
+            vectors={
+                ZkCollectionName.EXCERPTS.value: self.excerpts_db.count(),
+                ZkCollectionName.DOCUMENTS.value: self.documents_db.count(),
+            },
+            stale_files=stale_files
+        ).save(path)
+
+    def _prepare_document(self, relative_path: str, excerpt_size: int, excerpt_overlap: int) -> PreparedDocument:
+        """Read, parse and split a file, reading it from disk only once, and time each of those stages."""
+        started = time.perf_counter()
+        size, mtime = self._get_file_details(relative_path)
+        raw_content = self.filesystem_gateway.read_file(relative_path)
+        read = time.perf_counter()
+        metadata, content = self.filesystem_gateway.parse_markdown(raw_content)
+        document = ZkDocument(relative_path=relative_path, metadata=metadata, content=content)
+        parsed = time.perf_counter()
+        excerpts, tokens = self._split_document(document, excerpt_size, excerpt_overlap) if document.content else ([], 0)
+        split = time.perf_counter()
+        return PreparedDocument(
+            document=document,
+            excerpts=excerpts,
+            indexed_file=IndexedFile(
+                content_hash=hash_content(raw_content),
+                size=size,
+                mtime=mtime,
+                chunk_ids=[excerpt.id for excerpt in excerpts],
+                tokens=tokens
+            ),
+            tokens=tokens,
+            stage_seconds={"read": read - started, "parse": parsed - read, "split": split - parsed}
+        )
+
+    def _plan_indexing(self, prepared: PreparedDocument, previous: Optional[IndexedFile],
+                       replace_unlisted: bool = True) -> IndexingWork:
+        """Decide which of a document's vectors to embed and which to delete.
+
+        Args:
+            prepared: The document as it is now
+            previous: The manifest entry from when the document was last indexed, if it was
+            replace_unlisted: Replace stored excerpts of documents without a manifest entry
+
+        Returns:
+            The index changes for the document, embedding only excerpts that are not already in the index.
+            Documents without a manifest entry, such as notes adopted from an index without a manifest and changed
+            since, may still have excerpts stored under other ids, so all of their stored excerpts are replaced.
+        """
+        document = prepared.document
+        excerpts = prepared.excerpts
+        work = IndexingWork(relative_path=document.relative_path, indexed_file=prepared.indexed_file)
+
+        if previous is None:
+            work.replace_all_excerpts = replace_unlisted
+        else:
+            if previous.chunk_ids and previous.chunk_ids == prepared.indexed_file.chunk_ids:
+                logger.info("Document excerpts unchanged", document_title=document.title)
+                return work
+            excerpts = self._plan_excerpt_changes(work, document, previous, excerpts)
+        work.remove_document = not document.content
 
-    def _index_document(self, relative_path: str, excerpt_size: int, excerpt_overlap: int) -> None:
-        document = self.read_document(relative_path)
         if document.content:
-            self._add_document_to_index(document)
-            self._split_document(document, excerpt_size, excerpt_overlap)
+            work.documents = [self._create_document_for_storage(document, prepared.indexed_file)]
+        work.excerpts = excerpts
+        return work
 
-    def query_excerpts(self, query: str, n_results: int = 8, max_distance: float = 1.0) -> List[ZkQueryExcerptResult]:
-        return [
-            self._create_excerpt_query_result(result)
-            for result in (self.excerpts_db.query(query, n_results=n_results))
-            if result.distance <= max_distance
+    def _plan_excerpt_changes(self, work: IndexingWork, document: ZkDocument, previous: IndexedFile,
+                              excerpts: List[VectorDocumentForStorage]) -> List[VectorDocumentForStorage]:
+        """Record excerpts that no longer exist in the document and return the excerpts still to be embedded.
+
+        Documents adopted from an index that predates chunk tracking have no recorded chunk ids,
+        so all of their excerpts are replaced.
+        """
+        if not previous.chunk_ids:
+            work.replace_all_excerpts = True
+            return excerpts
+
+        current_ids = {excerpt.id for excerpt in excerpts}
+        previous_ids = set(previous.chunk_ids)
+        work.stale_excerpt_ids = [chunk_id for chunk_id in previous.chunk_ids if chunk_id not in current_ids]
+        logger.info("Document excerpts changed", document_title=document.title,
+                    unchanged=len(current_ids & previous_ids), added=len(current_ids - previous_ids),
+                    removed=len(previous_ids - current_ids))
+        return [excerpt for excerpt in excerpts if excerpt.id not in previous_ids]
+
+    def _embed_work(self, works: List[IndexingWork], excerpts_db: VectorDatabase,
+                    documents_db: VectorDatabase) -> EmbeddedWork:
+        excerpts = excerpts_db.embed_documents([excerpt for work in works for excerpt in work.excerpts])
+        if self.document_vectors == DocumentVectorStrategy.POOLED_EXCERPTS:
+            documents = self._pool_document_vectors(works, excerpts, excerpts_db, documents_db)
+        else:
+            documents = documents_db.embed_documents([doc for work in works for doc in work.documents])
+        return EmbeddedWork(works=works, documents=documents, excerpts=excerpts)
+
+    def _pool_document_vectors(self, works: List[IndexingWork], excerpts: List[VectorDocumentWithEmbeddings],
+                               excerpts_db: VectorDatabase,
+                               documents_db: VectorDatabase) -> List[VectorDocumentWithEmbeddings]:
+        """Derive document vectors from excerpt embeddings, reading unchanged excerpts back from the index.
+
+        Documents whose excerpts cannot all be found are embedded from their full text instead.
+        """
+        embedded = {excerpt.id: excerpt for excerpt in excerpts}
+        pooled = []
+        unpooled = []
+        for work in works:
+            if not work.documents:
+                continue
+            chunk_ids = work.indexed_file.chunk_ids
+            if any(chunk_id not in embedded for chunk_id in chunk_ids):
+                stored = {excerpt.id: excerpt for excerpt in excerpts_db.get_for_document(work.relative_path)}
+                available = {**stored, **embedded}
+            else:
+                available = embedded
+            document_excerpts = [available[chunk_id] for chunk_id in chunk_ids if chunk_id in available]
+            if not chunk_ids or len(document_excerpts) < len(chunk_ids):
+                unpooled.extend(work.documents)
+                continue
+            embedding = pool_embeddings([excerpt.embedding for excerpt in document_excerpts],
+                                        [len(excerpt.content) for excerpt in document_excerpts])
+            pooled.extend(VectorDocumentWithEmbeddings.from_document(doc, embedding) for doc in work.documents)
+        return pooled + documents_db.embed_documents(unpooled)
+
+    def _write_work(self, embedded: EmbeddedWork, manifest: IndexManifest, excerpts_db: VectorDatabase,
+                    documents_db: VectorDatabase) -> None:
+        for work in embedded.works:
+            if work.replace_all_excerpts:
+                excerpts_db.delete_for_documents([work.relative_path])
+            if work.stale_excerpt_ids:
+                excerpts_db.delete_documents(work.stale_excerpt_ids)
+            if work.remove_document:
+                documents_db.delete_documents([work.relative_path])
+
+        documents_db.add_documents_with_embeddings(embedded.documents)
+        excerpts_db.add_documents_with_embeddings(embedded.excerpts)
+
+        for work in embedded.works:
+            manifest.files[work.relative_path] = work.indexed_file
+
+    def _load_manifest(self) -> Optional[IndexManifest]:
+        if self.manifest_path is None:
+            return None
+        return IndexManifest.load(self.manifest_path)
+
+    def _save_manifest(self, manifest: IndexManifest) -> None:
+        """Merge the entries changed since the manifest was loaded, keeping those saved meanwhile by other processes."""
+        if self.manifest_path is not None:
+            manifest.save_merged(self.manifest_path)
+
+    def _save_checkpoint(self, manifest: IndexManifest, checkpoint_path: str) -> None:
+        if checkpoint_path == self.manifest_path:
+            manifest.save_merged(checkpoint_path)
+        else:
+            manifest.save(checkpoint_path)
+
+    def _describe_indexed_file(self, relative_path: str, chunk_ids: List[str]) -> IndexedFile:
+        size, mtime = self._get_file_details(relative_path)
+        return IndexedFile(
+            content_hash=hash_content(self.filesystem_gateway.read_file(relative_path)),
+            size=size,
+            mtime=mtime,
+            chunk_ids=chunk_ids
+        )
+
+    def query_excerpts(self, query: str, n_results: int = 8, max_distance: float = 1.0,
+                       mode: Optional[RetrievalMode] = None) -> List[ZkQueryExcerptResult]:
+        """Query the excerpt index for passages.
+
+        Args:
+            query: The query text
+            n_results: The number of results to return
+            max_distance: The maximum vector distance of results found by embedding
+            mode: How to search, ``retrieval_mode`` if not given. Lexical results are not limited by
+                ``max_distance``, since they contain the query's terms, and lexical mode never embeds the query.
+
+        Returns:
+            A list of query results. Only results found by embedding have a distance; lexical and hybrid results
+            are ranked by their BM25 or fused score instead.
+        """
+        return self.query_excerpts_many([query], n_results, max_distance, mode)[0]
+
+    def query_excerpts_many(self, queries: List[str], n_results: int = 8, max_distance: float = 1.0,
+                            mode: Optional[RetrievalMode] = None) -> List[List[ZkQueryExcerptResult]]:
+        """Query the excerpt index for passages matching each of several queries.
+
+        Queries whose results are not cached are embedded in one batch and searched in one vector store request.
+        With ``merge_excerpts``, overlapping and consecutive excerpts of a note are returned as one passage, and
+        excerpts repeating a better result are dropped.
+
+        Args:
+            queries: The query texts
+            n_results: The number of results to return for each query
+            max_distance: The maximum vector distance of results found by embedding
+            mode: How to search, ``retrieval_mode`` if not given
+
+        Returns:
+            A list of query results for each query, in the same order as the queries
+        """
+        mode = mode or self.retrieval_mode
+        grouped_results = self._query_many_cached(self.excerpts_db, queries, n_results, max_distance,
+                                                  partial(self._search_excerpts, n_results=n_results,
+                                                          max_distance=max_distance, mode=mode), mode)
+        return [[self._create_excerpt_query_result(result) for result in results] for results in grouped_results]
+
+    def _search_excerpts(self, queries: List[str], n_results: int, max_distance: float,
+                         mode: RetrievalMode) -> List[List[QueryResult]]:
+        grouped_results = self._find_excerpts(queries, n_results, max_distance, mode)
+        if not self.merge_excerpts:
+            return grouped_results
+        return [remove_near_duplicates(merge_adjacent_excerpts(results)) for results in grouped_results]
+
+    def _find_excerpts(self, queries: List[str], n_results: int, max_distance: float,
+                       mode: RetrievalMode) -> List[List[QueryResult]]:
+        if mode == RetrievalMode.LEXICAL:
+            return [self.excerpts_db.query_lexical(query, n_results=n_results) for query in queries]
+        candidates = n_results * HYBRID_CANDIDATES_PER_RESULT if mode == RetrievalMode.HYBRID else n_results
+        grouped_vector_results = [
+            [result for result in results if result.distance <= max_distance]
+            for results in self.excerpts_db.query_many(queries, n_results=candidates)
         ]
+        if mode == RetrievalMode.VECTOR:
+            return grouped_vector_results
+        grouped_results = []
+        for query, vector_results in zip(queries, grouped_vector_results):
+            lexical_results = self.excerpts_db.query_lexical(query, n_results=candidates)
+            fused = reciprocal_rank_fusion([vector_results, lexical_results],
+                                           key=lambda result: result.document.id)
+            grouped_results.append([result.model_copy(update={"score": score})
+                                    for result, score in fused[:n_results]])
+        return grouped_results
 
     def query_documents(self, query: str, n_results: int = 3, max_distance: float = 0.0) -> List[ZkQueryDocumentResult]:
         """Query the document index for whole documents.
@@ -172,18 +855,79 @@ class Zettelkasten:
         Returns:
             A list of query results
         """
-        return [
-            self._create_document_query_result(result)
-            for result in (self.documents_db.query(query, n_results=n_results))
-            if max_distance == 0.0 or result.distance <= max_distance
-        ]
+        return self.query_documents_many([query], n_results, max_distance)[0]
+
+    def query_documents_many(self, queries: List[str], n_results: int = 3,
+                             max_distance: float = 0.0) -> List[List[ZkQueryDocumentResult]]:
+        """Query the document index for whole documents matching each of several queries.
+
+        Queries whose results are not cached are embedded in one batch and searched in one vector store request.
+        Results are rebuilt from the document index while their notes are unchanged on disk, and read from the
+        vault otherwise.
+
+        Args:
+            queries: The query texts
+            n_results: The number of results to return for each query
+            max_distance: The maximum distance to consider (0.0 means no distance filtering)
+
+        Returns:
+            A list of query results for each query, in the same order as the queries
+        """
+        def search_documents(pending: List[str]) -> List[List[QueryResult]]:
+            return [
+                [result for result in results if max_distance == 0.0 or result.distance <= max_distance]
+                for results in self.documents_db.query_many(pending, n_results=n_results)
+            ]
+
+        grouped_results = self._query_many_cached(self.documents_db, queries, n_results, max_distance,
+                                                  search_documents)
+        return [[self._create_document_query_result(result) for result in results] for results in grouped_results]
+
+    def _query_many_cached(self, db: VectorDatabase, queries: List[str], n_results: int, max_distance: float,
+                           search: Callable[[List[str]], List[List[QueryResult]]],
+                           mode: RetrievalMode = RetrievalMode.VECTOR) -> List[List[QueryResult]]:
+        """Answer queries from the result cache, keyed by the collection's index version, searching for the rest
+        together."""
+        if self.result_cache is None:
+            return search(queries) if queries else []
+        version = db.index_version()
+        keys = {query: (db.collection_name, mode, query, n_results, max_distance, version) for query in queries}
+        results = {}
+        for query, key in keys.items():
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results[query] = cached
+        pending = [query for query in keys if query not in results]
+        if pending:
+            for query, found in zip(pending, search(pending)):
+                self.result_cache.put(keys[query], found)
+                results[query] = found
+        return [list(results[query]) for query in queries]
 
     def _create_document_query_result(self, result: QueryResult) -> ZkQueryDocumentResult:
         return ZkQueryDocumentResult(
-            document=self.read_document(result.document.id),
+            document=self._hydrate_document(result.document),
             distance=result.distance
         )
 
+    def _hydrate_document(self, stored: VectorDocumentForStorage) -> ZkDocument:
+        """Rebuild a document from the document index, reading the file only when it changed since it was indexed.
+
+        Checking the file costs a stat; its text and frontmatter come from the index, so nothing is parsed.
+        """
+        relative_path = stored.id
+        size, mtime = stored.metadata.get("size"), stored.metadata.get("mtime")
+        frontmatter = stored.metadata.get("frontmatter")
+        if size is not None and mtime is not None and frontmatter is not None:
+            try:
+                unchanged = self._get_file_details(relative_path) == (size, mtime)
+            except OSError:
+                unchanged = False
+            if unchanged:
+                return ZkDocument(relative_path=relative_path, metadata=json.loads(frontmatter),
+                                  content=stored.content)
+        return self.read_document(relative_path)
+
     def _create_excerpt_query_result(self, result: QueryResult) -> ZkQueryExcerptResult:
         return ZkQueryExcerptResult(
             excerpt=ZkDocumentExcerpt(
@@ -191,62 +935,128 @@ class Zettelkasten:
                 document_title=result.document.metadata['title'],
                 text=result.document.content
             ),
-            distance=result.distance
+            distance=result.distance,
+            score=result.score
         )
 
-    def _split_document(self, document: ZkDocument, excerpt_size: int = 200, excerpt_overlap: int = 100) -> None:
+    def _split_document(self, document: ZkDocument, excerpt_size: int = 200,
+                        excerpt_overlap: int = 100) -> Tuple[List[VectorDocumentForStorage], int]:
+        """Split a document into excerpts, returning them with the number of tokens they hold."""
         logger.info("Processing", document_title=document.title)
+        if self.chunking == ChunkingStrategy.MARKDOWN:
+            return self._split_markdown(document, excerpt_size, excerpt_overlap)
         tokens = self.tokenizer_gateway.encode(document.content)
         logger.info("Content length", text=len(document.content), tokens=len(tokens))
         token_chunks = split_tokens(tokens, excerpt_size=excerpt_size, excerpt_overlap=excerpt_overlap)
-        if len(token_chunks) > 0:
-            logger.info("Document split into", n_excerpts=len(token_chunks),
-                        excerpt_lengths=[len(chunk) for chunk in token_chunks])
-            excerpts = self._decode_tokens_to_text(token_chunks)
-            self._add_text_excerpts_to_index(document, excerpts)
-
-    def _add_text_excerpts_to_index(self, document: ZkDocument, text_excerpts: List[str]):
-        docs_for_storage = [
-            self._create_vector_document_for_storage(excerpt, document)
-            for excerpt in text_excerpts
-        ]
-        self.excerpts_db.add_documents(docs_for_storage)
-
-    def _create_vector_document_for_storage(self, excerpt: str, document: ZkDocument) -> VectorDocumentForStorage:
+        if len(token_chunks) == 0:
+            return [], 0
+        logger.info("Document split into", n_excerpts=len(token_chunks),
+                    excerpt_lengths=[len(chunk) for chunk in token_chunks])
+        excerpts = self._decode_tokens_to_text(token_chunks)
+        return [
+            self._create_vector_document_for_storage(excerpt, document, ordinal, location)
+            for ordinal, (excerpt, location) in enumerate(zip(excerpts, self._locate_excerpts(document, excerpts)))
+        ], sum(len(chunk) for chunk in token_chunks)
+
+    def _locate_excerpts(self, document: ZkDocument, excerpts: List[str]) -> List[Optional[dict[str, Any]]]:
+        """Find the character offsets of token window excerpts in their document, where decoding kept them intact."""
+        locations = []
+        search_from = 0
+        for excerpt in excerpts:
+            start = document.content.find(excerpt, search_from)
+            if start < 0:
+                locations.append(None)
+                continue
+            locations.append({"start": start, "end": start + len(excerpt)})
+            search_from = start + 1
+        return locations
+
+    def _split_markdown(self, document: ZkDocument, excerpt_size: int,
+                        excerpt_overlap: int) -> Tuple[List[VectorDocumentForStorage], int]:
+        chunks = split_markdown(document.content, self._count_tokens, excerpt_size=excerpt_size,
+                                excerpt_overlap=excerpt_overlap)
+        logger.info("Document split into", n_excerpts=len(chunks), excerpt_lengths=[len(c.text) for c in chunks])
+        return [
+            self._create_vector_document_for_storage(chunk.text, document, ordinal, {
+                "start": chunk.start,
+                "end": chunk.end,
+                "heading": " > ".join(chunk.heading_path),
+            })
+            for ordinal, chunk in enumerate(chunks)
+        ], sum(chunk.tokens for chunk in chunks)
+
+    def _count_tokens(self, text: str) -> int:
+        return len(self.tokenizer_gateway.encode(text))
+
+    def _create_vector_document_for_storage(self, excerpt: str, document: ZkDocument, ordinal: int,
+                                            location: Optional[dict[str, Any]] = None) -> VectorDocumentForStorage:
         return VectorDocumentForStorage(
-            id=hashlib.md5(bytes(excerpt, "utf-8")).hexdigest(),
+            id=self._excerpt_id(document, ordinal, excerpt),
             content=excerpt,
             metadata={
                 "id": document.id,
                 "title": document.title,
+                "ordinal": ordinal,
+                **(location or {}),
             }
         )
 
-    def _add_document_to_index(self, document: ZkDocument) -> None:
-        """Add the whole document to the document index.
+    def _excerpt_id(self, document: ZkDocument, ordinal: int, excerpt: str) -> str:
+        """Stable excerpt id built from the document, the excerpt's position in it and the excerpt's content."""
+        content_hash = hashlib.md5(bytes(excerpt, "utf-8")).hexdigest()
+        return f"{document.id}#{ordinal}#{content_hash}"
 
-        Args:
-            document: The ZkDocument to index
+    def _create_document_for_storage(self, document: ZkDocument,
+                                     indexed_file: Optional[IndexedFile] = None) -> VectorDocumentForStorage:
+        """Prepare the whole document for the document index.
+
+        The file's size and modification time are stored with it, and its frontmatter too when it survives a JSON
+        round trip, so query results can be served from the index while the file is unchanged on disk.
         """
         logger.info("Indexing whole document", document_title=document.title)
-        doc_for_storage = VectorDocumentForStorage(
-            id=document.id,
-            content=document.content,
-            metadata={
-                "id": document.id,
-                "title": document.title,
-            }
-        )
-        self.documents_db.add_documents([doc_for_storage])
+        metadata = {
+            "id": document.id,
+            "title": document.title,
+        }
+        if indexed_file is not None:
+            frontmatter = json.dumps(document.metadata, default=str)
+            if json.loads(frontmatter) == document.metadata:
+                metadata.update(size=indexed_file.size, mtime=indexed_file.mtime, frontmatter=frontmatter)
+        return VectorDocumentForStorage(id=document.id, content=document.content, metadata=metadata)
 
     def _decode_tokens_to_text(self, token_chunks: List[List[int]]) -> List[str]:
         return [self.tokenizer_gateway.decode(chunk) for chunk in token_chunks]
 
-    def _get_file_mtime(self, relative_path: str) -> datetime:
-        return self.filesystem_gateway.get_modified_time(relative_path)
+    def _get_file_details(self, relative_path: str) -> Tuple[int, float]:
+        """Get a file's size and modification time, as recorded in the manifest, from a single stat."""
+        mtime_ns, size = self.filesystem_gateway.get_file_signature(relative_path)
+        return size, datetime.fromtimestamp(mtime_ns / 1e9).timestamp()
+
+    def _content_changed(self, relative_path: str, manifest: IndexManifest, adopt_before: Optional[datetime]) -> bool:
+        """Check a file against the manifest, refreshing its entry when only its modification time changed.
+
+        Files missing from the manifest but modified before ``adopt_before`` are adopted as already indexed,
+        which lets an index built before manifests existed be updated without re-embedding it.
+        """
+        size, mtime_seconds = self._get_file_details(relative_path)
+        mtime = datetime.fromtimestamp(mtime_seconds)
+        entry = manifest.files.get(relative_path)
+
+        if entry is None:
+            if adopt_before is not None and mtime <= adopt_before:
+                manifest.files[relative_path] = self._describe_indexed_file(relative_path, [])
+                return False
+            return True
 
-    def _needs_reindex(self, relative_path: str, since: datetime) -> bool:
-        return self._get_file_mtime(relative_path) > since
+        if entry.is_unchanged_on_disk(size, mtime.timestamp()):
+            return False
+
+        if hash_content(self.filesystem_gateway.read_file(relative_path)) == entry.content_hash:
+            entry.size = size
+            entry.mtime = mtime.timestamp()
+            return False
+
+        return True
 
     def _merge_metadata(self, original_metadata: dict[str, Any], new_metadata: dict[str, Any]) -> dict[str, Any]:
         """Merge two metadata dictionaries with special handling for nested structures and arrays.
@@ -321,6 +1131,13 @@ class Zettelkasten:
             raise FileNotFoundError(f"Source document {source_path} does not exist")
 
         self.filesystem_gateway.rename_file(source_path, target_path)
+        self.document_cache.invalidate(self._document_cache_key(source_path))
+        self.document_cache.invalidate(self._document_cache_key(target_path))
+        manifest = self._load_manifest()
+        self._move_in_index(source_path, target_path, manifest)
+        if manifest is not None:
+            self._save_manifest(manifest)
+            self._save_index_stats(manifest)
 
     def delete_document(self, relative_path: str) -> None:
         """Delete a document at the specified path.
@@ -340,7 +1157,33 @@ class Zettelkasten:
 
         try:
             self.filesystem_gateway.delete_file(relative_path)
+            self.document_cache.invalidate(self._document_cache_key(relative_path))
             logger.info("Document deleted successfully", path=relative_path)
         except OSError as e:
             logger.error("Failed to delete document", path=relative_path, error=str(e))
             raise
+
+        self._remove_from_index([relative_path])
+        manifest = self._load_manifest()
+        if manifest is not None and manifest.files.pop(relative_path, None) is not None:
+            self._save_manifest(manifest)
+            self._save_index_stats(manifest)
+
+
+_worker_zettelkasten: Optional[Zettelkasten] = None
+
+
+def _initialize_preparation_worker(root_path: str, chunking: ChunkingStrategy) -> None:
+    """Set up a preparation worker process, which only reads and splits files and never touches the index."""
+    global _worker_zettelkasten
+    _worker_zettelkasten = Zettelkasten(
+        tokenizer_gateway=TokenizerGateway(),
+        excerpts_db=None,
+        documents_db=None,
+        filesystem_gateway=MarkdownFilesystemGateway(root_path),
+        chunking=chunking
+    )
+
+
+def _prepare_in_worker(relative_path: str, excerpt_size: int, excerpt_overlap: int) -> PreparedDocument:
+    return _worker_zettelkasten._prepare_document(relative_path, excerpt_size, excerpt_overlap)
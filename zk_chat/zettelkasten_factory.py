@@ -0,0 +1,69 @@
+import os
+from typing import Union
+
+from mojentic.llm.gateways import OllamaGateway, OpenAIGateway
+from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
+
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.collection_pointers import VersionedCollections
+from zk_chat.config import Config
+from zk_chat.embedding_cache import open_embedding_cache
+from zk_chat.embedding_controller import EmbeddingRequestController
+from zk_chat.embedding_gateway import EmbeddingGateway
+from zk_chat.index_manifest import get_index_manifest_path
+from zk_chat.lexical_index import LexicalIndex, get_lexical_index_path
+from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
+from zk_chat.query_embedding_cache import QueryEmbeddingCache
+from zk_chat.vector_database import VectorDatabase
+from zk_chat.zettelkasten import Zettelkasten
+
+
+def create_zettelkasten(config: Config, vector_gateway: VersionedCollections,
+                        model_gateway: Union[OllamaGateway, OpenAIGateway], for_queries: bool = False) -> Zettelkasten:
+    """
+    Create the Zettelkasten for a vault, configured the same way by the indexer and by every session.
+
+    Args:
+        config: The vault configuration
+        vector_gateway: The vault's vector store, from ``create_vector_gateway``
+        model_gateway: The gateway to the model that embeds text
+        for_queries: Add the query embedding cache, result cache and retrieval options used to answer queries
+
+    Returns:
+        The Zettelkasten
+    """
+    db_dir = os.path.join(config.vault, ".zk_chat_db")
+    controller = EmbeddingRequestController(max_concurrency=config.embedding_concurrency)
+    embedding_gateway = EmbeddingGateway(model_gateway,
+                                         cache=open_embedding_cache(db_dir, config.embedding_cache_size_mb),
+                                         controller=controller, model=config.embedding_model)
+    query_cache = QueryEmbeddingCache(config.query_cache_size) if for_queries and config.query_cache_size > 0 else None
+    query_options = dict(result_cache_size=config.result_cache_size, retrieval_mode=config.retrieval_mode,
+                         merge_excerpts=config.merge_excerpts) if for_queries else {}
+    return Zettelkasten(
+        tokenizer_gateway=TokenizerGateway(),
+        excerpts_db=VectorDatabase(
+            chroma_gateway=vector_gateway,
+            gateway=embedding_gateway,
+            collection_name=ZkCollectionName.EXCERPTS,
+            batch_size=config.embedding_batch_size,
+            query_cache=query_cache,
+            lexical_index=LexicalIndex(get_lexical_index_path(vector_gateway.pointers_path))
+        ),
+        documents_db=VectorDatabase(
+            chroma_gateway=vector_gateway,
+            gateway=embedding_gateway,
+            collection_name=ZkCollectionName.DOCUMENTS,
+            batch_size=config.embedding_batch_size,
+            query_cache=query_cache
+        ),
+        filesystem_gateway=MarkdownFilesystemGateway(config.vault, include_globs=config.include_globs,
+                                                     exclude_globs=config.exclude_globs),
+        manifest_path=get_index_manifest_path(db_dir, config.gateway.value),
+        indexing_workers=config.indexing_workers,
+        embedding_concurrency=config.embedding_concurrency,
+        chunking=config.chunking,
+        document_vectors=config.document_vectors,
+        embedding_format=embedding_gateway.embedding_format,
+        vector_store=config.vector_store,
+        **query_options)
@@ -0,0 +1,46 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from mojentic.llm.gateways import OllamaGateway
+
+from zk_chat.config import ChunkingStrategy, Config, DocumentVectorStrategy, RetrievalMode, VectorStore
+from zk_chat.numpy_vector_gateway import NumpyVectorGateway
+from zk_chat.zettelkasten_factory import create_zettelkasten
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(vault=str(tmp_path), model="llama3", embedding_model="nomic-embed-text", embedding_cache_size_mb=0,
+                  chunking=ChunkingStrategy.TOKENS, document_vectors=DocumentVectorStrategy.POOLED_EXCERPTS,
+                  vector_store=VectorStore.NUMPY, retrieval_mode=RetrievalMode.HYBRID, merge_excerpts=False,
+                  result_cache_size=0)
+
+
+@pytest.fixture
+def vector_gateway(config, tmp_path):
+    return NumpyVectorGateway(config.gateway, db_dir=str(tmp_path / ".zk_chat_db"))
+
+
+class DescribeCreateZettelkasten:
+    """
+    Describes creating the Zettelkasten shared by the indexer and every chat and agent session
+    """
+
+    @pytest.fixture(autouse=True)
+    def tokenizer_gateway(self):
+        with patch("zk_chat.zettelkasten_factory.TokenizerGateway") as tokenizer_gateway:
+            yield tokenizer_gateway
+
+    def should_index_as_configured(self, config, vector_gateway):
+        zk = create_zettelkasten(config, vector_gateway, Mock(spec=OllamaGateway))
+
+        assert (zk.chunking, zk.document_vectors, zk.vector_store) == (
+            ChunkingStrategy.TOKENS, DocumentVectorStrategy.POOLED_EXCERPTS, VectorStore.NUMPY)
+        assert zk.embedding_format == "ollama:nomic-embed-text:unit"
+
+    def should_answer_queries_as_configured(self, config, vector_gateway):
+        zk = create_zettelkasten(config, vector_gateway, Mock(spec=OllamaGateway), for_queries=True)
+
+        assert (zk.retrieval_mode, zk.merge_excerpts, zk.result_cache) == (RetrievalMode.HYBRID, False, None)
+        assert zk.excerpts_db.query_cache is zk.documents_db.query_cache is not None
+        assert zk.excerpts_db.lexical_index is not None
@@ -1,9 +1,18 @@
+import os
+from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 
 import pytest
+from mojentic.llm.gateways.tokenizer_gateway import TokenizerGateway
 
+from zk_chat.chroma_collections import ZkCollectionName
+from zk_chat.config import ChunkingStrategy, DocumentVectorStrategy, RetrievalMode, VectorStore
+from zk_chat.document_cache import DocumentCache
+from zk_chat.indexing_stats import IndexRunReport, IndexStats, get_index_run_report_path, get_index_stats_path
+from zk_chat.index_manifest import IndexManifest, get_rebuild_checkpoint_path, hash_content
 from zk_chat.markdown.markdown_filesystem_gateway import MarkdownFilesystemGateway
-from zk_chat.models import ZkDocument
+from zk_chat.models import QueryResult, VectorDocumentForStorage, VectorDocumentWithEmbeddings, ZkDocument
+from zk_chat.vector_database import VectorDatabase
 from zk_chat.zettelkasten import Zettelkasten
 
 
@@ -200,3 +209,900 @@ class DescribeZettelkasten:
 
                 # Verify path preservation
                 assert written_doc.relative_path == "Document.md"
+
+
+def embed_with_fake_vectors(documents):
+    return [VectorDocumentWithEmbeddings.from_document(doc, [0.0]) for doc in documents]
+
+
+class DescribeZettelkastenIndexing:
+    @pytest.fixture
+    def vault(self, tmp_path):
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        (vault / "First.md").write_text("First note content")
+        (vault / "Second.md").write_text("Second note content")
+        return vault
+
+    @pytest.fixture
+    def manifest_path(self, tmp_path):
+        return str(tmp_path / "db" / "ollama_index_manifest.json")
+
+    @pytest.fixture
+    def mock_tokenizer_gateway(self):
+        mock = Mock(spec=TokenizerGateway)
+        mock.encode.side_effect = lambda text: list(text)
+        mock.decode.side_effect = lambda tokens: "".join(tokens)
+        return mock
+
+    @pytest.fixture
+    def mock_excerpts_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.batch_size = 32
+        mock.embed_documents.side_effect = embed_with_fake_vectors
+        mock.get_indexed_document_ids.return_value = set()
+        mock.get_for_document.return_value = []
+        mock.create_shadow.return_value = mock
+        mock.resume_shadow.return_value = mock
+        mock.count.return_value = 0
+        return mock
+
+    @pytest.fixture
+    def mock_documents_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.batch_size = 32
+        mock.embed_documents.side_effect = embed_with_fake_vectors
+        mock.get_indexed_document_ids.return_value = set()
+        mock.get_for_document.return_value = []
+        mock.create_shadow.return_value = mock
+        mock.resume_shadow.return_value = mock
+        mock.count.return_value = 0
+        return mock
+
+    @pytest.fixture
+    def zk(self, vault, manifest_path, mock_tokenizer_gateway, mock_excerpts_db, mock_documents_db):
+        return Zettelkasten(mock_tokenizer_gateway, mock_excerpts_db, mock_documents_db,
+                            MarkdownFilesystemGateway(str(vault)), manifest_path=manifest_path)
+
+    def embedded(self, mock_db):
+        return [doc for call in mock_db.embed_documents.call_args_list for doc in call.args[0]]
+
+    def indexed_ids(self, mock_documents_db):
+        return [doc.id for doc in self.embedded(mock_documents_db)]
+
+    def should_record_every_file_in_manifest_on_reindex(self, zk, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        manifest = IndexManifest.load(manifest_path)
+        assert set(manifest.files) == {"First.md", "Second.md"}
+        assert manifest.files["First.md"].content_hash == hash_content("First note content")
+
+    def should_store_file_details_with_documents_for_hydration(self, zk, manifest_path, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        indexed_file = IndexManifest.load(manifest_path).files["First.md"]
+        stored = next(doc for doc in self.embedded(mock_documents_db) if doc.id == "First.md")
+        assert stored.metadata["size"] == indexed_file.size
+        assert stored.metadata["mtime"] == indexed_file.mtime
+        assert stored.metadata["frontmatter"] == "{}"
+
+    def should_parse_files_as_read_document_does(self, zk):
+        with patch.object(MarkdownFilesystemGateway, "parse_markdown",
+                          wraps=zk.filesystem_gateway.parse_markdown) as parse_markdown:
+            zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        assert {call.args[0] for call in parse_markdown.call_args_list} == {"First note content",
+                                                                             "Second note content"}
+
+    def should_describe_file_as_it_was_before_reading_it(self, zk):
+        gateway = zk.filesystem_gateway
+        calls = Mock()
+        calls.attach_mock(Mock(wraps=gateway.get_file_signature), "get_file_signature")
+        calls.attach_mock(Mock(wraps=gateway.read_file), "read_file")
+
+        with patch.object(gateway, "get_file_signature", calls.get_file_signature), \
+                patch.object(gateway, "read_file", calls.read_file):
+            zk._prepare_document("First.md", excerpt_size=500, excerpt_overlap=100)
+
+        assert [call[0] for call in calls.mock_calls] == ["get_file_signature", "read_file"]
+
+    def should_rebuild_into_shadow_collections_and_promote_them(self, zk, mock_excerpts_db, mock_documents_db):
+        shadow_excerpts_db = Mock(spec=VectorDatabase)
+        shadow_excerpts_db.batch_size = 32
+        shadow_excerpts_db.embed_documents.side_effect = embed_with_fake_vectors
+        mock_excerpts_db.create_shadow.return_value = shadow_excerpts_db
+
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        mock_excerpts_db.reset.assert_not_called()
+        mock_excerpts_db.add_documents_with_embeddings.assert_not_called()
+        assert len(self.embedded(shadow_excerpts_db)) == 2
+        shadow_excerpts_db.promote.assert_called_once()
+        mock_documents_db.promote.assert_called_once()
+
+    def should_apply_notes_changed_during_reindex_before_promoting(self, zk, vault, mock_documents_db,
+                                                                   manifest_path):
+        def change_vault_once(*args, **kwargs):
+            mock_documents_db.add_documents_with_embeddings.side_effect = None
+            (vault / "First.md").write_text("First note content, edited while rebuilding")
+            (vault / "Second.md").rename(vault / "Renamed.md")
+
+        mock_documents_db.add_documents_with_embeddings.side_effect = change_vault_once
+
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        calls = [call[0] for call in mock_documents_db.mock_calls]
+        assert calls.index("promote") > max(index for index, name in enumerate(calls) if name == "embed_documents")
+        assert sorted(self.indexed_ids(mock_documents_db)[2:]) == ["First.md", "Renamed.md"]
+        mock_documents_db.delete_for_documents.assert_called_once_with(["Second.md"])
+        assert set(IndexManifest.load(manifest_path).files) == {"First.md", "Renamed.md"}
+        assert IndexManifest.load(manifest_path).files["First.md"].content_hash == \
+            hash_content("First note content, edited while rebuilding")
+
+    def should_checkpoint_written_files_when_reindex_is_interrupted(self, zk, mock_excerpts_db, mock_documents_db,
+                                                                    manifest_path):
+        mock_excerpts_db.batch_size = 1
+        mock_documents_db.add_documents_with_embeddings.side_effect = [None, ConnectionError("ollama stopped")]
+
+        with pytest.raises(ConnectionError):
+            zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        checkpoint = IndexManifest.load(get_rebuild_checkpoint_path(manifest_path))
+        assert len(checkpoint.files) == 1
+        mock_documents_db.promote.assert_not_called()
+
+    def should_resume_interrupted_reindex_without_reindexing_checkpointed_files(self, zk, mock_excerpts_db,
+                                                                               mock_documents_db, manifest_path):
+        mock_excerpts_db.batch_size = 1
+        mock_documents_db.add_documents_with_embeddings.side_effect = [None, ConnectionError("ollama stopped")]
+        with pytest.raises(ConnectionError):
+            zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        checkpointed = set(IndexManifest.load(get_rebuild_checkpoint_path(manifest_path)).files)
+        mock_documents_db.add_documents_with_embeddings.side_effect = None
+        mock_documents_db.embed_documents.reset_mock()
+        mock_documents_db.create_shadow.reset_mock()
+
+        zk.reindex(excerpt_size=500, excerpt_overlap=100, resume=True)
+
+        mock_documents_db.create_shadow.assert_not_called()
+        assert set(self.indexed_ids(mock_documents_db)) == {"First.md", "Second.md"} - checkpointed
+        assert set(IndexManifest.load(manifest_path).files) == {"First.md", "Second.md"}
+        assert not os.path.exists(get_rebuild_checkpoint_path(manifest_path))
+
+    def should_start_over_when_resuming_without_checkpoint(self, zk, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100, resume=True)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert set(self.indexed_ids(mock_documents_db)) == {"First.md", "Second.md"}
+
+    def should_checkpoint_manifest_during_incremental_update(self, zk, vault, mock_excerpts_db, mock_documents_db,
+                                                             manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_excerpts_db.batch_size = 1
+        zk.checkpoint_interval = 1
+        (vault / "Third.md").write_text("Third note content")
+        (vault / "Fourth.md").write_text("Fourth note content")
+        mock_documents_db.add_documents_with_embeddings.side_effect = [None, ConnectionError("ollama stopped")]
+
+        with pytest.raises(ConnectionError):
+            zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        assert len(IndexManifest.load(manifest_path).files) == 3
+
+    def should_write_run_report_with_counts_and_stage_times(self, zk, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        report = IndexRunReport.load(get_index_run_report_path(manifest_path))
+        assert report == zk.last_run
+        assert (report.operation, report.status) == ("reindex", "completed")
+        assert (report.documents, report.documents_total, report.excerpts) == (2, 2, 2)
+        assert report.tokens == len("First note content") + len("Second note content")
+        assert (report.embedded_documents, report.embedded_excerpts) == (2, 2)
+        assert {"read", "parse", "split", "plan", "embed", "write"} <= set(report.stage_seconds)
+
+    def should_count_documents_with_unchanged_excerpts_in_run_report(self, zk, vault):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        (vault / "First.md").write_text("---\ntags: [draft]\n---\nFirst note content")
+
+        zk.update_documents(["First.md"], excerpt_size=500, excerpt_overlap=100)
+
+        assert zk.last_run.operation == "update_documents"
+        assert (zk.last_run.documents, zk.last_run.unchanged_documents) == (1, 1)
+        assert zk.last_run.embedded_excerpts == 0
+
+    def should_record_failed_run_in_report(self, zk, vault, mock_documents_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        (vault / "First.md").write_text("First note content, edited")
+        mock_documents_db.add_documents_with_embeddings.side_effect = ConnectionError("ollama stopped")
+
+        with pytest.raises(ConnectionError):
+            zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        report = IndexRunReport.load(get_index_run_report_path(manifest_path))
+        assert (report.operation, report.status, report.error) == ("update", "failed", "ollama stopped")
+
+    def should_record_index_stats_after_reindex(self, zk, manifest_path, mock_excerpts_db, mock_documents_db):
+        mock_excerpts_db.count.return_value = 2
+        mock_documents_db.count.return_value = 2
+
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        stats = IndexStats.load(get_index_stats_path(manifest_path))
+        assert (stats.documents, stats.excerpts, stats.stale_files) == (2, 2, 0)
+        assert stats.tokens == len("First note content") + len("Second note content")
+        assert stats.vectors == {"excerpts": 2, "documents": 2}
+
+    def should_count_files_left_unindexed_by_failed_update_as_stale(self, zk, vault, mock_excerpts_db,
+                                                                    mock_documents_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_excerpts_db.batch_size = 1
+        (vault / "Third.md").write_text("Third note content")
+        (vault / "Fourth.md").write_text("Fourth note content")
+        mock_documents_db.add_documents_with_embeddings.side_effect = [None, ConnectionError("ollama stopped")]
+
+        with pytest.raises(ConnectionError):
+            zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        stats = IndexStats.load(get_index_stats_path(manifest_path))
+        assert (stats.documents, stats.stale_files) == (3, 1)
+
+    def should_skip_files_whose_content_is_unchanged_after_touch(self, zk, vault, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        os.utime(vault / "First.md", (0, 0))
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.embed_documents.assert_not_called()
+
+    def should_reindex_files_whose_content_changed(self, zk, vault, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        (vault / "Second.md").write_text("Second note, rewritten")
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        assert self.indexed_ids(mock_documents_db) == ["Second.md"]
+
+    def should_index_new_files(self, zk, vault, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        (vault / "Third.md").write_text("Third note content")
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        assert self.indexed_ids(mock_documents_db) == ["Third.md"]
+
+    def should_rebuild_when_chunking_parameters_change(self, zk, mock_excerpts_db, mock_documents_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.create_shadow.reset_mock()
+
+        zk.update_index(excerpt_size=250, excerpt_overlap=50)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert IndexManifest.load(manifest_path).excerpt_size == 250
+
+    def should_rebuild_when_embedding_format_changes(self, zk, mock_documents_db, manifest_path):
+        zk.embedding_format = "ollama:mxbai-embed-large:unit"
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.create_shadow.reset_mock()
+        zk.embedding_format = "ollama:nomic-embed-text:unit"
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert IndexManifest.load(manifest_path).embedding_format == "ollama:nomic-embed-text:unit"
+
+    def should_rebuild_when_vector_store_changes(self, zk, mock_documents_db, manifest_path):
+        zk.vector_store = VectorStore.CHROMA
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.create_shadow.reset_mock()
+        zk.vector_store = VectorStore.NUMPY
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert IndexManifest.load(manifest_path).vector_store == VectorStore.NUMPY
+
+    def should_rebuild_index_without_manifest_instead_of_adopting_vectors_of_unknown_format(self, zk,
+                                                                                            mock_documents_db):
+        zk.embedding_format = "ollama:mxbai-embed-large:unit"
+
+        zk.update_index(since=datetime.now() + timedelta(days=1), excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert self.indexed_ids(mock_documents_db) == ["First.md", "Second.md"]
+
+    def should_adopt_files_older_than_since_when_no_manifest_exists(self, zk, mock_documents_db, manifest_path):
+        zk.chunking = ChunkingStrategy.TOKENS
+
+        zk.update_index(since=datetime.now() + timedelta(days=1), excerpt_size=500, excerpt_overlap=100)
+
+        assert self.embedded(mock_documents_db) == []
+        assert set(IndexManifest.load(manifest_path).files) == {"First.md", "Second.md"}
+        assert IndexManifest.load(manifest_path).chunking == ChunkingStrategy.TOKENS
+
+    def should_rebuild_index_without_manifest_when_chunking_is_not_token_windows(self, zk, mock_documents_db,
+                                                                                 manifest_path):
+        zk.chunking = ChunkingStrategy.MARKDOWN
+
+        zk.update_index(since=datetime.now() + timedelta(days=1), excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert self.indexed_ids(mock_documents_db) == ["First.md", "Second.md"]
+        assert IndexManifest.load(manifest_path).chunking == ChunkingStrategy.MARKDOWN
+
+    def should_embed_only_changed_excerpts(self, zk, vault, mock_excerpts_db):
+        (vault / "First.md").write_text("aaaaabbbbb")
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+        mock_excerpts_db.embed_documents.reset_mock()
+        (vault / "First.md").write_text("aaaaaccccc")
+
+        zk.update_index(excerpt_size=5, excerpt_overlap=0)
+
+        added = self.embedded(mock_excerpts_db)
+        assert [excerpt.content for excerpt in added] == ["ccccc"]
+        assert added[0].metadata["ordinal"] == 1
+
+    def should_delete_excerpts_that_no_longer_exist(self, zk, vault, mock_excerpts_db, manifest_path):
+        (vault / "First.md").write_text("aaaaabbbbb")
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+        stale_id = IndexManifest.load(manifest_path).files["First.md"].chunk_ids[1]
+        (vault / "First.md").write_text("aaaaa")
+
+        zk.update_index(excerpt_size=5, excerpt_overlap=0)
+
+        mock_excerpts_db.delete_documents.assert_called_once_with([stale_id])
+
+    def should_not_reembed_document_when_only_frontmatter_changed(self, zk, vault, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        (vault / "First.md").write_text("---\ntags: [new]\n---\nFirst note content")
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        assert self.embedded(mock_documents_db) == []
+
+    def should_remove_deleted_files_from_index_on_update(self, zk, vault, mock_documents_db, mock_excerpts_db,
+                                                          manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        (vault / "Second.md").unlink()
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.delete_for_documents.assert_called_once_with(["Second.md"])
+        mock_excerpts_db.delete_for_documents.assert_called_once_with(["Second.md"])
+        assert set(IndexManifest.load(manifest_path).files) == {"First.md"}
+
+    def should_replace_stored_excerpts_of_changed_file_missing_from_manifest(self, zk, vault, mock_excerpts_db,
+                                                                              manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        manifest = IndexManifest.load(manifest_path)
+        del manifest.files["First.md"]
+        manifest.save(manifest_path)
+        (vault / "First.md").write_text("First note rewritten")
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_excerpts_db.delete_for_documents.assert_called_once_with(["First.md"])
+
+    def should_not_delete_from_new_shadow_collections_on_reindex(self, zk, mock_excerpts_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        mock_excerpts_db.delete_for_documents.assert_not_called()
+
+    def should_index_only_the_given_changed_files(self, zk, vault, mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        (vault / "First.md").write_text("First note, rewritten")
+        (vault / "Second.md").write_text("Second note, rewritten")
+
+        zk.update_documents(["First.md"], excerpt_size=500, excerpt_overlap=100)
+
+        assert self.indexed_ids(mock_documents_db) == ["First.md"]
+
+    def should_remove_given_files_that_no_longer_exist(self, zk, vault, mock_documents_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        (vault / "Second.md").unlink()
+
+        zk.update_documents(["Second.md"], excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.delete_for_documents.assert_called_once_with(["Second.md"])
+        assert set(IndexManifest.load(manifest_path).files) == {"First.md"}
+
+    def should_move_vectors_of_file_moved_outside_zk_chat(self, zk, vault, mock_documents_db, mock_excerpts_db,
+                                                          manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.embed_documents.reset_mock()
+        (vault / "Archive").mkdir()
+        (vault / "First.md").rename(vault / "Archive" / "First.md")
+        moved_path = os.path.join("Archive", "First.md")
+
+        zk.update_documents(["First.md", moved_path], excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.get_for_document.assert_called_once_with("First.md")
+        assert self.embedded(mock_documents_db) == []
+        assert set(IndexManifest.load(manifest_path).files) == {moved_path, "Second.md"}
+
+    def should_plan_added_changed_and_removed_files_without_embedding(self, zk, vault, mock_excerpts_db,
+                                                                      mock_documents_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_excerpts_db.embed_documents.reset_mock()
+        mock_documents_db.embed_documents.reset_mock()
+        manifest_before = IndexManifest.load(manifest_path)
+        (vault / "First.md").write_text("First note, rewritten")
+        (vault / "Second.md").unlink()
+        (vault / "Third.md").write_text("Third note")
+
+        plan = zk.plan_update(excerpt_size=500, excerpt_overlap=100)
+
+        assert [planned.relative_path for planned in plan.added] == ["Third.md"]
+        assert [planned.relative_path for planned in plan.changed] == ["First.md"]
+        assert plan.removed == ["Second.md"]
+        assert not plan.full_rebuild
+        mock_excerpts_db.embed_documents.assert_not_called()
+        mock_documents_db.embed_documents.assert_not_called()
+        assert IndexManifest.load(manifest_path) == manifest_before
+
+    def should_count_tokens_of_excerpts_and_documents_to_embed(self, zk, vault):
+        (vault / "First.md").write_text("aaaaabbbbb")
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+        (vault / "First.md").write_text("aaaaaccccc")
+
+        plan = zk.plan_update(excerpt_size=5, excerpt_overlap=0)
+
+        assert plan.changed[0].model_dump() == {"relative_path": "First.md", "excerpts": 1, "documents": 1,
+                                                "tokens": 15}
+        assert (plan.excerpts, plan.documents, plan.tokens, plan.unchanged) == (1, 1, 15, 1)
+
+    def should_plan_full_rebuild_when_chunking_parameters_change(self, zk):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        plan = zk.plan_update(excerpt_size=250, excerpt_overlap=50)
+
+        assert plan.full_rebuild
+        assert plan.reason == "chunking parameters changed"
+        assert sorted(planned.relative_path for planned in plan.changed) == ["First.md", "Second.md"]
+
+    def should_not_count_document_tokens_when_document_vectors_are_pooled(self, zk):
+        zk.document_vectors = DocumentVectorStrategy.POOLED_EXCERPTS
+
+        plan = zk.plan_update(excerpt_size=500, excerpt_overlap=100)
+
+        assert plan.documents == 0
+        assert plan.tokens == len("First note content") + len("Second note content")
+
+    def should_store_offsets_and_heading_of_markdown_excerpts(self, zk, vault, mock_excerpts_db):
+        (vault / "First.md").write_text("# Topic\n\nBody text")
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        excerpt = next(doc for doc in self.embedded(mock_excerpts_db) if doc.metadata["id"] == "First.md")
+
+        assert excerpt.content == "# Topic\n\nBody text"
+        assert excerpt.metadata["start"] == 0
+        assert excerpt.metadata["end"] == len("# Topic\n\nBody text")
+        assert excerpt.metadata["heading"] == "Topic"
+
+    def should_split_into_token_windows_with_token_chunking(self, zk, mock_excerpts_db):
+        zk.chunking = ChunkingStrategy.TOKENS
+
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+
+        first_excerpts = [doc.content for doc in self.embedded(mock_excerpts_db) if doc.metadata["id"] == "First.md"]
+        assert first_excerpts == ["First", " note", " cont", "ent"]
+
+    def should_store_offsets_of_token_windows(self, zk, mock_excerpts_db):
+        zk.chunking = ChunkingStrategy.TOKENS
+
+        zk.reindex(excerpt_size=8, excerpt_overlap=3)
+
+        first_excerpts = [doc for doc in self.embedded(mock_excerpts_db) if doc.metadata["id"] == "First.md"]
+        assert [(doc.metadata["start"], doc.metadata["end"]) for doc in first_excerpts] == [(0, 8), (5, 13), (10, 18)]
+
+    def should_rebuild_when_chunking_strategy_changes(self, zk, mock_documents_db, manifest_path):
+        zk.chunking = ChunkingStrategy.TOKENS
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_documents_db.create_shadow.reset_mock()
+        zk.chunking = ChunkingStrategy.MARKDOWN
+
+        zk.update_index(excerpt_size=500, excerpt_overlap=100)
+
+        mock_documents_db.create_shadow.assert_called_once()
+        assert IndexManifest.load(manifest_path).chunking == ChunkingStrategy.MARKDOWN
+
+    def should_pool_document_vectors_from_excerpts_without_embedding_documents(self, zk, mock_documents_db,
+                                                                               mock_excerpts_db):
+        zk.document_vectors = DocumentVectorStrategy.POOLED_EXCERPTS
+
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+
+        mock_documents_db.embed_documents.assert_called_once_with([])
+        stored = [doc for call in mock_documents_db.add_documents_with_embeddings.call_args_list for doc in call.args[0]]
+        assert {doc.id for doc in stored} == {"First.md", "Second.md"}
+        assert all(doc.embedding == [0.0] for doc in stored)
+
+    def should_pool_unchanged_excerpts_read_back_from_index(self, zk, vault, mock_documents_db, mock_excerpts_db,
+                                                            manifest_path):
+        zk.document_vectors = DocumentVectorStrategy.POOLED_EXCERPTS
+        (vault / "First.md").write_text("aaaaabbbbb")
+        zk.reindex(excerpt_size=5, excerpt_overlap=0)
+        unchanged_id = IndexManifest.load(manifest_path).files["First.md"].chunk_ids[0]
+        mock_excerpts_db.get_for_document.return_value = [
+            VectorDocumentWithEmbeddings(id=unchanged_id, content="aaaaa", metadata={"id": "First.md"},
+                                         embedding=[1.0, 0.0])
+        ]
+        (vault / "First.md").write_text("aaaaaccccc")
+
+        zk.update_index(excerpt_size=5, excerpt_overlap=0)
+
+        mock_excerpts_db.get_for_document.assert_called_with("First.md")
+        assert mock_documents_db.embed_documents.call_args.args[0] == []
+
+    def should_remove_orphaned_documents_found_in_index(self, zk, mock_documents_db, mock_excerpts_db):
+        mock_documents_db.get_indexed_document_ids.return_value = {"First.md", "Gone.md"}
+        mock_excerpts_db.get_indexed_document_ids.return_value = {"Second.md", "Also Gone.md"}
+
+        orphans = zk.remove_orphaned_documents()
+
+        assert orphans == ["Also Gone.md", "Gone.md"]
+        mock_documents_db.delete_for_documents.assert_called_once_with(["Also Gone.md", "Gone.md"])
+
+    def should_remove_vectors_when_document_deleted(self, zk, mock_documents_db, mock_excerpts_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+
+        zk.delete_document("First.md")
+
+        mock_documents_db.delete_for_documents.assert_called_once_with(["First.md"])
+        mock_excerpts_db.delete_for_documents.assert_called_once_with(["First.md"])
+        assert "First.md" not in IndexManifest.load(manifest_path).files
+
+    def should_keep_document_deleted_by_another_instance_during_update(self, zk, vault, manifest_path,
+                                                                       mock_tokenizer_gateway, mock_excerpts_db,
+                                                                       mock_documents_db):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        other = Zettelkasten(mock_tokenizer_gateway, mock_excerpts_db, mock_documents_db,
+                             MarkdownFilesystemGateway(str(vault)), manifest_path=manifest_path)
+        (vault / "First.md").write_text("First note, rewritten")
+
+        def delete_while_embedding(documents):
+            if other.document_exists("Second.md"):
+                other.delete_document("Second.md")
+            return embed_with_fake_vectors(documents)
+        mock_documents_db.embed_documents.side_effect = delete_while_embedding
+
+        zk.update_documents(["First.md"], excerpt_size=500, excerpt_overlap=100)
+
+        manifest = IndexManifest.load(manifest_path)
+        assert set(manifest.files) == {"First.md"}
+        assert manifest.files["First.md"].content_hash == hash_content("First note, rewritten")
+
+    def should_move_vectors_without_reembedding_when_document_renamed(self, zk, mock_documents_db,
+                                                                       mock_excerpts_db, manifest_path):
+        zk.reindex(excerpt_size=500, excerpt_overlap=100)
+        mock_excerpts_db.get_for_document.return_value = [
+            VectorDocumentWithEmbeddings(id="First.md#0#abc", content="First note content",
+                                         metadata={"id": "First.md", "title": "First", "ordinal": 0},
+                                         embedding=[0.1, 0.2])
+        ]
+        mock_excerpts_db.embed_documents.reset_mock()
+
+        zk.rename_document("First.md", "Archive/Renamed.md")
+
+        moved = mock_excerpts_db.add_documents_with_embeddings.call_args[0][0]
+        assert moved[0].id.startswith("Archive/Renamed.md#0#")
+        assert moved[0].metadata["title"] == "Renamed"
+        assert moved[0].embedding == [0.1, 0.2]
+        mock_excerpts_db.embed_documents.assert_not_called()
+        assert IndexManifest.load(manifest_path).files["Archive/Renamed.md"].chunk_ids == [moved[0].id]
+
+
+def excerpt_hit(document_id, distance):
+    return QueryResult(
+        document=VectorDocumentForStorage(id=f"{document_id}#0#abc", content=f"Text of {document_id[:-3]}",
+                                          metadata={"id": document_id, "title": document_id[:-3]}),
+        distance=distance
+    )
+
+
+def lexical_hit(document_id, score):
+    return QueryResult(
+        document=VectorDocumentForStorage(id=f"{document_id}#0#abc", content=f"Text of {document_id[:-3]}",
+                                          metadata={"id": document_id, "title": document_id[:-3]}),
+        score=score
+    )
+
+
+class DescribeZettelkastenQueryCaching:
+    """
+    Describes how the Zettelkasten reuses query results until the index changes
+    """
+
+    @pytest.fixture
+    def mock_excerpts_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.collection_name = ZkCollectionName.EXCERPTS
+        mock.index_version.return_value = "v1"
+        mock.query_many.side_effect = lambda queries, n_results: [
+            [excerpt_hit("First.md", 0.2), excerpt_hit("Second.md", 1.5)] for _ in queries
+        ]
+        return mock
+
+    @pytest.fixture
+    def zk(self, tmp_path, mock_excerpts_db):
+        return Zettelkasten(Mock(spec=TokenizerGateway), mock_excerpts_db, Mock(spec=VectorDatabase),
+                            MarkdownFilesystemGateway(str(tmp_path)))
+
+    def should_search_once_for_repeated_query(self, zk, mock_excerpts_db):
+        first = zk.query_excerpts("notes", n_results=2)
+        second = zk.query_excerpts("notes", n_results=2)
+
+        assert first == second
+        assert [result.excerpt.document_id for result in second] == ["First.md"]
+        mock_excerpts_db.query_many.assert_called_once()
+
+    def should_search_again_when_parameters_differ(self, zk, mock_excerpts_db):
+        zk.query_excerpts("notes", n_results=2)
+        results = zk.query_excerpts("notes", n_results=2, max_distance=2.0)
+
+        assert len(results) == 2
+        assert mock_excerpts_db.query_many.call_count == 2
+
+    def should_search_again_once_index_changes(self, zk, mock_excerpts_db):
+        zk.query_excerpts("notes", n_results=2)
+        mock_excerpts_db.index_version.return_value = "v2"
+
+        zk.query_excerpts("notes", n_results=2)
+
+        assert mock_excerpts_db.query_many.call_count == 2
+
+    def should_always_search_when_cache_disabled(self, tmp_path, mock_excerpts_db):
+        zk = Zettelkasten(Mock(spec=TokenizerGateway), mock_excerpts_db, Mock(spec=VectorDatabase),
+                          MarkdownFilesystemGateway(str(tmp_path)), result_cache_size=0)
+
+        zk.query_excerpts("notes", n_results=2)
+        zk.query_excerpts("notes", n_results=2)
+
+        assert mock_excerpts_db.query_many.call_count == 2
+
+    def should_search_several_queries_together_and_group_results(self, zk, mock_excerpts_db):
+        results = zk.query_excerpts_many(["notes", "ideas"], n_results=2, max_distance=2.0)
+
+        assert [[result.excerpt.document_id for result in group] for group in results] == \
+               [["First.md", "Second.md"], ["First.md", "Second.md"]]
+        mock_excerpts_db.query_many.assert_called_once_with(["notes", "ideas"], n_results=2)
+
+    def should_search_only_uncached_queries_in_batch(self, zk, mock_excerpts_db):
+        zk.query_excerpts("notes", n_results=2)
+
+        results = zk.query_excerpts_many(["notes", "ideas"], n_results=2)
+
+        assert len(results) == 2
+        mock_excerpts_db.query_many.assert_called_with(["ideas"], n_results=2)
+
+
+class DescribeZettelkastenRetrievalModes:
+    """
+    Describes answering excerpt queries by embedding, by lexical match, or by both
+    """
+
+    @pytest.fixture
+    def mock_excerpts_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.collection_name = ZkCollectionName.EXCERPTS
+        mock.index_version.return_value = "v1"
+        mock.query_many.side_effect = lambda queries, n_results: [
+            [excerpt_hit("Semantic.md", 0.3), excerpt_hit("Both.md", 0.5)] for _ in queries
+        ]
+        mock.query_lexical.return_value = [lexical_hit("Both.md", 7.5), lexical_hit("Exact.md", 3.2)]
+        return mock
+
+    def create_zk(self, tmp_path, mock_excerpts_db, mode):
+        return Zettelkasten(Mock(spec=TokenizerGateway), mock_excerpts_db, Mock(spec=VectorDatabase),
+                            MarkdownFilesystemGateway(str(tmp_path)), retrieval_mode=mode)
+
+    def found_documents(self, results):
+        return [result.excerpt.document_id for result in results]
+
+    def should_merge_vector_and_lexical_results_in_hybrid_mode(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, RetrievalMode.HYBRID)
+
+        results = zk.query_excerpts("Oscar Wilde", n_results=3)
+
+        assert self.found_documents(results) == ["Both.md", "Semantic.md", "Exact.md"]
+        assert results[0].distance == 0.5
+        assert results[0].score > results[1].score > results[2].score
+
+    def should_leave_distance_only_on_results_found_by_embedding(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, RetrievalMode.HYBRID)
+
+        results = zk.query_excerpts("Oscar Wilde", n_results=3)
+
+        assert [result.distance for result in results] == [0.5, 0.3, None]
+
+    def should_not_embed_query_in_lexical_mode(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, RetrievalMode.LEXICAL)
+
+        results = zk.query_excerpts("Oscar Wilde", n_results=3)
+
+        assert self.found_documents(results) == ["Both.md", "Exact.md"]
+        assert [(result.distance, result.score) for result in results] == [(None, 7.5), (None, 3.2)]
+        mock_excerpts_db.query_many.assert_not_called()
+
+    def should_let_callers_choose_mode_per_query(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, RetrievalMode.HYBRID)
+
+        results = zk.query_excerpts("Oscar Wilde", n_results=3, mode=RetrievalMode.VECTOR)
+
+        assert self.found_documents(results) == ["Semantic.md", "Both.md"]
+        mock_excerpts_db.query_lexical.assert_not_called()
+
+
+class DescribeZettelkastenDocumentHydration:
+    """
+    Describes serving document query results from the document index instead of re-reading the files
+    """
+    NOTE = "---\ntags: [a]\n---\nNote content"
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        (vault / "Note.md").write_text(self.NOTE)
+        return vault
+
+    @pytest.fixture
+    def mock_documents_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.collection_name = ZkCollectionName.DOCUMENTS
+        mock.index_version.return_value = "v1"
+        return mock
+
+    @pytest.fixture
+    def zk(self, vault, mock_documents_db):
+        return Zettelkasten(Mock(spec=TokenizerGateway), Mock(spec=VectorDatabase), mock_documents_db,
+                            MarkdownFilesystemGateway(str(vault)), result_cache_size=0)
+
+    def stored_hit(self, vault, **metadata):
+        mtime_ns, _ = MarkdownFilesystemGateway(str(vault)).get_file_signature("Note.md")
+        return QueryResult(
+            document=VectorDocumentForStorage(
+                id="Note.md", content="Stored content",
+                metadata={"id": "Note.md", "title": "Note", "size": len(self.NOTE),
+                          "mtime": datetime.fromtimestamp(mtime_ns / 1e9).timestamp(),
+                          "frontmatter": '{"tags": ["a"]}', **metadata}
+            ),
+            distance=0.1
+        )
+
+    def should_serve_unchanged_document_from_index(self, zk, vault, mock_documents_db):
+        mock_documents_db.query_many.return_value = [[self.stored_hit(vault)]]
+
+        with patch.object(MarkdownFilesystemGateway, "read_markdown") as read_markdown:
+            results = zk.query_documents("note")
+
+        read_markdown.assert_not_called()
+        assert results[0].document == ZkDocument(relative_path="Note.md", metadata={"tags": ["a"]},
+                                                 content="Stored content")
+
+    def should_read_document_changed_since_indexing(self, zk, vault, mock_documents_db):
+        mock_documents_db.query_many.return_value = [[self.stored_hit(vault, size=1)]]
+
+        results = zk.query_documents("note")
+
+        assert results[0].document.content == "Note content"
+
+    def should_read_document_indexed_without_file_details(self, zk, mock_documents_db):
+        mock_documents_db.query_many.return_value = [[QueryResult(
+            document=VectorDocumentForStorage(id="Note.md", content="Stored content",
+                                              metadata={"id": "Note.md", "title": "Note"}),
+            distance=0.1
+        )]]
+
+        results = zk.query_documents("note")
+
+        assert results[0].document.metadata == {"tags": ["a"]}
+        assert results[0].document.content == "Note content"
+
+
+class DescribeZettelkastenDocumentCache:
+    """
+    Describes reading notes through the parsed-document cache
+    """
+
+    @pytest.fixture
+    def vault(self, tmp_path):
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        (vault / "Note.md").write_text("---\ntitle: Note\n---\nNote content")
+        return vault
+
+    @pytest.fixture
+    def mock_db(self):
+        mock = Mock(spec=VectorDatabase)
+        mock.get_for_document.return_value = []
+        return mock
+
+    @pytest.fixture
+    def zk(self, vault, mock_db):
+        return Zettelkasten(Mock(spec=TokenizerGateway), mock_db, mock_db, MarkdownFilesystemGateway(str(vault)),
+                            document_cache=DocumentCache())
+
+    def should_parse_unchanged_note_once(self, zk):
+        with patch.object(MarkdownFilesystemGateway, "read_markdown",
+                          wraps=zk.filesystem_gateway.read_markdown) as read_markdown:
+            first = zk.read_document("Note.md")
+            second = zk.read_document("Note.md")
+
+        assert first == second
+        read_markdown.assert_called_once_with("Note.md")
+
+    def should_read_note_changed_outside_zettelkasten(self, zk, vault):
+        zk.read_document("Note.md")
+        (vault / "Note.md").write_text("---\ntitle: Note\n---\nEdited elsewhere")
+
+        assert zk.read_document("Note.md").content == "Edited elsewhere"
+
+    def should_read_note_again_after_overwriting_it(self, zk):
+        zk.read_document("Note.md")
+
+        zk.create_or_overwrite_document(ZkDocument(relative_path="Note.md", metadata={}, content="Rewritten"))
+
+        assert zk.read_document("Note.md").content == "Rewritten"
+
+    def should_forget_deleted_note(self, zk):
+        zk.read_document("Note.md")
+
+        zk.delete_document("Note.md")
+
+        assert len(zk.document_cache) == 0
+
+    def should_forget_renamed_note(self, zk):
+        zk.read_document("Note.md")
+
+        zk.rename_document("Note.md", "Renamed.md")
+
+        assert len(zk.document_cache) == 0
+        assert zk.read_document("Renamed.md").relative_path == "Renamed.md"
+
+
+class DescribeZettelkastenExcerptPassages:
+    """
+    Describes returning overlapping excerpts of one note as a single passage
+    """
+
+    @pytest.fixture
+    def mock_excerpts_db(self):
+        note = "Alpha beta gamma. Delta epsilon zeta."
+        mock = Mock(spec=VectorDatabase)
+        mock.collection_name = ZkCollectionName.EXCERPTS
+        mock.index_version.return_value = "v1"
+        mock.query_many.return_value = [[
+            QueryResult(
+                document=VectorDocumentForStorage(
+                    id=f"Note.md#{ordinal}#abc", content=note[start:end],
+                    metadata={"id": "Note.md", "title": "Note", "ordinal": ordinal, "start": start, "end": end}
+                ),
+                distance=distance
+            )
+            for ordinal, start, end, distance in [(1, 11, 37, 0.2), (0, 0, 24, 0.3)]
+        ]]
+        return mock
+
+    def create_zk(self, tmp_path, mock_excerpts_db, merge_excerpts):
+        return Zettelkasten(Mock(spec=TokenizerGateway), mock_excerpts_db, Mock(spec=VectorDatabase),
+                            MarkdownFilesystemGateway(str(tmp_path)), merge_excerpts=merge_excerpts)
+
+    def should_merge_overlapping_excerpts_of_one_note(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, merge_excerpts=True)
+
+        results = zk.query_excerpts("greek letters")
+
+        assert [result.excerpt.text for result in results] == ["Alpha beta gamma. Delta epsilon zeta."]
+        assert results[0].distance == 0.2
+
+    def should_return_excerpts_as_found_when_merging_is_off(self, tmp_path, mock_excerpts_db):
+        zk = self.create_zk(tmp_path, mock_excerpts_db, merge_excerpts=False)
+
+        results = zk.query_excerpts("greek letters")
+
+        assert len(results) == 2